@@ -0,0 +1,49 @@
+"""
+Script for moving the data of all course assets into content-addressed blobs, so that
+assets with the same content, such as those of course reruns, share a single copy of it.
+"""
+
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from xmodule.contentstore.django import contentstore
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Store the data of all assets in the contentstore once per distinct content, and report the space saved.
+    """
+    help = (
+        'Store the data of all assets in the contentstore once per distinct content, and report the space saved. '
+        'Enable the content_addressed contentstore option to store newly written assets the same way.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--report',
+            action='store_true',
+            help='Only report the space used by assets, without converting any of them.'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Execute the command
+        """
+        content_store = contentstore()
+
+        if not options['report']:
+            log.info(u"Converting assets to content-addressed storage")
+            converted = content_store.convert_to_content_addressed()
+            log.info(u"Total number of assets converted: {0}".format(converted))
+
+        stats = content_store.get_storage_stats()
+        saved = stats['asset_bytes'] - stats['stored_bytes']
+        self.stdout.write(u"Asset data: {0} bytes".format(stats['asset_bytes']))
+        self.stdout.write(u"Stored data: {0} bytes".format(stats['stored_bytes']))
+        self.stdout.write(u"Space saved: {0} bytes ({1:.1f}%)".format(
+            saved, 100.0 * saved / stats['asset_bytes'] if stats['asset_bytes'] else 0
+        ))
@@ -15,20 +15,15 @@ At present, it differs from Studio exports in several ways:
 """
 
 
-import os
 import re
-import shutil
-import tarfile
-from tempfile import mkdtemp, mktemp
 from textwrap import dedent
 
 from django.core.management.base import BaseCommand, CommandError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
-from path import Path as path
 
 from xmodule.modulestore.django import modulestore
-from xmodule.modulestore.xml_exporter import export_course_to_xml
+from xmodule.modulestore.xml_exporter import export_course_to_tar
 
 
 class Command(BaseCommand):
@@ -52,44 +47,19 @@ class Command(BaseCommand):
             raise CommandError("Insufficient arguments")
 
         filename = options['output']
-        pipe_results = False
-
         if filename is None:
-            filename = mktemp()
-            pipe_results = True
-
-        export_course_to_tarfile(course_key, filename)
-
-        results = self._get_results(filename) if pipe_results else b''
-
-        # results is of type bytes, so we must write the underlying buffer directly.
-        self.stdout.buffer.write(results)
-
-    def _get_results(self, filename):
-        """
-        Load results from file.
-
-        Returns:
-            bytes: bytestring of file contents.
-        """
-        with open(filename, 'rb') as f:
-            results = f.read()
-            os.remove(filename)
-        return results
-
+            # The archive is bytes, so we must write to the underlying buffer directly.
+            export_course_to_tarfile(course_key, self.stdout.buffer)
+        else:
+            with open(filename, 'wb') as output:
+                export_course_to_tarfile(course_key, output)
 
-def export_course_to_tarfile(course_key, filename):
-    """Exports a course into a tar.gz file"""
-    tmp_dir = mkdtemp()
-    try:
-        course_dir = export_course_to_directory(course_key, tmp_dir)
-        compress_directory(course_dir, filename)
-    finally:
-        shutil.rmtree(tmp_dir, ignore_errors=True)
 
-
-def export_course_to_directory(course_key, root_dir):
-    """Export course into a directory"""
+def export_course_to_tarfile(course_key, output):
+    """
+    Exports a course into a tar.gz file, which is streamed into the file object `output`
+    while the course is exported.
+    """
     store = modulestore()
     course = store.get_course(course_key)
     if course is None:
@@ -102,15 +72,4 @@ def export_course_to_directory(course_key, root_dir):
     course_dir = replacement_char.join([course.id.org, course.id.course, course.id.run])
     course_dir = re.sub(r'[^\w\.\-]', replacement_char, course_dir)
 
-    export_course_to_xml(store, None, course.id, root_dir, course_dir)
-
-    export_dir = path(root_dir) / course_dir
-    return export_dir
-
-
-def compress_directory(directory, filename):
-    """Compress a directory into a tar.gz file"""
-    mode = 'w:gz'
-    name = path(directory).name
-    with tarfile.open(filename, mode) as tar_file:
-        tar_file.add(directory, arcname=name)
+    export_course_to_tar(store, None, course.id, output, course_dir)
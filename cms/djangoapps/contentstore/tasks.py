@@ -9,7 +9,7 @@ import os
 import shutil
 import tarfile
 from datetime import datetime
-from tempfile import NamedTemporaryFile, mkdtemp
+from tempfile import NamedTemporaryFile
 
 from ccx_keys.locator import CCXLocator
 from celery.task import task
@@ -50,7 +50,7 @@ from xmodule.exceptions import SerializationError
 from xmodule.modulestore import COURSE_ROOT, LIBRARY_ROOT
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import DuplicateCourseError, ItemNotFoundError
-from xmodule.modulestore.xml_exporter import export_course_to_xml, export_library_to_xml
+from xmodule.modulestore.xml_exporter import export_course_to_tar, export_library_to_tar
 from xmodule.modulestore.xml_importer import import_course_from_xml, import_library_from_xml
 
 User = get_user_model()
@@ -282,20 +282,19 @@ def create_export_tarball(course_module, course_key, context, status=None):
     """
     name = course_module.url_name
     export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")
-    root_dir = path(mkdtemp())
 
     try:
+        # The export is compressed into the tar file as it is written.
+        LOGGER.debug(u'tar file being generated at %s', export_file.name)
         if isinstance(course_key, LibraryLocator):
-            export_library_to_xml(modulestore(), contentstore(), course_key, root_dir, name)
+            export_library_to_tar(modulestore(), contentstore(), course_key, export_file, name)
         else:
-            export_course_to_xml(modulestore(), contentstore(), course_module.id, root_dir, name)
+            export_course_to_tar(modulestore(), contentstore(), course_module.id, export_file, name)
+        export_file.seek(0)
 
         if status:
             status.set_state(u'Compressing')
             status.increment_completed_steps()
-        LOGGER.debug(u'tar file being generated at %s', export_file.name)
-        with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
-            tar_file.add(root_dir / name, arcname=name)
 
     except SerializationError as exc:
         LOGGER.exception(u'There was an error exporting %s', course_key, exc_info=True)
@@ -328,9 +327,6 @@ def create_export_tarball(course_module, course_key, context, status=None):
         if status:
             status.fail(json.dumps({'raw_error_msg': context['raw_err_msg']}))
         raise
-    finally:
-        if os.path.exists(root_dir / name):
-            shutil.rmtree(root_dir / name)
 
     return export_file
 
@@ -514,7 +510,8 @@ def import_olx(self, user_id, course_key_string, archive_path, archive_name, lan
             settings.GITHUB_REPO_ROOT, [dirpath],
             load_error_modules=False,
             static_content_store=contentstore(),
-            target_id=courselike_key
+            target_id=courselike_key,
+            static_import_workers=settings.COURSE_IMPORT_STATIC_WORKERS,
         )
 
         new_location = courselike_items[0].location
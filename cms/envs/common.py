@@ -149,6 +149,11 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Backend storage options
     PRUNING_ACTIVE=False,
+
+    # Maximum total number of blocks of the deserialized block structures
+    # kept in each process's in-memory cache.  The cache is only used when
+    # storage backing is enabled.  Set to 0 to disable the cache.
+    PROCESS_CACHE_MAX_BLOCKS=0,
 )
 
 ############################ FEATURE CONFIGURATION #############################
@@ -919,6 +924,16 @@ CODE_JAIL = {
     "limit_overrides": {},
 }
 
+# A pool of warm sandboxed Python processes, which execute the code of problems without codejail
+# starting a new process, and importing numpy and the other modules problems use, every time.
+# 'size' is the number of sandboxed processes of each server process, 0 to disable the pool, and
+# 'max_executions' the number of executions after which a sandboxed process is replaced. Each job
+# and sandboxed process count against the sandbox user's NPROC limit.
+CODE_JAIL_WORKER_POOL = {
+    'size': 0,
+    'max_executions': 100,
+}
+
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
 # of them must match the course id for that course to run unsafe code.
 #
@@ -945,6 +960,8 @@ HTTPS = 'on'
 ROOT_URLCONF = 'cms.urls'
 
 COURSE_IMPORT_EXPORT_BUCKET = ''
+# The number of static files imported at a time when importing a course.
+COURSE_IMPORT_STATIC_WORKERS = 1
 ALTERNATE_WORKER_QUEUES = 'lms'
 
 STATIC_URL_BASE = '/static/'
@@ -953,6 +970,17 @@ X_FRAME_OPTIONS = 'DENY'
 
 GIT_REPO_EXPORT_DIR = '/edx/var/edxapp/export_course_repos'
 
+# A local directory in which the data of course assets too large to be cached in the "course_assets"
+# cache is cached, to be served through memory maps. Disabled when not set.
+CONTENTSERVER_LOCAL_CACHE_DIR = None
+# The approximate maximum number of bytes kept in CONTENTSERVER_LOCAL_CACHE_DIR.
+CONTENTSERVER_LOCAL_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+# The URL prefix of an internal location of the web server which serves CONTENTSERVER_LOCAL_CACHE_DIR.
+# When set, the transfer of locally cached assets is handed off to the web server with X-Accel-Redirect,
+# which also serves ranges and conditional requests from the cached file. The location has to re-add
+# any response headers which the web server doesn't keep from the redirecting response.
+CONTENTSERVER_LOCAL_CACHE_ACCEL_REDIRECT = None
+
 # Email
 TECH_SUPPORT_EMAIL = 'technical@example.com'
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -14,10 +14,12 @@ This is used by capa_module.
 """
 
 
+import hashlib
 import logging
 import os.path
 import re
-from collections import OrderedDict
+import threading
+from collections import OrderedDict, namedtuple
 from copy import deepcopy
 from datetime import datetime
 from xml.sax.saxutils import unescape
@@ -74,12 +76,72 @@ html_problem_semantics = [
     "openendedrubric",
 ]
 
+# The number of problem templates kept by each process.
+PROBLEM_TEMPLATE_CACHE_SIZE = 1000
+
 log = logging.getLogger(__name__)
 
 #-----------------------------------------------------------------------------
 # main class for this module
 
 
+# The parsed XML tree of a problem, with its includes processed, and the digests of the included files.
+ProblemTemplate = namedtuple('ProblemTemplate', ['tree', 'include_digests'])
+
+
+class ProblemTemplateCache(object):
+    """
+    A process-wide, least recently used cache of ProblemTemplates, keyed by a digest of the problem XML.
+
+    Templates don't depend on the seed or state of a problem, so that one template is shared by
+    every learner's instance of a problem. The trees of cached templates must never be modified:
+    problems work on copies of them.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the template cached for key, or None.
+        """
+        with self._lock:
+            template = self._templates.pop(key, None)
+            if template is not None:
+                self._templates[key] = template
+            return template
+
+    def set(self, key, template):
+        """
+        Caches the template for key, evicting the least recently used templates if the cache is full.
+        """
+        with self._lock:
+            self._templates.pop(key, None)
+            self._templates[key] = template
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all the cached templates.
+        """
+        with self._lock:
+            self._templates.clear()
+
+
+problem_template_cache = ProblemTemplateCache(PROBLEM_TEMPLATE_CACHE_SIZE)  # pylint: disable=invalid-name
+
+
+def _include_digest(data):
+    """
+    Returns the digest of the contents of an included file.
+    """
+    if isinstance(data, six.text_type):
+        data = data.encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
 class LoncapaSystem(object):
     """
     An encapsulation of resources needed from the outside.
@@ -184,26 +246,8 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        if isinstance(problem_text, six.text_type):
-            # etree chokes on Unicode XML with an encoding declaration
-            problem_text = problem_text.encode('utf-8')
-        self.tree = etree.XML(problem_text)
-
-        try:
-            self.make_xml_compatible(self.tree)
-        except Exception:
-            capa_module = self.capa_module
-            log.exception(
-                "CAPAProblemError: %s, id:%s, data: %s",
-                capa_module.display_name,
-                self.problem_id,
-                capa_module.data
-            )
-            raise
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # parse problem XML file into an element tree, with any <include file="foo"> tags handled
+        self.tree = self._get_problem_tree(problem_text)
 
         # construct script processor context (eg for customresponse problems)
         if minimal_init:
@@ -236,6 +280,45 @@ class LoncapaProblem(object):
             if extract_tree:
                 self.extracted_tree = self._extract_html(self.tree)
 
+    def _get_problem_tree(self, problem_text):
+        """
+        Returns the element tree of the problem XML, with its includes processed.
+
+        The tree is a copy of the cached template of the problem, if its included files haven't
+        changed since the template was cached. Otherwise, the problem XML is parsed and processed
+        into a new template.
+        """
+        if isinstance(problem_text, six.text_type):
+            # etree chokes on Unicode XML with an encoding declaration
+            problem_text = problem_text.encode('utf-8')
+
+        template_key = hashlib.sha1(problem_text).hexdigest()
+        template = problem_template_cache.get(template_key)
+        if template is not None and self._get_include_digests(template.include_digests) == template.include_digests:
+            return deepcopy(template.tree)
+
+        tree = etree.XML(problem_text)
+
+        try:
+            self.make_xml_compatible(tree)
+        except Exception:
+            capa_module = self.capa_module
+            log.exception(
+                "CAPAProblemError: %s, id:%s, data: %s",
+                capa_module.display_name,
+                self.problem_id,
+                capa_module.data
+            )
+            raise
+
+        include_digests = self._process_includes(tree)
+        if None in include_digests.values():
+            # Don't cache problems with includes which couldn't be processed.
+            return tree
+
+        problem_template_cache.set(template_key, ProblemTemplate(tree, include_digests))
+        return deepcopy(tree)
+
     def make_xml_compatible(self, tree):
         """
         Adjust tree xml in-place for compatibility before creating
@@ -797,15 +880,20 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
-    def _process_includes(self):
+    def _process_includes(self, tree):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
-        into our XML tree.  Fail gracefully if debugging.
+        into the XML tree.  Fail gracefully if debugging.
+
+        Returns an OrderedDict of the names of the included files to the digests of their contents,
+        which are None for files which couldn't be included.
         """
-        includes = self.tree.findall('.//include')
+        include_digests = OrderedDict()
+        includes = tree.findall('.//include')
         for inc in includes:
             filename = inc.get('file') if six.PY3 else inc.get('file').decode('utf-8')
             if filename is not None:
+                include_digests[filename] = None
                 try:
                     # open using LoncapaSystem OSFS filestore
                     ifp = self.capa_system.filestore.open(filename)
@@ -826,7 +914,8 @@ class LoncapaProblem(object):
                         continue
                 try:
                     # read in and convert to XML
-                    incxml = etree.XML(ifp.read())
+                    include_data = ifp.read()
+                    incxml = etree.XML(include_data)
                 except Exception as err:
                     log.warning(
                         'Error %s in problem xml include: %s',
@@ -845,8 +934,25 @@ class LoncapaProblem(object):
                 parent = inc.getparent()
                 parent.insert(parent.index(inc), incxml)
                 parent.remove(inc)
+                include_digests[filename] = _include_digest(include_data)
                 log.debug('Included %s into %s', filename, self.problem_id)
 
+        return include_digests
+
+    def _get_include_digests(self, filenames):
+        """
+        Returns an OrderedDict of the given names of included files to the digests of their
+        current contents, which are None for files which can't be read.
+        """
+        include_digests = OrderedDict()
+        for filename in filenames:
+            try:
+                with self.capa_system.filestore.open(filename) as include_file:
+                    include_digests[filename] = _include_digest(include_file.read())
+            except Exception:  # pylint: disable=broad-except
+                include_digests[filename] = None
+        return include_digests
+
     def _extract_system_path(self, script):
         """
         Extracts and normalizes additional paths for code execution.
@@ -891,7 +997,6 @@ class LoncapaProblem(object):
         """
         context = {}
         context['seed'] = self.seed
-        context['anonymous_student_id'] = self.capa_system.anonymous_student_id
         all_code = ''
 
         python_path = []
@@ -922,6 +1027,11 @@ class LoncapaProblem(object):
                 extra_files.append(("python_lib.zip", zip_lib))
                 python_path.append("python_lib.zip")
 
+            # The results of the code are cached by the globals it is run with. Code that doesn't use
+            # the student's id is run without it, so that its results are shared by all students.
+            if 'anonymous_student_id' in all_code:
+                context['anonymous_student_id'] = self.capa_system.anonymous_student_id
+
             try:
                 safe_exec(
                     all_code,
@@ -941,6 +1051,8 @@ class LoncapaProblem(object):
                 msg = Text("Error while executing script code: %s" % str(err))
                 raise responsetypes.LoncapaProblemError(msg)
 
+        context.setdefault('anonymous_student_id', self.capa_system.anonymous_student_id)
+
         # Store code source in context, along with the Python path needed to run it correctly.
         context['script_code'] = all_code
         context['python_path'] = python_path
@@ -0,0 +1,157 @@
+"""
+Evaluation of the math expressions of FormulaResponse and NumericalResponse, with calc's semantics,
+parsing each expression only once.
+
+calc's `evaluator` builds its grammar and parses the expression every time it is called, which is
+most of the time it takes. `evaluator` here keeps the expressions it has parsed, compiled into
+closures which apply calc's own evaluation functions, so that evaluating an expression again, such
+as for every sample of a FormulaResponse, only evaluates the closures.
+"""
+
+
+import threading
+from collections import OrderedDict
+
+from calc.calc import (
+    ParseAugmenter,
+    add_defaults,
+    check_parens,
+    eval_atom,
+    eval_number,
+    eval_parallel,
+    eval_power,
+    eval_product,
+    eval_sum
+)
+from pyparsing import ParseResults
+
+# The number of compiled expressions kept by the process.
+FORMULA_CACHE_SIZE = 1000
+
+# calc's evaluation function for each kind of node of a parse tree, other than numbers, variables and functions.
+EVALUATE_ACTIONS = {
+    'atom': eval_atom,
+    'power': eval_power,
+    'parallel': eval_parallel,
+    'product': eval_product,
+    'sum': eval_sum,
+}
+
+
+class CompiledFormula(object):
+    """
+    A math expression, parsed and compiled for evaluation with any variables and functions.
+
+    Raises the exceptions calc's `evaluator` raises for expressions which can't be parsed.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        self.case_sensitive = case_sensitive
+        check_parens(math_expr)
+        self._parser = ParseAugmenter(math_expr, case_sensitive)
+        self._parser.parse_algebra()
+        self._evaluate = self._compile(self._parser.tree)
+
+    def _casify(self, name):
+        """
+        Returns the name under which a variable or function is looked up.
+        """
+        return name if self.case_sensitive else name.lower()
+
+    def _compile(self, node):
+        """
+        Returns a function of the variables and functions which evaluates the node of the parse
+        tree as calc's `evaluator` does, or the node itself if it is a terminal node.
+        """
+        if not isinstance(node, ParseResults):
+            return node
+
+        node_name = node.getName()
+        if node_name == 'number':
+            value = eval_number(list(node))
+            return lambda variables, functions: value
+
+        if node_name == 'variable':
+            variable_name = self._casify(node[0])
+            return lambda variables, functions: variables[variable_name]
+
+        if node_name == 'function':
+            function_name = self._casify(node[0])
+            evaluate_argument = self._compile(node[1])
+
+            def evaluate_function(variables, functions):
+                """
+                Applies the function to its evaluated argument.
+                """
+                argument = evaluate_argument(variables, functions)
+                return functions[function_name](argument)
+            return evaluate_function
+
+        action = EVALUATE_ACTIONS[node_name]
+        children = [self._compile(child) for child in node]
+        compiled_children = [(child, callable(child)) for child in children]
+
+        def evaluate_node(variables, functions):
+            """
+            Applies calc's action to the evaluated children of the node.
+            """
+            return action([
+                child(variables, functions) if is_compiled else child
+                for child, is_compiled in compiled_children
+            ])
+        return evaluate_node
+
+    def evaluate(self, variables, unary_functions):
+        """
+        Returns the value of the expression with the given variables and functions, in addition to
+        calc's defaults, or raises calc's UndefinedVariable if it uses any others.
+        """
+        all_variables, all_functions = add_defaults(variables, unary_functions, self.case_sensitive)
+        self._parser.check_variables(all_variables, all_functions)
+        return self._evaluate(all_variables, all_functions)
+
+
+class FormulaCache(object):
+    """
+    A process-wide, least recently used cache of CompiledFormulas, keyed by expression and case sensitivity.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._formulas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, math_expr, case_sensitive=False):
+        """
+        Returns the CompiledFormula of the expression, compiling it if it isn't cached.
+        """
+        key = (math_expr, case_sensitive)
+        with self._lock:
+            formula = self._formulas.pop(key, None)
+            if formula is not None:
+                self._formulas[key] = formula
+                return formula
+
+        formula = CompiledFormula(math_expr, case_sensitive)
+        with self._lock:
+            self._formulas[key] = formula
+            while len(self._formulas) > self.max_entries:
+                self._formulas.popitem(last=False)
+        return formula
+
+    def clear(self):
+        """
+        Removes all the cached formulas.
+        """
+        with self._lock:
+            self._formulas.clear()
+
+
+formula_cache = FormulaCache(FORMULA_CACHE_SIZE)  # pylint: disable=invalid-name
+
+
+def evaluator(variables, unary_functions, math_expr, case_sensitive=False):
+    """
+    Evaluates the math expression as calc's `evaluator` does, with the given variables and functions.
+    """
+    if math_expr.strip() == "":
+        return float('nan')
+    return formula_cache.get(math_expr, case_sensitive).evaluate(variables, unary_functions)
@@ -32,7 +32,7 @@ import random2 as random
 import requests
 import six
 # specific library imports
-from calc import UndefinedVariable, UnmatchedParenthesis, evaluator
+from calc import UndefinedVariable, UnmatchedParenthesis
 from django.utils import html
 from django.utils.encoding import python_2_unicode_compatible
 from lxml import etree
@@ -50,6 +50,7 @@ from openedx.core.lib import edx_six
 from openedx.core.lib.grade_utils import round_away_from_zero
 
 from . import correctmap
+from .formula import evaluator
 from .registry import TagRegistry
 from .util import (
     compare_with_tolerance,
@@ -1,7 +1,10 @@
 """Capa's specialized use of codejail.safe_exec."""
 
 
+import copy
 import hashlib
+import threading
+from collections import OrderedDict, defaultdict
 
 from codejail.safe_exec import SafeExecException, json_safe
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
@@ -10,6 +13,10 @@ import six
 from six import text_type
 
 from . import lazymod
+from .worker_pool import get_worker_pool
+
+# The number of results kept in the process-local tier of SafeExecCaches.
+LOCAL_CACHE_SIZE = 1000
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -55,6 +62,119 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# The modules that the workers of the codejail worker pool import before they execute any code.
+PRELOADED_MODULES = ["random2", "six"] + [modname for __, modname in ASSUMED_IMPORTS]
+
+
+class LocalResultCache(object):
+    """
+    A process-local, least recently used cache of safe_exec results.
+
+    Results are copied in and out of the cache, so that callers can't modify the cached results.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns a copy of the result cached for key, or None.
+        """
+        with self._lock:
+            result = self._results.pop(key, None)
+            if result is None:
+                return None
+            self._results[key] = result
+        return copy.deepcopy(result)
+
+    def set(self, key, result):
+        """
+        Caches a copy of the result for key, evicting the least recently used results if the cache is full.
+        """
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = result
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all the cached results.
+        """
+        with self._lock:
+            self._results.clear()
+
+
+local_result_cache = LocalResultCache(LOCAL_CACHE_SIZE)  # pylint: disable=invalid-name
+
+
+class SafeExecCache(object):
+    """
+    A two-tier cache of safe_exec results, to be passed as the `cache` of safe_exec.
+
+    Results are looked up in the process-local `local_result_cache` first, and then in
+    `shared_cache`, an object with .get(key) and .set(key, value) methods, such as a
+    Django cache, which is shared by all processes.
+    """
+    def __init__(self, shared_cache):
+        self.shared_cache = shared_cache
+
+    def get(self, key):
+        """
+        Returns the result cached for key, or None.
+        """
+        result = local_result_cache.get(key)
+        if result is None:
+            result = self.shared_cache.get(key)
+            if result is not None:
+                local_result_cache.set(key, result)
+        return result
+
+    def set(self, key, result):
+        """
+        Caches the result for key in both tiers.
+        """
+        local_result_cache.set(key, result)
+        self.shared_cache.set(key, result)
+
+
+class CacheStats(object):
+    """
+    Counts the cache hits and misses of safe_exec, by slug.
+    """
+    def __init__(self):
+        self._counts = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self._lock = threading.Lock()
+
+    def record(self, slug, hit):
+        """
+        Counts a cache hit, or a cache miss if hit is False, for slug.
+        """
+        with self._lock:
+            self._counts[slug]['hits' if hit else 'misses'] += 1
+
+    def get(self, slug):
+        """
+        Returns a dict of the number of cache hits and misses for slug, and of their hit rate.
+        """
+        with self._lock:
+            counts = dict(self._counts.get(slug, {'hits': 0, 'misses': 0}))
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = float(counts['hits']) / lookups if lookups else None
+        return counts
+
+    def clear(self):
+        """
+        Resets all the counts.
+        """
+        with self._lock:
+            self._counts.clear()
+
+
+cache_stats = CacheStats()  # pylint: disable=invalid-name
+
 
 def update_hash(hasher, obj):
     """
@@ -106,9 +226,10 @@ def safe_exec(
     `extra_files` is a list of (filename, contents) pairs.  These files are
     created in the sandbox.
 
-    `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
-    to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    `cache` is an object with .get(key) and .set(key, value) methods, such as a
+    SafeExecCache.  It will be used to cache the execution, taking into account the
+    code, the values of the globals, and the random seed.  The hits and misses of
+    the cache are counted by `slug` in `cache_stats`.
 
     `limit_overrides_context` is an optional string to be used as a key on
     the `settings.CODE_JAIL['limit_overrides']` dictionary in order to apply
@@ -120,6 +241,7 @@ def safe_exec(
     caller, that will be used in log messages.
 
     If `unsafely` is true, then the code will actually be executed without sandboxing.
+    Otherwise, it is executed by the codejail worker pool if CODE_JAIL_WORKER_POOL enables it.
     """
     # Check the cache for a previous result.
     if cache:
@@ -129,6 +251,7 @@ def safe_exec(
         update_hash(md5er, safe_globals)
         key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
         cached = cache.get(key)
+        cache_stats.record(slug, cached is not None)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
@@ -145,7 +268,8 @@ def safe_exec(
     if unsafely:
         exec_fn = codejail_not_safe_exec
     else:
-        exec_fn = codejail_safe_exec
+        worker_pool = get_worker_pool(PRELOADED_MODULES)
+        exec_fn = worker_pool.safe_exec if worker_pool else codejail_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
     try:
@@ -0,0 +1,196 @@
+"""
+The program of the sandboxed workers of a WorkerPool.
+
+It runs in the sandbox's Python, as codejail's jailed code does, so it only uses the standard library.
+A worker imports the modules named by its arguments, then reads jobs from its stdin, one JSON object per
+line. Each job is executed in a process forked from the worker, so that it starts with the modules already
+imported, runs under its own CPU limit, and can't change the worker or the jobs which come after it. The
+result of each job is written to the worker's stdout as a JSON object on one line.
+
+The worker is the child subreaper of the processes its jobs start, so that the processes a job leaves
+behind, even in a session of their own, become its children and are killed once the job is done.
+"""
+
+
+import ctypes
+import ctypes.util
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+# The prctl option which makes a process the child subreaper of its descendants. See prctl(2).
+PR_SET_CHILD_SUBREAPER = 36
+
+
+class DevNull(object):
+    """
+    Discards what the executed code prints.
+    """
+    def write(self, *args, **kwargs):
+        pass
+
+    def flush(self, *args, **kwargs):
+        pass
+
+
+def execute(job, result_fd, json_safe):
+    """
+    Executes the code of a job, in the forked process, and writes the traceback of
+    the exception it raised, if any, and its JSON-safe globals to result_fd.
+    """
+    # The code can't read the jobs that come after it, nor write results of its own.
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    sys.stdout = DevNull()
+
+    os.chdir(job['directory'])
+    os.environ['TMPDIR'] = job['tmp']
+    tempfile.tempdir = None
+    sys.path.extend(job['python_path'])
+    if job['cpu']:
+        resource.setrlimit(resource.RLIMIT_CPU, (job['cpu'], job['cpu'] + 1))
+
+    try:
+        globals_dict = job['globals']
+        exec(job['code'], globals_dict)  # pylint: disable=exec-used
+        result = [None, json_safe(globals_dict)]
+    except BaseException:  # pylint: disable=broad-except
+        result = [traceback.format_exc(), None]
+
+    with os.fdopen(result_fd, 'w') as result_file:
+        json.dump(result, result_file)
+
+
+def set_child_subreaper():
+    """
+    Makes this process the child subreaper of its descendants, and returns whether it could.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        return libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) == 0
+    except (AttributeError, OSError):
+        return False
+
+
+def get_children():
+    """
+    Returns the pids of the child processes of this process.
+    """
+    children = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open('/proc/{}/stat'.format(name)) as stat_file:
+                stat = stat_file.read()
+        except (IOError, OSError):
+            continue
+        # The fields after the command name, which is in parentheses, start with the state and the parent pid.
+        if int(stat.rsplit(')', 1)[1].split()[1]) == os.getpid():
+            children.append(int(name))
+    return children
+
+
+def kill_children():
+    """
+    Kills the child processes of this process, including those which were reparented to it as they
+    were left behind by a job, and returns their number.
+    """
+    killed = 0
+    children = get_children()
+    while children:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+        killed += len(children)
+        # The children of the killed processes are now children of this process.
+        children = get_children()
+    return killed
+
+
+def run(job, json_safe, subreaper):
+    """
+    Executes a job in a forked process, and returns its result. The result asks for the worker to be
+    replaced if the job left processes behind, or if they couldn't be found.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            os.setpgid(0, 0)
+            execute(job, write_fd, json_safe)
+            status = 0
+        finally:
+            os._exit(status)  # pylint: disable=protected-access
+
+    os.close(write_fd)
+    deadline = time.time() + job['realtime'] if job['realtime'] else None
+    timed_out = False
+    output = []
+    while True:
+        timeout = None if deadline is None else max(deadline - time.time(), 0)
+        if not select.select([read_fd], [], [], timeout)[0]:
+            timed_out = True
+            break
+        data = os.read(read_fd, 65536)
+        if not data:
+            break
+        output.append(data)
+    os.close(read_fd)
+
+    # Kill the process if it ran out of time, and whatever processes it left behind.
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+    __, status = os.waitpid(pid, 0)
+    left_behind = kill_children() if subreaper else None
+
+    return {
+        'id': job['id'],
+        'status': status,
+        'timed_out': timed_out,
+        'output': b''.join(output).decode('utf-8'),
+        'recycle': left_behind != 0,
+    }
+
+
+def main(json_safe):
+    """
+    Imports the modules named by the arguments, then executes jobs until the end of stdin.
+    """
+    # Keep numpy from starting a thread per CPU in every worker. See TNL-6456.
+    os.environ["OPENBLAS_NUM_THREADS"] = "1"
+    for module_name in sys.argv[1:]:
+        try:
+            __import__(module_name)
+        except Exception:  # pylint: disable=broad-except
+            # The code which uses the module will report the error.
+            pass
+
+    subreaper = set_child_subreaper()
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        result = run(json.loads(line), json_safe, subreaper)
+        sys.stdout.write(json.dumps(result) + '\n')
+        sys.stdout.flush()
+        # The next job is forked from this process, so it mustn't find this job's data in it.
+        line = result = None
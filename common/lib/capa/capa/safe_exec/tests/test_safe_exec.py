@@ -19,7 +19,8 @@ from django.test import override_settings
 from six import text_type, unichr
 from six.moves import range
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import SafeExecCache, cache_stats, safe_exec, update_hash
+from capa.safe_exec.safe_exec import local_result_cache
 
 
 class TestSafeExec(unittest.TestCase):
@@ -260,6 +261,57 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecCache(unittest.TestCase):
+    """Test the two-tier SafeExecCache and the cache statistics."""
+
+    def setUp(self):
+        super(TestSafeExecCache, self).setUp()
+        local_result_cache.clear()
+        cache_stats.clear()
+        self.addCleanup(local_result_cache.clear)
+        self.addCleanup(cache_stats.clear)
+
+    def test_local_tier(self):
+        cache = {}
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=SafeExecCache(DictCache(cache)))
+        self.assertEqual(g['a'], 3)
+        self.assertEqual(list(cache.values())[0], (None, {'a': 3}))
+
+        # The result is found in the local tier, even once the shared cache has changed.
+        cache[list(cache.keys())[0]] = (None, {'a': 17})
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=SafeExecCache(DictCache(cache)))
+        self.assertEqual(g['a'], 3)
+
+        # Once the local tier is cleared, the result comes from the shared cache again.
+        local_result_cache.clear()
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=SafeExecCache(DictCache(cache)))
+        self.assertEqual(g['a'], 17)
+
+    def test_local_results_are_copied(self):
+        g = {}
+        safe_exec("a = [1, 2]", g, cache=SafeExecCache(DictCache({})))
+        g['a'].append(3)
+
+        g = {}
+        safe_exec("a = [1, 2]", g, cache=SafeExecCache(DictCache({})))
+        self.assertEqual(g['a'], [1, 2])
+
+    def test_cache_stats(self):
+        cache = SafeExecCache(DictCache({}))
+        self.assertEqual(cache_stats.get('problem-1'), {'hits': 0, 'misses': 0, 'hit_rate': None})
+
+        safe_exec("a = 1", {}, cache=cache, slug='problem-1')
+        safe_exec("a = 1", {}, cache=cache, slug='problem-1')
+        safe_exec("a = 1", {}, cache=cache, slug='problem-1', random_seed=2)
+        safe_exec("a = 1", {}, cache=cache, slug='problem-2')
+
+        self.assertEqual(cache_stats.get('problem-1'), {'hits': 1, 'misses': 2, 'hit_rate': 1.0 / 3})
+        self.assertEqual(cache_stats.get('problem-2'), {'hits': 1, 'misses': 0, 'hit_rate': 1.0})
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -0,0 +1,208 @@
+"""Test worker_pool.py"""
+
+
+import io
+import os
+import sys
+import threading
+import unittest
+import zipfile
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+from django.test import override_settings
+from mock import patch
+
+from capa.safe_exec import worker_pool
+from capa.safe_exec.worker_pool import WorkerPool, get_worker_pool
+
+
+class TestWorkerPool(unittest.TestCase):
+    """Test the execution of code by a WorkerPool."""
+
+    def setUp(self):
+        super(TestWorkerPool, self).setUp()
+        # Run the workers with this Python, as the current user.
+        python_command = {'cmdline_start': [sys.executable, '-E', '-B'], 'user': None}
+        commands = patch.dict(jail_code.COMMANDS, {'python': python_command})
+        commands.start()
+        self.addCleanup(commands.stop)
+        limits = patch.dict(jail_code.LIMITS, {'CPU': 1, 'REALTIME': 3, 'NPROC': 0, 'VMEM': 0, 'FSIZE': 0, 'PROXY': 0})
+        limits.start()
+        self.addCleanup(limits.stop)
+
+        self.pool = WorkerPool(1, 3, ['json'])
+        self.addCleanup(self.pool.close)
+
+    def worker_pid(self):
+        """Returns the pid of the process of the pool's worker."""
+        self.assertEqual(len(self.pool._idle), 1)  # pylint: disable=protected-access
+        return self.pool._idle[0].process.pid  # pylint: disable=protected-access
+
+    def test_set_values(self):
+        g = {'a': 17}
+        self.pool.safe_exec("b = a + 1", g)
+        self.assertEqual(g['b'], 18)
+
+    def test_raising_exceptions(self):
+        g = {}
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", g)
+        self.assertIn("ZeroDivisionError", str(cm.exception))
+
+    def test_executions_are_isolated(self):
+        g = {}
+        self.pool.safe_exec("import json; json.changed = True", g)
+        self.pool.safe_exec("import json; changed = hasattr(json, 'changed')", g)
+        self.assertFalse(g['changed'])
+
+    def test_python_path(self):
+        zip_file = io.BytesIO()
+        with zipfile.ZipFile(zip_file, 'w') as python_lib:
+            python_lib.writestr('constants.py', 'ANSWER = 42\n')
+
+        g = {}
+        self.pool.safe_exec(
+            "from constants import ANSWER", g,
+            python_path=['python_lib.zip'], extra_files=[('python_lib.zip', zip_file.getvalue())],
+        )
+        self.assertEqual(g['ANSWER'], 42)
+
+    def test_time_limit(self):
+        g = {}
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec("while True: pass", g)
+
+        # The worker survives the code it executes.
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_recycling(self):
+        pid = self.worker_pid()
+        for __ in range(3):
+            self.pool.safe_exec("a = 1", {})
+        self.assertNotEqual(self.worker_pid(), pid)
+
+    def test_worker_failure(self):
+        self.pool._idle[0].process.kill()  # pylint: disable=protected-access
+        g = {}
+        with patch.object(worker_pool, 'codejail_safe_exec') as codejail_safe_exec:
+            self.pool.safe_exec("a = 1", g)
+        # The code is executed by codejail, and the worker is replaced.
+        self.assertTrue(codejail_safe_exec.called)
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_tmp_directory_is_per_job(self):
+        g = {}
+        with patch.dict(jail_code.LIMITS, {'FSIZE': 1024}):
+            pool = WorkerPool(1, 3, ['json'])
+            self.addCleanup(pool.close)
+            pool.safe_exec(
+                "import os, tempfile\n"
+                "tmp = tempfile.gettempdir()\n"
+                "open(os.path.join(tmp, 'left_behind'), 'w').close()",
+                g,
+            )
+            pool.safe_exec("import os; left_behind = os.path.exists(os.path.join(tmp, 'left_behind'))", g)
+        self.assertFalse(g['left_behind'])
+        self.assertFalse(os.path.exists(g['tmp']))
+
+    def test_previous_result_is_gone(self):
+        g = {}
+        self.pool.safe_exec("secret = 'previous job secret'", {})
+        self.pool.safe_exec(
+            "import sys\n"
+            "frame, found = sys._getframe().f_back, False\n"
+            "while frame is not None:\n"
+            "    found = found or 'previous job ' + 'secret' in repr(frame.f_locals)\n"
+            "    frame = frame.f_back\n"
+            "del frame",
+            g,
+        )
+        self.assertFalse(g['found'])
+
+    def test_processes_left_behind_are_killed(self):
+        pid = self.worker_pid()
+        g = {}
+        self.pool.safe_exec(
+            "import os, time\n"
+            "child = os.fork()\n"
+            "if child == 0:\n"
+            "    os.setsid()\n"
+            "    time.sleep(60)\n"
+            "    os._exit(0)",
+            g,
+        )
+        with self.assertRaises(OSError):
+            os.kill(g['child'], 0)
+        # The worker is replaced, since a job left a process behind.
+        self.assertNotEqual(self.worker_pid(), pid)
+
+    def test_forged_result(self):
+        g = {}
+        with patch.object(worker_pool, 'codejail_safe_exec') as codejail_safe_exec:
+            self.pool.safe_exec(
+                "import json, os\n"
+                "with open('/proc/{}/fd/1'.format(os.getppid()), 'w') as worker_output:\n"
+                "    worker_output.write(json.dumps({'id': 'forged', 'output': '[null, {}]'}) + '\\n')",
+                g,
+            )
+        self.assertTrue(codejail_safe_exec.called)
+
+    def test_replacement_failure(self):
+        # Retire the worker, and fail to start its replacement, while a caller is waiting for a worker.
+        # pylint: disable=protected-access
+        worker = self.pool._acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(self.pool._acquire()))
+        waiter.start()
+        with patch.object(worker_pool, 'SandboxWorker', side_effect=OSError):
+            self.pool._release(worker, failed=True)
+        waiter.join(1)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(acquired, [None])
+
+    def test_acquire_timeout(self):
+        self.pool.acquire_timeout = 0.1
+        worker = self.pool._acquire()  # pylint: disable=protected-access
+        self.addCleanup(self.pool._release, worker)  # pylint: disable=protected-access
+        g = {}
+        with patch.object(worker_pool, 'codejail_safe_exec') as codejail_safe_exec:
+            self.pool.safe_exec("a = 1", g)
+        self.assertTrue(codejail_safe_exec.called)
+
+    def test_close_busy_worker(self):
+        worker = self.pool._acquire()  # pylint: disable=protected-access
+        self.pool.close()
+        self.assertTrue(worker.closed)
+        self.assertFalse(os.path.exists(worker.home))
+        self.pool._release(worker)  # pylint: disable=protected-access
+        self.assertEqual(self.pool.stats()['workers'], 0)
+
+    def test_limit_overrides(self):
+        jail_code.override_limit('VMEM', 1024 ** 3, 'course-v1:edX+DemoX+Demo_Course')
+        self.addCleanup(jail_code.LIMIT_OVERRIDES.pop, 'course-v1:edX+DemoX+Demo_Course')
+        with patch.object(worker_pool, 'codejail_safe_exec') as codejail_safe_exec:
+            self.pool.safe_exec("a = 1", {}, limit_overrides_context='course-v1:edX+DemoX+Demo_Course')
+        self.assertTrue(codejail_safe_exec.called)
+        self.assertEqual(self.pool.stats()['executions'], 0)
+
+    def test_stats(self):
+        self.pool.safe_exec("a = 1", {})
+        self.pool.safe_exec("a = 1", {})
+        stats = self.pool.stats()
+        self.assertEqual(stats['workers'], 1)
+        self.assertEqual(stats['idle'], 1)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertEqual(stats['executions'], 2)
+        self.assertGreater(stats['mean_latency'], 0)
+        self.assertGreaterEqual(stats['max_latency'], stats['mean_latency'])
+
+
+class TestGetWorkerPool(unittest.TestCase):
+    """Test the configuration of the worker pool."""
+
+    @override_settings(CODE_JAIL_WORKER_POOL={'size': 0})
+    def test_disabled(self):
+        self.assertIsNone(get_worker_pool(['json']))
@@ -0,0 +1,450 @@
+"""
+A pool of warm, sandboxed Python workers, which execute the code given to safe_exec without
+starting a new sandboxed process, and importing modules such as numpy, for every execution.
+
+The pool is configured with the CODE_JAIL_WORKER_POOL setting, and is disabled unless its 'size' is set.
+Workers are started with codejail's configured python command, user and resource limits, and execute
+each job in a process forked from them, with the job's CPU and real time limits. See sandbox_worker.py.
+"""
+
+
+import atexit
+import functools
+import inspect
+import json
+import logging
+import os
+import resource
+import select
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException, json_safe
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+from codejail.subproc import set_process_limits
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from . import sandbox_worker
+
+log = logging.getLogger(__name__)
+
+# The number of executions after which a worker is replaced, unless configured otherwise.
+DEFAULT_MAX_EXECUTIONS = 100
+
+# The time, in seconds, that an execution waits for a free worker before it is executed by codejail
+# instead, unless configured otherwise.
+DEFAULT_ACQUIRE_TIMEOUT = 5
+
+# The time, in seconds, that a new worker is given to import its modules, on top of the time limit of its first job.
+WORKER_STARTUP_TIME = 30
+
+# The time, in seconds, that a worker is given to report the result of a job, on top of the time limit of the job.
+WORKER_RESPONSE_TIME = 2
+
+# The resource limits which apply to the whole worker, rather than to each of its jobs. Jobs whose limit
+# overrides change one of these are executed by codejail instead.
+WORKER_LIMITS = ('VMEM', 'NPROC', 'FSIZE', 'PROXY')
+
+# The program of the workers: sandbox_worker.py, with codejail's json_safe, which it can't import.
+sandbox_worker_py_file = sandbox_worker.__file__
+if sandbox_worker_py_file.endswith("c"):
+    sandbox_worker_py_file = sandbox_worker_py_file[:-1]
+
+with open(sandbox_worker_py_file) as f:
+    WORKER_PROGRAM = "{}\n\n{}\n\nmain(json_safe)\n".format(f.read(), inspect.getsource(json_safe))
+
+_worker_pool = None  # pylint: disable=invalid-name
+_worker_pool_lock = threading.Lock()  # pylint: disable=invalid-name
+
+
+def get_worker_pool(imports):
+    """
+    Returns the WorkerPool of this process, whose workers import the modules named by `imports`,
+    or None if the pool is disabled or codejail isn't configured to execute Python.
+    """
+    global _worker_pool  # pylint: disable=global-statement,invalid-name
+    try:
+        pool_settings = getattr(settings, 'CODE_JAIL_WORKER_POOL', None) or {}
+    except ImproperlyConfigured:
+        return None
+    if not pool_settings.get('size') or not jail_code.is_configured('python'):
+        return None
+
+    with _worker_pool_lock:
+        # A pool can't be shared with processes forked after it was created.
+        if _worker_pool is None or _worker_pool.pid != os.getpid():
+            _worker_pool = WorkerPool(
+                pool_settings['size'],
+                pool_settings.get('max_executions') or DEFAULT_MAX_EXECUTIONS,
+                imports,
+                pool_settings.get('acquire_timeout') or DEFAULT_ACQUIRE_TIMEOUT,
+            )
+            atexit.register(_worker_pool.close)
+    return _worker_pool
+
+
+class WorkerError(Exception):
+    """
+    A worker failed to report the result of a job.
+    """
+
+
+class SandboxWorker(object):
+    """
+    A sandboxed Python process running sandbox_worker.py, with a home directory of its own.
+
+    Each job is given new directories with random names, for its files and as its tmp directory, which
+    are removed once the job is done, so that jobs can't read or change the files of the other jobs.
+    """
+    def __init__(self, imports):
+        self.executions = 0
+        self.user = jail_code.COMMANDS['python']['user']
+        self.closed = False
+        self._close_lock = threading.Lock()
+        self._job_tmp = None
+
+        # The home directory must be readable by the sandbox user, and its tmp directory, which the worker
+        # uses while it imports its modules, writable.
+        self.home = tempfile.mkdtemp(prefix="codejail-")
+        os.chmod(self.home, 0o775)
+        self.tmp = os.path.join(self.home, "tmp")
+        os.mkdir(self.tmp)
+        os.chmod(self.tmp, 0o777)
+        with open(os.path.join(self.home, "sandbox_worker.py"), "w") as worker_file:
+            worker_file.write(WORKER_PROGRAM)
+
+        cmd = []
+        env = {}
+        if self.user:
+            cmd.extend(['sudo', '-u', self.user, 'TMPDIR={}'.format(self.tmp)])
+        else:
+            env['TMPDIR'] = self.tmp
+        cmd.extend(jail_code.COMMANDS['python']['cmdline_start'])
+        cmd.append('sandbox_worker.py')
+        cmd.extend(imports)
+
+        self.process = subprocess.Popen(  # pylint: disable=subprocess-popen-preexec-fn
+            cmd, cwd=self.home, env=env,
+            preexec_fn=functools.partial(set_process_limits, _create_worker_rlimits(jail_code.LIMITS)),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+
+    def execute(self, code, globals_dict, python_path, extra_files, limits):
+        """
+        Executes `code` with the JSON-safe part of `globals_dict`, in a directory containing `extra_files`,
+        and returns the result reported by the worker. Raises WorkerError if the worker fails to report it.
+        """
+        try:
+            # Jobs mustn't share the worker's own tmp directory, which they could all write to.
+            self._remove_directory(self.tmp)
+            job_directory = tempfile.mkdtemp(prefix="job-", dir=self.home)
+            os.chmod(job_directory, 0o755)
+            for name, content in extra_files:
+                with open(os.path.join(job_directory, name), "wb") as extra:
+                    extra.write(content)
+            self._job_tmp = tempfile.mkdtemp(prefix="tmp-", dir=self.home)
+            os.chmod(self._job_tmp, 0o777)
+        except (IOError, OSError) as error:
+            raise WorkerError(u"Could not create the directories of the job: {}".format(error))
+
+        job = {
+            # The worker reports the id of the job with its result, so that output forged by other
+            # code can't be taken for the result of a later job.
+            'id': uuid.uuid4().hex,
+            'code': code,
+            'globals': json_safe(globals_dict),
+            'python_path': [os.path.basename(path) for path in python_path],
+            'directory': job_directory,
+            'tmp': self._job_tmp,
+            'cpu': limits['CPU'],
+            'realtime': limits['REALTIME'],
+        }
+        timeout = None
+        if limits['REALTIME']:
+            timeout = limits['REALTIME'] + (WORKER_RESPONSE_TIME if self.executions else WORKER_STARTUP_TIME)
+
+        self.executions += 1
+        try:
+            self.process.stdin.write(json.dumps(job).encode('utf-8') + b'\n')
+            self.process.stdin.flush()
+        except (IOError, OSError) as error:
+            raise WorkerError(u"Could not send a job to the worker: {}".format(error))
+        result = json.loads(self._read_line(timeout).decode('utf-8'))
+        if result.get('id') != job['id']:
+            raise WorkerError(u"The worker reported a result which isn't the job's")
+
+        try:
+            shutil.rmtree(job_directory)
+            self._remove_directory(self._job_tmp)
+        except OSError as error:
+            raise WorkerError(u"Could not remove the directories of the job: {}".format(error))
+        self._job_tmp = None
+        return result
+
+    def _remove_directory(self, path):
+        """
+        Removes a directory the sandbox user could write to, if it exists. The files in it are removed as
+        the sandbox user, who wrote them, since the application user may not be able to.
+        """
+        if not os.path.isdir(path):
+            return
+        if os.listdir(path):
+            rm_cmd = ['sudo', '-u', self.user] if self.user else []
+            rm_cmd.extend([
+                '/usr/bin/find', path, '-mindepth', '1', '-maxdepth', '1', '-exec', 'rm', '-rf', '{}', ';',
+            ])
+            subprocess.call(rm_cmd, cwd=self.home)
+        os.rmdir(path)
+
+    def _read_line(self, timeout):
+        """
+        Returns the next line of the worker's output, waiting for at most `timeout` seconds.
+        """
+        fd = self.process.stdout.fileno()
+        deadline = time.time() + timeout if timeout else None
+        line = bytearray()
+        while not line.endswith(b'\n'):
+            remaining = None if deadline is None else max(deadline - time.time(), 0)
+            try:
+                if not select.select([fd], [], [], remaining)[0]:
+                    raise WorkerError(u"The worker did not report the result of the job in time")
+                data = os.read(fd, 65536)
+            except (OSError, ValueError) as error:
+                # The worker was closed while the job was executed.
+                raise WorkerError(u"Could not read the result of the job: {}".format(error))
+            if not data:
+                raise WorkerError(u"The worker exited with status {}".format(self.process.wait()))
+            line.extend(data)
+        return bytes(line)
+
+    def close(self):
+        """
+        Kills the worker and its processes, and removes its home directory.
+        """
+        with self._close_lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._close()
+
+    def _close(self):
+        """
+        Closes the worker. The caller must hold its close lock.
+        """
+        if self.process.poll() is None:
+            pgid = os.getpgid(self.process.pid)
+            if self.user:
+                # The worker runs as the sandbox user, so it has to be killed as root, as codejail does.
+                subprocess.call(["sudo", "pkill", "-9", "-g", str(pgid)])
+            else:
+                os.killpg(pgid, signal.SIGKILL)
+        self.process.wait()
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except (IOError, OSError):
+                # The worker died with a job left in the pipe's buffer.
+                pass
+
+        for path in (self.tmp, self._job_tmp):
+            try:
+                if path:
+                    self._remove_directory(path)
+            except OSError:
+                log.exception(u"Could not remove the tmp directory %s of a codejail worker", path)
+        shutil.rmtree(self.home, ignore_errors=True)
+
+
+def _create_worker_rlimits(limits):
+    """
+    Returns the resource limits of a worker, as codejail's jail_code sets them for a jailed process,
+    except for the CPU limit, which each job sets for itself.
+    """
+    rlimits = []
+    if limits.get('NPROC'):
+        # The limit applies to all the processes of the sandbox user, which include a process per worker and job.
+        rlimits.append((resource.RLIMIT_NPROC, (limits['NPROC'], limits['NPROC'])))
+    if limits.get('VMEM'):
+        rlimits.append((resource.RLIMIT_AS, (limits['VMEM'], limits['VMEM'])))
+    rlimits.append((resource.RLIMIT_FSIZE, (limits.get('FSIZE') or 0, limits.get('FSIZE') or 0)))
+    return rlimits
+
+
+class WorkerPool(object):
+    """
+    A fixed number of SandboxWorkers, each of which executes one job at a time, and is replaced
+    after `max_executions` jobs. Callers wait for a worker to be free.
+
+    Workers are started as soon as the pool is created, so that they import their modules before
+    they are first needed, and each retired worker is replaced right away for the same reason.
+    Callers which wait for more than `acquire_timeout` seconds have their code executed by codejail.
+    """
+    def __init__(self, size, max_executions, imports, acquire_timeout=DEFAULT_ACQUIRE_TIMEOUT):
+        self.size = size
+        self.max_executions = max_executions
+        self.imports = list(imports)
+        self.acquire_timeout = acquire_timeout
+        self.pid = os.getpid()
+        self._condition = threading.Condition()
+        self._idle = []
+        self._busy = set()
+        self._closed = False
+        self._workers = 0
+        self._waiting = 0
+        self._executions = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+        self._total_wait = 0.0
+        for __ in range(size):
+            self._add_worker()
+
+    def _add_worker(self):
+        """
+        Starts a new worker, and makes it available.
+        """
+        try:
+            worker = SandboxWorker(self.imports)
+        except (IOError, OSError):
+            log.exception(u"Could not start a codejail worker")
+            # Callers waiting for a worker may have been waiting for this one.
+            with self._condition:
+                self._condition.notify_all()
+            return
+        with self._condition:
+            if not self._closed:
+                self._workers += 1
+                self._idle.append(worker)
+                self._condition.notify()
+                return
+        worker.close()
+
+    def _acquire(self):
+        """
+        Returns a free worker, waiting for at most `acquire_timeout` seconds for one if they are all busy,
+        or None if there are no workers or none was free in time.
+        """
+        deadline = time.time() + self.acquire_timeout
+        with self._condition:
+            self._waiting += 1
+            try:
+                while not self._idle and self._workers and not self._closed:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting -= 1
+            if not self._idle or self._closed:
+                return None
+            worker = self._idle.pop()
+            self._busy.add(worker)
+            return worker
+
+    def _release(self, worker, failed=False):
+        """
+        Makes the worker available again, or replaces it if it failed or reached its maximum number of executions.
+        """
+        with self._condition:
+            self._busy.discard(worker)
+            retired = failed or worker.executions >= self.max_executions or self._closed
+            if retired:
+                self._workers -= 1
+                # Callers waiting for a worker have to check whether any are left.
+                self._condition.notify_all()
+            else:
+                self._idle.append(worker)
+                self._condition.notify()
+        if retired:
+            worker.close()
+            if not self._closed:
+                self._add_worker()
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, limit_overrides_context=None,
+                  slug=None):
+        """
+        Executes code as codejail's safe_exec does, in one of the pool's workers. Code which needs files other
+        than `extra_files`, or resource limits which don't apply to the workers, is executed by codejail.
+        """
+        python_path = python_path or ()
+        extra_files = extra_files or ()
+        limits = jail_code.get_effective_limits(limit_overrides_context)
+        extra_names = {name for name, __ in extra_files}
+        codejail_kwargs = dict(
+            python_path=python_path, extra_files=extra_files,
+            limit_overrides_context=limit_overrides_context, slug=slug,
+        )
+        if (any(limits.get(name) != jail_code.LIMITS.get(name) for name in WORKER_LIMITS) or
+                any(os.path.basename(path) not in extra_names for path in python_path)):
+            return codejail_safe_exec(code, globals_dict, **codejail_kwargs)
+
+        start = time.time()
+        worker = self._acquire()
+        if worker is None:
+            return codejail_safe_exec(code, globals_dict, **codejail_kwargs)
+        acquired = time.time()
+        try:
+            result = worker.execute(code, globals_dict, python_path, extra_files, limits)
+        except (WorkerError, ValueError):
+            log.warning(u"A codejail worker failed to execute %s, executing it with codejail", slug, exc_info=True)
+            self._release(worker, failed=True)
+            return codejail_safe_exec(code, globals_dict, **codejail_kwargs)
+        # A worker whose job left processes behind is replaced, along with them.
+        self._release(worker, failed=result['recycle'])
+        self._record(acquired - start, time.time() - start)
+
+        try:
+            emsg, results = json.loads(result['output'])
+        except ValueError:
+            emsg = u"ran out of time" if result['timed_out'] else u"exit status {}".format(result['status'])
+        if emsg:
+            raise SafeExecException(u"Couldn't execute jailed code: {}".format(emsg))
+        globals_dict.update(results)
+
+    def _record(self, wait, latency):
+        """
+        Records the time an execution waited for a worker, and its total time, in seconds.
+        """
+        with self._condition:
+            self._executions += 1
+            self._total_wait += wait
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+
+    def stats(self):
+        """
+        Returns a dict of the number of workers, of idle workers, of callers waiting for a worker,
+        and of executions, and of the mean time executions waited for a worker, and their mean and
+        maximum total time, in seconds.
+        """
+        with self._condition:
+            executions = self._executions
+            return {
+                'workers': self._workers,
+                'idle': len(self._idle),
+                'queue_depth': self._waiting,
+                'executions': executions,
+                'mean_wait': self._total_wait / executions if executions else None,
+                'mean_latency': self._total_latency / executions if executions else None,
+                'max_latency': self._max_latency,
+            }
+
+    def close(self):
+        """
+        Stops the workers of the pool, including the busy ones, whose jobs are then executed by codejail.
+        """
+        with self._condition:
+            self._closed = True
+            idle_workers, self._idle = self._idle, []
+            self._workers -= len(idle_workers)
+            busy_workers = list(self._busy)
+            self._condition.notify_all()
+        # Busy workers are released, and so counted out of the pool, by the callers which use them.
+        for worker in idle_workers + busy_workers:
+            worker.close()
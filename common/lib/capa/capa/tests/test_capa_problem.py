@@ -8,12 +8,14 @@ import unittest
 
 import ddt
 import six
+from fs.memoryfs import MemoryFS
 from lxml import etree
 from markupsafe import Markup
-from mock import patch
+from mock import Mock, patch
 
+from capa.capa_problem import LoncapaProblem, problem_template_cache
 from capa.responsetypes import LoncapaProblemError
-from capa.tests.helpers import new_loncapa_problem
+from capa.tests.helpers import new_loncapa_problem, test_capa_system
 from openedx.core.djangolib.markup import HTML
 
 
@@ -509,6 +511,29 @@ class CAPAProblemTest(unittest.TestCase):
         problem = new_loncapa_problem(xml.format(correctness=False))
         self.assertIsNotNone(problem)
 
+    @ddt.data(
+        ('a = 17', 1),
+        ('a = len(anonymous_student_id)', 2),
+    )
+    @ddt.unpack
+    def test_script_results_shared_by_students(self, script, expected_cache_entries):
+        """
+        Verify that the results of scripts which don't use the student's id are cached once for all students.
+        """
+        xml = textwrap.dedent("""
+            <problem>
+                <script type="loncapa/python">{}</script>
+            </problem>
+        """.format(script))
+        cache = {}
+        for student_id in ['student-1', 'student-22']:
+            capa_system = test_capa_system()
+            capa_system.anonymous_student_id = student_id
+            capa_system.cache = Mock(get=cache.get, set=cache.__setitem__)
+            problem = new_loncapa_problem(xml, capa_system=capa_system)
+            self.assertEqual(problem.context['anonymous_student_id'], student_id)
+        self.assertEqual(len(cache), expected_cache_entries)
+
 
 @ddt.ddt
 class CAPAMultiInputProblemTest(unittest.TestCase):
@@ -789,3 +814,62 @@ class CAPAProblemReportHelpersTest(unittest.TestCase):
         # Ensure that the answer is a string so that the dict returned from this
         # function can eventualy be serialized to json without issues.
         self.assertIsInstance(problem.get_question_answers()['1_solution_1'], six.text_type)
+
+
+class ProblemTemplateCacheTest(unittest.TestCase):
+    """
+    Tests that problems share the cached templates of their parsed XML.
+    """
+    xml = textwrap.dedent("""
+        <problem>
+            <optionresponse>
+                <optioninput>
+                    <option correct="True">yellow</option>
+                    <option correct="False">blue</option>
+                </optioninput>
+            </optionresponse>
+            <include file="include.xml"/>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ProblemTemplateCacheTest, self).setUp()
+        problem_template_cache.clear()
+        self.addCleanup(problem_template_cache.clear)
+        self.capa_system = test_capa_system()
+        self.capa_system.filestore = MemoryFS()
+        self.capa_system.filestore.writetext(u'include.xml', u'<p>Included</p>')
+
+    def test_template_reused(self):
+        problem = new_loncapa_problem(self.xml, capa_system=self.capa_system)
+        with patch.object(LoncapaProblem, 'make_xml_compatible') as mock_make_xml_compatible:
+            other_problem = new_loncapa_problem(self.xml, capa_system=self.capa_system, seed=1)
+        self.assertFalse(mock_make_xml_compatible.called)
+
+        self.assertIsNot(problem.tree, other_problem.tree)
+        self.assertEqual(etree.tostring(problem.tree), etree.tostring(other_problem.tree))
+        self.assertEqual(other_problem.tree.find('.//optioninput').get('options'), "('yellow','blue')")
+        self.assertEqual(other_problem.tree.find('.//p').text, 'Included')
+
+    def test_template_isolated(self):
+        problem = new_loncapa_problem(self.xml, capa_system=self.capa_system)
+        problem.tree.find('.//p').text = 'Changed'
+
+        other_problem = new_loncapa_problem(self.xml, capa_system=self.capa_system)
+        self.assertEqual(other_problem.tree.find('.//p').text, 'Included')
+
+    def test_include_changed(self):
+        new_loncapa_problem(self.xml, capa_system=self.capa_system)
+        self.capa_system.filestore.writetext(u'include.xml', u'<p>Changed</p>')
+
+        problem = new_loncapa_problem(self.xml, capa_system=self.capa_system)
+        self.assertEqual(problem.tree.find('.//p').text, 'Changed')
+
+    def test_missing_include_not_cached(self):
+        self.capa_system.filestore.remove(u'include.xml')
+        problem = new_loncapa_problem(self.xml, capa_system=self.capa_system)
+        self.assertIsNotNone(problem.tree.find('.//include'))
+        self.capa_system.filestore.writetext(u'include.xml', u'<p>Included</p>')
+
+        problem = new_loncapa_problem(self.xml, capa_system=self.capa_system)
+        self.assertEqual(problem.tree.find('.//p').text, 'Included')
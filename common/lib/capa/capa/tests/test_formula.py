@@ -0,0 +1,92 @@
+"""
+Tests for the compiled evaluation of math expressions.
+"""
+
+
+import unittest
+
+import calc
+import ddt
+import numpy
+from mock import patch
+from pyparsing import ParseException
+
+from capa.formula import CompiledFormula, evaluator, formula_cache
+
+VARIABLES = {'x': 1.5, 'y': -2, 'R_1': 3.0, 'T_{ij}': 0.5, "f'": 4}
+
+
+@ddt.ddt
+class FormulaTest(unittest.TestCase):
+    """
+    Tests that expressions are evaluated exactly as calc's evaluator evaluates them.
+    """
+    def setUp(self):
+        super(FormulaTest, self).setUp()
+        formula_cache.clear()
+        self.addCleanup(formula_cache.clear)
+
+    def assert_same_value(self, math_expr, variables=None, case_sensitive=False):
+        """
+        Asserts that the expression has the same value as calc's evaluator gives it.
+        """
+        variables = VARIABLES if variables is None else variables
+        expected = calc.evaluator(variables, {}, math_expr, case_sensitive=case_sensitive)
+        actual = evaluator(variables, {}, math_expr, case_sensitive=case_sensitive)
+        if numpy.isnan(expected):
+            self.assertTrue(numpy.isnan(actual))
+        else:
+            self.assertEqual(actual, expected)
+            self.assertEqual(type(actual), type(expected))
+
+    @ddt.data(
+        '1 + 2 * 3 - 4 / 5',
+        '-2^3^2',
+        '2^-1',
+        '1 || 2',
+        '0 || 5',
+        '5%',
+        '1.5e-3 * x',
+        '(x + y) * (x - y)',
+        'sqrt(y)',
+        'sin(x)^2 + cos(x)^2',
+        'fact(5) / factorial(3)',
+        'R_1 * T_{ij} + f\'',
+        'X + Y',
+        'e^(i*pi)',
+        'arctan(x) + sec(x) + coth(x)',
+        '',
+    )
+    def test_same_values(self, math_expr):
+        self.assert_same_value(math_expr)
+
+    def test_case_sensitive(self):
+        self.assert_same_value('x + X', {'x': 1, 'X': 2}, case_sensitive=True)
+        with self.assertRaises(calc.UndefinedVariable):
+            evaluator(VARIABLES, {}, 'X', case_sensitive=True)
+
+    def test_custom_functions(self):
+        functions = {'double': lambda value: value * 2}
+        self.assertEqual(evaluator(VARIABLES, functions, 'double(x) + 1'), 4.0)
+
+    @ddt.data(
+        ('z + 1', calc.UndefinedVariable),
+        ('foo(x)', calc.UndefinedVariable),
+        ('(x + 1', calc.UnmatchedParenthesis),
+        ('x + * 2', ParseException),
+        ('1 / 0', ZeroDivisionError),
+        ('fact(y)', ValueError),
+    )
+    @ddt.unpack
+    def test_same_errors(self, math_expr, error):
+        with self.assertRaises(error):
+            calc.evaluator(VARIABLES, {}, math_expr)
+        with self.assertRaises(error):
+            evaluator(VARIABLES, {}, math_expr)
+
+    def test_parsed_once(self):
+        with patch('capa.formula.CompiledFormula', wraps=CompiledFormula) as compiled_formula:
+            for value in range(10):
+                self.assertEqual(evaluator({'x': value}, {}, 'x^2 + 1'), value ** 2 + 1)
+            self.assertEqual(evaluator({'x': 2}, {}, 'x^2 + 1', case_sensitive=True), 5)
+        self.assertEqual(compiled_formula.call_count, 2)
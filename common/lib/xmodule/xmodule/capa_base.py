@@ -79,6 +79,20 @@ class RANDOMIZATION(object):
     PER_STUDENT = "per_student"
 
 
+def get_seed_pool_size():
+    """
+    Returns the size of the pool of seeds that the seeds of randomized problems are mapped onto,
+    as configured by the CAPA_SEED_POOL_SIZE setting, or None if seeds aren't pooled.
+
+    With a small pool, the results of the problems' scripts for every seed of the pool end up in
+    the safe_exec cache, so that learners rarely need the scripts to be executed again.
+    """
+    try:
+        return getattr(settings, 'CAPA_SEED_POOL_SIZE', None)
+    except ImproperlyConfigured:
+        return None
+
+
 def randomization_bin(seed, problem_id):
     """
     Pick a randomization bin for the problem given the user's seed and a problem id.
@@ -324,6 +338,10 @@ class CapaMixin(ScorableXBlockMixin, CapaFields):
             # number of possibilities, cap the number of different random seeds.
             self.seed %= MAX_RANDOMIZATION_BINS
 
+        seed_pool_size = get_seed_pool_size()
+        if seed_pool_size and self.rerandomize != RANDOMIZATION.NEVER:
+            self.seed %= seed_pool_size
+
     def new_lcp(self, state, text=None):
         """
         Generate a new Loncapa Problem
@@ -356,6 +356,13 @@ class ContentStore(object):
     def save(self, content):
         raise NotImplementedError
 
+    def save_many(self, contents):
+        """
+        Save all of the given StaticContents, as `save` would, and return the ones which
+        were written. Implementations may skip the contents which are already stored unchanged.
+        """
+        return [self.save(content) for content in contents]
+
     def find(self, filename):
         raise NotImplementedError
 
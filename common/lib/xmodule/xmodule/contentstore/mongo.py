@@ -3,16 +3,24 @@ MongoDB/GridFS-level code for the contentstore.
 """
 
 
+import hashlib
 import json
 import os
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 import gridfs
 import pymongo
 import six
+from bson.binary import Binary
 from bson.son import SON
 from fs.osfs import OSFS
-from gridfs.errors import NoFile, FileExists
+from gridfs.errors import FileExists, NoFile
+from gridfs.grid_file import DEFAULT_CHUNK_SIZE
 from mongodb_proxy import autoretry_read
+from pymongo import ReturnDocument
 from opaque_keys.edx.keys import AssetKey
 
 from xmodule.contentstore.content import XASSET_LOCATION_TAG
@@ -23,6 +31,18 @@ from xmodule.util.misc import escape_invalid_characters
 
 from .content import ContentStore, StaticContent, StaticContentStream
 
+# The attributes of the GridFS files of assets which are compared to decide whether
+# an asset has changed, besides its md5.
+ASSET_FILE_ATTRIBUTES = (
+    'filename', 'contentType', 'displayname', 'content_son', 'thumbnail_location', 'import_path', 'locked',
+)
+
+# The number of bytes of asset data which are written to GridFS together by bulk writes.
+BULK_WRITE_BATCH_SIZE = 16 * 1024 * 1024
+
+# The number of seconds to wait between checks of whether a content-addressed blob being deleted is gone.
+BLOB_DELETION_POLL_INTERVAL = 0.05
+
 
 class MongoContentStore(ContentStore):
     """
@@ -31,12 +51,18 @@ class MongoContentStore(ContentStore):
     # pylint: disable=unused-argument, bad-continuation
     def __init__(
         self, host, db,
-        port=27017, tz_aware=True, user=None, password=None, bucket='fs', collection=None, **kwargs
+        port=27017, tz_aware=True, user=None, password=None, bucket='fs', collection=None,
+        bulk_write_workers=1, content_addressed=False, **kwargs
     ):
         """
         Establish the connection with the mongo backend and connect to the collections
 
         :param collection: ignores but provided for consistency w/ other doc_store_config patterns
+        :param bulk_write_workers: the number of batches of assets which `save_many` and
+            `copy_all_course_assets` write at a time
+        :param content_addressed: whether to store the data of newly written assets once per distinct
+            content, as reference counted blobs shared by all the assets with that content. The assets
+            stored this way are always readable, whether or not this is enabled.
         """
         # GridFS will throw an exception if the Database is wrapped in a MongoProxy. So don't wrap it.
         # The appropriate methods below are marked as autoretry_read - those methods will handle
@@ -51,6 +77,14 @@ class MongoContentStore(ContentStore):
 
         self.fs_files = mongo_db[bucket + ".files"]  # the underlying collection GridFS uses
         self.chunks = mongo_db[bucket + ".chunks"]
+        self.bulk_write_workers = bulk_write_workers
+
+        # The content-addressed blobs, keyed by the sha256 of their data, which the GridFS files
+        # of assets refer to by `content_ref` instead of having chunks of their own.
+        self.content_addressed = content_addressed
+        self.blobs = gridfs.GridFS(mongo_db, bucket + "_blobs")
+        self.blob_files = mongo_db[bucket + "_blobs.files"]
+        self.blob_chunks = mongo_db[bucket + "_blobs.chunks"]
 
     def close_connections(self):
         """
@@ -75,16 +109,20 @@ class MongoContentStore(ContentStore):
         if database:
             connection.drop_database(self.fs_files.database.name)
         elif collections:
-            self.fs_files.drop()
-            self.chunks.drop()
+            for collection in (self.fs_files, self.chunks, self.blob_files, self.blob_chunks):
+                collection.drop()
         else:
-            self.fs_files.remove({})
-            self.chunks.remove({})
+            for collection in (self.fs_files, self.chunks, self.blob_files, self.blob_chunks):
+                collection.remove({})
 
         if connections:
             self.close_connections()
 
     def save(self, content):
+        if self.content_addressed:
+            self._write_files([self._make_asset_file(content)])
+            return content
+
         content_id, content_son = self.asset_db_key(content.location)
 
         # The way to version files in gridFS is to not use the file id as the _id but just as the filename.
@@ -117,6 +155,249 @@ class MongoContentStore(ContentStore):
 
         return content
 
+    def save_many(self, contents):
+        """
+        See :meth:`.ContentStore.save_many`
+
+        The GridFS files and chunks of the assets are written with a few bulk writes per batch of
+        assets, instead of a round trip per chunk, and the assets which are already stored with the
+        same data, by md5, and the same attributes aren't written at all.
+        """
+        files = OrderedDict()
+        for content in contents:
+            files_doc, chunks = self._make_asset_file(content)
+            # Later contents replace earlier ones with the same location, as with successive saves.
+            files[_hashable_id(files_doc['_id'])] = (content, files_doc, chunks)
+
+        stored_files = self._get_stored_files([files_doc['_id'] for __, files_doc, __ in six.itervalues(files)])
+        changed_files = [
+            (content, files_doc, chunks)
+            for content, files_doc, chunks in six.itervalues(files)
+            if _file_changed(files_doc, stored_files)
+        ]
+        self._map_batches(self._write_files, [(files_doc, chunks) for __, files_doc, chunks in changed_files])
+        return [content for content, __, __ in changed_files]
+
+    def _make_asset_file(self, content):
+        """
+        Return the GridFS files doc of the StaticContent `content`, without its uploadDate,
+        and the list of the data of its chunks.
+        """
+        content_id, content_son = self.asset_db_key(content.location)
+        data = _get_content_bytes(content)
+        files_doc = {
+            '_id': content_id,
+            'filename': six.text_type(content.location),
+            'contentType': content.content_type,
+            'displayname': content.name,
+            'content_son': content_son,
+            'thumbnail_location': (
+                content.thumbnail_location.to_deprecated_list_repr() if content.thumbnail_location else None
+            ),
+            'import_path': content.import_path,
+            # getattr b/c caching may mean some pickled instances don't have attr
+            'locked': getattr(content, 'locked', False),
+            'md5': hashlib.md5(data).hexdigest(),
+            'length': len(data),
+            'chunkSize': DEFAULT_CHUNK_SIZE,
+        }
+        chunks = [data[index:index + DEFAULT_CHUNK_SIZE] for index in range(0, len(data), DEFAULT_CHUNK_SIZE)]
+        return files_doc, chunks
+
+    def _get_stored_files(self, file_ids):
+        """
+        Return a dict of the hashable ids of the stored GridFS files with the given ids to their files docs.
+        """
+        return {
+            _hashable_id(stored_doc['_id']): stored_doc
+            for stored_doc in self.fs_files.find({'_id': {'$in': file_ids}})
+        }
+
+    def _map_batches(self, write_batch, files):
+        """
+        Call `write_batch` on batches of the (files doc, ...) tuples `files`, with up to
+        BULK_WRITE_BATCH_SIZE bytes of asset data each. Up to `bulk_write_workers` batches are
+        written at a time.
+        """
+        batches = [[]]
+        batch_size = 0
+        for file_to_write in files:
+            if batch_size >= BULK_WRITE_BATCH_SIZE:
+                batches.append([])
+                batch_size = 0
+            batches[-1].append(file_to_write)
+            batch_size += file_to_write[0]['length']
+
+        if self.bulk_write_workers > 1 and len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=self.bulk_write_workers) as executor:
+                list(executor.map(write_batch, batches))
+        elif batches[0]:
+            for batch in batches:
+                write_batch(batch)
+
+    def _write_files(self, files):
+        """
+        Replace the GridFS files of the given (files doc, list of chunk data) pairs, writing the
+        files and chunks collections in bulk. As with GridFS itself, the chunks of a file are
+        written before its files doc, so that a file is never found without its data.
+
+        The files docs which have a `content_ref` refer to that blob, and have no chunks. The data
+        of the other files is stored as blobs too if the store is content addressed.
+        """
+        file_ids = [files_doc['_id'] for files_doc, __ in files]
+        # Maps the ids of the blobs the stored files refer to to the ids of those files.
+        stored_blob_files = defaultdict(list)
+        for stored_doc in self.fs_files.find(
+                {'_id': {'$in': file_ids}, 'content_ref': {'$exists': True}}, {'content_ref': True},
+        ):
+            stored_blob_files[stored_doc['content_ref']].append(stored_doc['_id'])
+
+        files_docs = []
+        chunk_docs = []
+        # Maps the ids of the referenced blobs to their number of new references and their data.
+        blob_references = OrderedDict()
+        for files_doc, chunks in files:
+            if self.content_addressed and 'content_ref' not in files_doc:
+                data = b''.join(chunks)
+                files_doc = dict(files_doc, content_ref=hashlib.sha256(data).hexdigest())
+                blob_references.setdefault(files_doc['content_ref'], [0, data])
+            if 'content_ref' in files_doc:
+                blob_references.setdefault(files_doc['content_ref'], [0, None])[0] += 1
+            else:
+                chunk_docs.extend(
+                    {'files_id': files_doc['_id'], 'n': index, 'data': Binary(chunk)}
+                    for index, chunk in enumerate(chunks)
+                )
+            files_docs.append(files_doc)
+
+        # Add the new references before releasing the old ones, so that rewriting
+        # an asset with the same content never deletes its blob.
+        for blob_id, (count, data) in six.iteritems(blob_references):
+            self._add_blob_references(blob_id, count, data)
+
+        # Only release the references of the files docs this write actually deletes, so that
+        # concurrent writes of the same files release each reference once.
+        released_blobs = {}
+        for blob_id, stored_ids in six.iteritems(stored_blob_files):
+            released_blobs[blob_id] = self.fs_files.delete_many(
+                {'_id': {'$in': stored_ids}, 'content_ref': blob_id},
+            ).deleted_count
+        self.fs_files.delete_many({'_id': {'$in': file_ids}})
+        self.chunks.delete_many({'files_id': {'$in': file_ids}})
+        if chunk_docs:
+            self.chunks.insert_many(chunk_docs, ordered=False)
+        upload_date = datetime.utcnow()
+        self.fs_files.insert_many([dict(files_doc, uploadDate=upload_date) for files_doc in files_docs], ordered=False)
+
+        for blob_id, count in six.iteritems(released_blobs):
+            if count:
+                self._release_blob(blob_id, count)
+
+    def _add_blob_references(self, blob_id, count, data):
+        """
+        Add `count` references to the content-addressed blob `blob_id`, storing it with
+        `data` if it doesn't exist yet.
+
+        A blob which is being deleted isn't referenced any more: it is stored again once
+        its deletion is done.
+        """
+        while not self.blob_files.update_one(
+                {'_id': blob_id, 'deleted': {'$exists': False}}, {'$inc': {'refcount': count}},
+        ).matched_count:
+            if data is None:
+                raise NotFoundError(blob_id)
+            if self.blob_files.find_one({'_id': blob_id}, {'_id': True}) is not None:
+                # The blob is being deleted, so wait for its deletion to be done.
+                time.sleep(BLOB_DELETION_POLL_INTERVAL)
+                continue
+            try:
+                self.blobs.put(data, _id=blob_id, refcount=count)
+                return
+            except FileExists:
+                # The blob was stored concurrently, so add the references to it instead.
+                pass
+
+    def _release_blob(self, blob_id, count=1):
+        """
+        Remove `count` references to the content-addressed blob `blob_id`, deleting it once it isn't referenced.
+
+        The blob is marked deleted before its chunks are, so that it isn't referenced or stored
+        again until its files doc is gone too.
+        """
+        blob = self.blob_files.find_one_and_update(
+            {'_id': blob_id}, {'$inc': {'refcount': -count}}, return_document=ReturnDocument.AFTER,
+        )
+        if blob is None or blob['refcount'] > 0:
+            return
+        deleted_blob = self.blob_files.find_one_and_update(
+            {'_id': blob_id, 'refcount': {'$lte': 0}, 'deleted': {'$exists': False}}, {'$set': {'deleted': True}},
+        )
+        if deleted_blob is not None:
+            self.blob_chunks.delete_many({'files_id': blob_id})
+            self.blob_files.delete_one({'_id': blob_id, 'deleted': True})
+
+    def _get_data_file(self, fp):
+        """
+        Return the GridOut to read the data of the asset GridFS file `fp` from, which is
+        the content-addressed blob it refers to, if any.
+        """
+        content_ref = getattr(fp, 'content_ref', None)
+        return self.blobs.get(content_ref) if content_ref else fp
+
+    def convert_to_content_addressed(self):
+        """
+        Move the data of all the assets which have chunks of their own into content-addressed
+        blobs, so that assets with the same content share their data. Assets which change
+        while being converted are left as they are.
+
+        Returns the number of assets converted.
+        """
+        converted = 0
+        for files_doc in self.fs_files.find({'content_ref': {'$exists': False}}, {'_id': True, 'uploadDate': True}):
+            file_id = self.make_id_son(files_doc)
+            try:
+                with self.fs.get(file_id) as fp:
+                    # Need to replace dict IDs with SON for chunk lookup to work under Python 3
+                    # because field order can be different and mongo cares about the order
+                    if isinstance(fp._id, dict):
+                        fp._file['_id'] = file_id
+                    data = fp.read()
+            except NoFile:
+                continue
+
+            blob_id = hashlib.sha256(data).hexdigest()
+            self._add_blob_references(blob_id, 1, data)
+            converted_doc = self.fs_files.update_one(
+                {'_id': file_id, 'uploadDate': files_doc['uploadDate'], 'content_ref': {'$exists': False}},
+                {'$set': {'content_ref': blob_id}},
+            )
+            if converted_doc.modified_count:
+                self.chunks.delete_many({'files_id': file_id})
+                converted += 1
+            else:
+                self._release_blob(blob_id)
+        return converted
+
+    def get_storage_stats(self):
+        """
+        Return a dict of the total size of the data of all the assets, as `asset_bytes`,
+        and the size of the data actually stored for them, as `stored_bytes`, which is
+        smaller when assets share content-addressed blobs.
+        """
+        def total_length(collection, query):
+            result = list(collection.aggregate([
+                {'$match': query},
+                {'$group': {'_id': None, 'length': {'$sum': '$length'}}},
+            ]))
+            return result[0]['length'] if result else 0
+
+        return {
+            'asset_bytes': total_length(self.fs_files, {}),
+            'stored_bytes': (
+                total_length(self.fs_files, {'content_ref': {'$exists': False}}) + total_length(self.blob_files, {})
+            ),
+        }
+
     def delete(self, location_or_id):
         """
         Delete an asset.
@@ -124,7 +405,10 @@ class MongoContentStore(ContentStore):
         if isinstance(location_or_id, AssetKey):
             location_or_id, _ = self.asset_db_key(location_or_id)
         # Deletes of non-existent files are considered successful
-        self.fs.delete(location_or_id)
+        files_doc = self.fs_files.find_one_and_delete({'_id': location_or_id}, projection={'content_ref': True})
+        self.chunks.delete_many({'files_id': location_or_id})
+        if files_doc is not None and 'content_ref' in files_doc:
+            self._release_blob(files_doc['content_ref'])
 
     @autoretry_read()
     def find(self, location, throw_on_not_found=True, as_stream=False):
@@ -144,7 +428,7 @@ class MongoContentStore(ContentStore):
                         thumbnail_location[4]
                     )
                 return StaticContentStream(
-                    location, fp.displayname, fp.content_type, fp, last_modified_at=fp.uploadDate,
+                    location, fp.displayname, fp.content_type, self._get_data_file(fp), last_modified_at=fp.uploadDate,
                     thumbnail_location=thumbnail_location,
                     import_path=getattr(fp, 'import_path', None),
                     length=fp.length, locked=getattr(fp, 'locked', False),
@@ -163,7 +447,8 @@ class MongoContentStore(ContentStore):
                             thumbnail_location[4]
                         )
                     return StaticContent(
-                        location, fp.displayname, fp.content_type, fp.read(), last_modified_at=fp.uploadDate,
+                        location, fp.displayname, fp.content_type, self._get_data_file(fp).read(),
+                        last_modified_at=fp.uploadDate,
                         thumbnail_location=thumbnail_location,
                         import_path=getattr(fp, 'import_path', None),
                         length=fp.length, locked=getattr(fp, 'locked', False),
@@ -176,22 +461,27 @@ class MongoContentStore(ContentStore):
                 return None
 
     def export(self, location, output_directory):
-        content = self.find(location)
-
-        filename = content.name
-        if content.import_path is not None:
-            output_directory = output_directory + '/' + os.path.dirname(content.import_path)
-
         if not os.path.exists(output_directory):
             os.makedirs(output_directory)
+        self.export_to_fs(location, OSFS(output_directory))
 
-        # Escape invalid char from filename.
-        export_name = escape_invalid_characters(name=filename, invalid_char_list=['/', '\\'])
-
-        disk_fs = OSFS(output_directory)
+    def export_to_fs(self, location, export_fs):
+        """
+        Export the asset at `location` into the pyfilesystem `export_fs`, streaming its data
+        from GridFS in chunks rather than reading the whole asset into memory.
+        """
+        content = self.find(location, as_stream=True)
+        try:
+            # Escape invalid char from filename.
+            export_name = escape_invalid_characters(name=content.name, invalid_char_list=['/', '\\'])
+            if content.import_path is not None:
+                export_fs = export_fs.makedirs(os.path.dirname(content.import_path), recreate=True)
 
-        with disk_fs.open(export_name, 'wb') as asset_file:
-            asset_file.write(content.data)
+            with export_fs.open(export_name, 'wb') as asset_file:
+                for chunk in content.stream_data():
+                    asset_file.write(chunk)
+        finally:
+            content.close()
 
     def export_all_for_course(self, course_key, output_directory, assets_policy_file):
         """
@@ -217,13 +507,36 @@ class MongoContentStore(ContentStore):
             # When debugging course exports, this might be a good place
             # to look. -- pmitros
             self.export(asset['asset_key'], output_directory)
-            for attr, value in six.iteritems(asset):
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
-                    policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
+            self._add_asset_policy(policy, asset)
 
         with open(assets_policy_file, 'w') as f:
             json.dump(policy, f, sort_keys=True, indent=4)
 
+    def export_all_for_course_to_fs(self, course_key, export_fs, output_directory, assets_policy_file):
+        """
+        Export all of this course's assets to the output_directory of the pyfilesystem `export_fs`,
+        and all of the assets' attributes to its policy file, like `export_all_for_course`.
+        The output_directory is only created if the course has assets.
+        """
+        policy = {}
+        assets, __ = self.get_all_content_for_course(course_key)
+
+        for asset in assets:
+            self.export_to_fs(asset['asset_key'], export_fs.makedirs(output_directory, recreate=True))
+            self._add_asset_policy(policy, asset)
+
+        with export_fs.open(assets_policy_file, 'w') as f:
+            f.write(six.text_type(json.dumps(policy, sort_keys=True, indent=4)))
+
+    @staticmethod
+    def _add_asset_policy(policy, asset):
+        """
+        Add the attributes of `asset` which are exported in the assets policy to `policy`.
+        """
+        for attr, value in six.iteritems(asset):
+            if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
+                policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
+
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
 
@@ -246,10 +559,8 @@ class MongoContentStore(ContentStore):
             ])
             items = self.fs_files.find(query)
             for asset in items:
-                self.fs.delete(asset[prefix])
+                self.delete(self.make_id_son(asset))
                 assets_to_delete += 1
-
-            self.fs_files.remove(query)
         return assets_to_delete
 
     @autoretry_read()
@@ -405,21 +716,19 @@ class MongoContentStore(ContentStore):
         """
         See :meth:`.ContentStore.copy_all_course_assets`
 
-        This implementation fairly expensively copies all of the data
+        This implementation copies the GridFS chunks of the assets in bulk, batch by batch,
+        and skips the assets which the destination already has with the same data and attributes.
         """
         source_query = query_for_course(source_course_key)
-        # it'd be great to figure out how to do all of this on the db server and not pull the bits over
+        files = []
         for asset in self.fs_files.find(source_query):
-            asset_key = self.make_id_son(asset)
-            # don't convert from string until fs access
-            source_content = self.fs.get(asset_key)
+            source_id = self.make_id_son(asset)
+            asset_key = source_id
             if isinstance(asset_key, six.string_types):
                 asset_key = AssetKey.from_string(asset_key)
                 __, asset_key = self.asset_db_key(asset_key)
-            # Need to replace dict IDs with SON for chunk lookup to work under Python 3
-            # because field order can be different and mongo cares about the order
-            if isinstance(source_content._id, dict):
-                source_content._file['_id'] = asset_key.copy()
+            else:
+                asset_key = asset_key.copy()
             asset_key['org'] = dest_course_key.org
             asset_key['course'] = dest_course_key.course
             if getattr(dest_course_key, 'deprecated', False):  # remove the run if exists
@@ -431,33 +740,46 @@ class MongoContentStore(ContentStore):
                 asset_id = six.text_type(
                     dest_course_key.make_asset_key(asset_key['category'], asset_key['name']).for_branch(None)
                 )
-            try:
-                self.create_asset(source_content, asset_id, asset, asset_key)
-            except FileExists:
-                self.fs.delete(file_id=asset_id)
-                self.create_asset(source_content, asset_id, asset, asset_key)
-
-    def create_asset(self, source_content, asset_id, asset, asset_key):
-        """
-        Creates a new asset
-        :param source_content:
-        :param asset_id:
-        :param asset:
-        :param asset_key:
-        :return:
-        """
-        self.fs.put(
-            source_content.read(),
-            _id=asset_id, filename=asset['filename'], content_type=asset['contentType'],
-            displayname=asset['displayname'], content_son=asset_key,
-            # thumbnail is not technically correct but will be functionally correct as the code
-            # only looks at the name which is not course relative.
-            thumbnail_location=asset['thumbnail_location'],
-            import_path=asset['import_path'],
-            # getattr b/c caching may mean some pickled instances don't have attr
-            locked=asset.get('locked', False)
+            files_doc = {
+                '_id': asset_id,
+                'filename': asset['filename'],
+                'contentType': asset['contentType'],
+                'displayname': asset['displayname'],
+                'content_son': asset_key,
+                # thumbnail is not technically correct but will be functionally correct as the code
+                # only looks at the name which is not course relative.
+                'thumbnail_location': asset.get('thumbnail_location'),
+                'import_path': asset.get('import_path'),
+                'locked': asset.get('locked', False),
+                'md5': asset.get('md5'),
+                'length': asset['length'],
+                # The chunks are copied as they are, so they keep their size.
+                'chunkSize': asset['chunkSize'],
+            }
+            if 'content_ref' in asset:
+                # The copy shares the source's content-addressed blob.
+                files_doc['content_ref'] = asset['content_ref']
+            files.append((files_doc, source_id))
+
+        stored_files = self._get_stored_files([files_doc['_id'] for files_doc, __ in files])
+        self._map_batches(
+            self._copy_files,
+            [(files_doc, source_id) for files_doc, source_id in files if _file_changed(files_doc, stored_files)],
         )
 
+    def _copy_files(self, files):
+        """
+        Write the given (files doc, source file id) pairs as GridFS files with the chunks of their source files.
+        """
+        source_chunks = defaultdict(list)
+        source_ids = [source_id for files_doc, source_id in files if 'content_ref' not in files_doc]
+        if source_ids:
+            for chunk in self.chunks.find({'files_id': {'$in': source_ids}}, sort=[('n', pymongo.ASCENDING)]):
+                source_chunks[_hashable_id(chunk['files_id'])].append(chunk['data'])
+        self._write_files([
+            (files_doc, source_chunks[_hashable_id(source_id)]) for files_doc, source_id in files
+        ])
+
     def delete_all_course_assets(self, course_key):
         """
         Delete all assets identified via this course_key. Dangerous operation which may remove assets
@@ -468,7 +790,7 @@ class MongoContentStore(ContentStore):
         matching_assets = self.fs_files.find(course_query)
         for asset in matching_assets:
             asset_key = self.make_id_son(asset)
-            self.fs.delete(asset_key)
+            self.delete(asset_key)
 
     # codifying the original order which pymongo used for the dicts coming out of location_to_dict
     # stability of order is more important than sanity of order as any changes to order make things
@@ -603,6 +925,39 @@ class MongoContentStore(ContentStore):
         )
 
 
+def _get_content_bytes(content):
+    """
+    Return the data of the StaticContent `content` as bytes.
+    """
+    if hasattr(content.data, '__iter__') and not isinstance(content.data, (six.binary_type, six.string_types)):
+        return b''.join(content.data)
+    if isinstance(content.data, six.text_type):
+        return content.data.encode('utf-8')
+    return content.data
+
+
+def _file_changed(files_doc, stored_files):
+    """
+    Return whether the GridFS file `files_doc` differs from the stored file with the same _id, if any,
+    in the dict `stored_files` returned by `MongoContentStore._get_stored_files`.
+    """
+    stored_doc = stored_files.get(_hashable_id(files_doc['_id']))
+    # pylint: disable=bad-continuation
+    return (
+        stored_doc is None or files_doc['md5'] is None or stored_doc.get('md5') != files_doc['md5'] or
+        any(stored_doc.get(attribute) != files_doc[attribute] for attribute in ASSET_FILE_ATTRIBUTES)
+    )
+
+
+def _hashable_id(file_id):
+    """
+    Return a hashable version of the GridFS file id `file_id`, which is either a string or a dict.
+    """
+    if isinstance(file_id, dict):
+        return tuple(sorted(file_id.items()))
+    return file_id
+
+
 def query_for_course(course_key, category=None):
     """
     Construct a SON object that will query for all assets possibly limited to the given type
@@ -11,6 +11,7 @@ import sys
 from collections import OrderedDict
 from datetime import datetime
 
+import numpy
 import six
 from contracts import contract
 from pytz import UTC
@@ -243,6 +244,15 @@ class CourseGrader(six.with_metaclass(abc.ABCMeta, object)):
         '''Given a grade sheet, return a dict containing grading information'''
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def grade_matrix(self, grade_matrix):
+        """
+        Given a GradeMatrix, grades all of its users at once and returns a
+        GradeMatrixResult, from which the dict returned by grade can be
+        retrieved for each user.
+        """
+        raise NotImplementedError
+
 
 class WeightedSubsectionsGrader(CourseGrader):
     """
@@ -271,13 +281,32 @@ class WeightedSubsectionsGrader(CourseGrader):
         return result
 
     def grade(self, grade_sheet, generate_random_scores=False):
+        return self._summarize([
+            subgrader.grade(grade_sheet, generate_random_scores)
+            for subgrader, _, _ in self.subgraders
+        ])
+
+    def grade_matrix(self, grade_matrix):
+        subgrade_results = [subgrader.grade_matrix(grade_matrix) for subgrader, _, _ in self.subgraders]
+
+        # Sum the weighted percents in the same order as _summarize does,
+        # so that the percents are identical to those of grade.
+        total_percent = numpy.zeros(grade_matrix.num_users)
+        for (_subgrader, _assignment_type, weight), subgrade_result in zip(self.subgraders, subgrade_results):
+            total_percent += subgrade_result.percent * weight
+
+        return _WeightedSubsectionsGradeMatrixResult(self, total_percent, subgrade_results)
+
+    def _summarize(self, subgrade_results):
+        """
+        Returns the dict containing grading information, given the
+        results of the subgraders.
+        """
         total_percent = 0.0
         section_breakdown = []
         grade_breakdown = OrderedDict()
 
-        for subgrader, assignment_type, weight in self.subgraders:
-            subgrade_result = subgrader.grade(grade_sheet, generate_random_scores)
-
+        for (_subgrader, assignment_type, weight), subgrade_result in zip(self.subgraders, subgrade_results):
             weighted_percent = subgrade_result['percent'] * weight
             section_detail = _(u"{assignment_type} = {weighted_percent:.2%} of a possible {weight:.2%}").format(
                 assignment_type=assignment_type,
@@ -379,7 +408,6 @@ class AssignmentFormatGrader(CourseGrader):
     def grade(self, grade_sheet, generate_random_scores=False):
         scores = list(grade_sheet.get(self.type, {}).values())
         breakdown = []
-        labeler = get_short_labeler(self.short_label)
         for i in range(max(int(float(self.min_count)), len(scores))):
             if i < len(scores) or generate_random_scores:
                 if generate_random_scores:  	# for debugging!
@@ -393,29 +421,87 @@ class AssignmentFormatGrader(CourseGrader):
                     section_name = scores[i].display_name
 
                 percentage = scores[i].percent_graded
-                summary_format = u"{section_type} {index} - {name} - {percent:.0%} ({earned:.3n}/{possible:.3n})"
-                summary = summary_format.format(
-                    index=i + self.starting_index,
-                    section_type=self.section_type,
-                    name=section_name,
-                    percent=percentage,
-                    earned=float(earned),
-                    possible=float(possible)
-                )
+                breakdown.append(self._section_breakdown_entry(i, section_name, percentage, earned, possible))
             else:
-                percentage = 0.0
-                # Translators: "Homework 1 - Unreleased - 0% (?/?)" The section has not been released for viewing.
-                summary = _(u"{section_type} {index} Unreleased - 0% (?/?)").format(
-                    index=i + self.starting_index,
-                    section_type=self.section_type
-                )
-            short_label = labeler(i + self.starting_index)
-
-            breakdown.append({'percent': percentage, 'label': short_label,
-                              'detail': summary, 'category': self.category})
+                breakdown.append(self._unreleased_breakdown_entry(i))
 
         total_percent, dropped_indices = self.total_with_drops(breakdown)
-
+        return self._summarize(breakdown, total_percent, dropped_indices)
+
+    def grade_matrix(self, grade_matrix):
+        num_users = grade_matrix.num_users
+        min_count = int(float(self.min_count))
+        columns = grade_matrix.columns(self.type)
+
+        # Lay out each user's breakdown as the subsections of this type,
+        # followed by min_count placeholder slots, of which only enough
+        # to fill up min_count entries are used.
+        present = grade_matrix.present[:, columns]
+        num_placeholders = numpy.maximum(min_count - present.sum(axis=1), 0)
+        entries = numpy.concatenate(
+            [present, numpy.arange(min_count) < num_placeholders[:, numpy.newaxis]],
+            axis=1,
+        )
+        percents = numpy.concatenate(
+            [numpy.where(present, grade_matrix.percent[:, columns], 0.0), numpy.zeros((num_users, min_count))],
+            axis=1,
+        )
+        num_entries = entries.sum(axis=1)
+
+        # Rank the entries as total_with_drops does, by descending percent
+        # with ties in order of the entries, and drop the lowest ranked ones.
+        order = numpy.argsort(numpy.where(entries, -percents, numpy.inf), axis=1, kind='stable')
+        ranks = numpy.empty_like(order)
+        numpy.put_along_axis(
+            ranks, order, numpy.broadcast_to(numpy.arange(order.shape[1]), order.shape), axis=1,
+        )
+        dropped = entries & (ranks >= (num_entries - self.drop_count)[:, numpy.newaxis])
+
+        # Sum the kept percents in the order of the entries, so that the
+        # percents are identical to those of total_with_drops.
+        kept = entries & ~dropped
+        total_percent = numpy.zeros(num_users)
+        for slot in range(kept.shape[1]):
+            total_percent += numpy.where(kept[:, slot], percents[:, slot], 0.0)
+        num_kept = num_entries - self.drop_count
+        total_percent = numpy.where(num_kept > 0, total_percent / numpy.maximum(num_kept, 1), total_percent)
+
+        return _AssignmentFormatGradeMatrixResult(self, total_percent, grade_matrix, columns, entries, dropped)
+
+    def _section_breakdown_entry(self, index, section_name, percentage, earned, possible):
+        """
+        Returns the breakdown entry of the index-th section of this type.
+        """
+        summary_format = u"{section_type} {index} - {name} - {percent:.0%} ({earned:.3n}/{possible:.3n})"
+        summary = summary_format.format(
+            index=index + self.starting_index,
+            section_type=self.section_type,
+            name=section_name,
+            percent=percentage,
+            earned=float(earned),
+            possible=float(possible)
+        )
+        short_label = get_short_labeler(self.short_label)(index + self.starting_index)
+        return {'percent': percentage, 'label': short_label, 'detail': summary, 'category': self.category}
+
+    def _unreleased_breakdown_entry(self, index):
+        """
+        Returns the placeholder breakdown entry of the index-th section
+        of this type, when fewer than min_count sections were graded.
+        """
+        # Translators: "Homework 1 - Unreleased - 0% (?/?)" The section has not been released for viewing.
+        summary = _(u"{section_type} {index} Unreleased - 0% (?/?)").format(
+            index=index + self.starting_index,
+            section_type=self.section_type
+        )
+        short_label = get_short_labeler(self.short_label)(index + self.starting_index)
+        return {'percent': 0.0, 'label': short_label, 'detail': summary, 'category': self.category}
+
+    def _summarize(self, breakdown, total_percent, dropped_indices):
+        """
+        Returns the dict containing grading information, given the
+        breakdown entries of the sections of this type.
+        """
         for dropped_index in dropped_indices:
             breakdown[dropped_index]['mark'] = {
                 'detail': _(u"The lowest {drop_count} {section_type} scores are dropped.").format(
@@ -457,6 +543,108 @@ class AssignmentFormatGrader(CourseGrader):
         }
 
 
+class GradeMatrix(object):
+    """
+    The graded totals of the graded subsections of a course for many users,
+    as users by subsections matrices, so that graders can grade all of the
+    users at once with NumPy.
+
+    subsections is a list of (format, display_name) tuples, in course order,
+    and earned and possible are the corresponding matrices of graded totals.
+    As with the grade sheets passed to grade, a subsection with nothing
+    possible for a user is left out of the user's grade.
+    """
+    def __init__(self, subsections, earned, possible):
+        self.subsections = list(subsections)
+        self.earned = numpy.asarray(earned, dtype=float)
+        self.possible = numpy.asarray(possible, dtype=float)
+        self.present = self.possible > 0
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            # Rounded to two decimal places, like the percent_graded of
+            # subsection grades.
+            self.percent = numpy.where(self.present, numpy.around(self.earned / self.possible, decimals=2), 0.0)
+
+    @property
+    def num_users(self):
+        return self.earned.shape[0]
+
+    def columns(self, subsection_format):
+        """
+        Returns the indices of the subsections of the given format.
+        """
+        return numpy.array(
+            [index for index, (format_, _) in enumerate(self.subsections) if format_ == subsection_format],
+            dtype=int,
+        )
+
+
+class GradeMatrixResult(six.with_metaclass(abc.ABCMeta, object)):
+    """
+    The result of grading all of the users of a GradeMatrix at once.
+    """
+    def __init__(self, percent):
+        # NumPy array of the users' percents, in the order of the GradeMatrix.
+        self.percent = percent
+
+    @abc.abstractmethod
+    def summary(self, index):
+        """
+        Returns the dict containing grading information of the index-th user
+        of the GradeMatrix, as returned by the grader's grade method.
+        """
+        raise NotImplementedError
+
+
+class _WeightedSubsectionsGradeMatrixResult(GradeMatrixResult):
+    """
+    GradeMatrixResult of a WeightedSubsectionsGrader.
+    """
+    def __init__(self, grader, percent, subgrade_results):
+        super(_WeightedSubsectionsGradeMatrixResult, self).__init__(percent)
+        self._grader = grader
+        self._subgrade_results = subgrade_results
+
+    def summary(self, index):
+        return self._grader._summarize(  # pylint: disable=protected-access
+            [subgrade_result.summary(index) for subgrade_result in self._subgrade_results]
+        )
+
+
+class _AssignmentFormatGradeMatrixResult(GradeMatrixResult):
+    """
+    GradeMatrixResult of an AssignmentFormatGrader.
+    """
+    def __init__(self, grader, percent, grade_matrix, columns, entries, dropped):
+        super(_AssignmentFormatGradeMatrixResult, self).__init__(percent)
+        self._grader = grader
+        self._grade_matrix = grade_matrix
+        self._columns = columns
+        self._entries = entries
+        self._dropped = dropped
+
+    def summary(self, index):
+        # pylint: disable=protected-access
+        grade_matrix = self._grade_matrix
+        breakdown = []
+        dropped_indices = []
+        for slot in numpy.flatnonzero(self._entries[index]):
+            if self._dropped[index, slot]:
+                dropped_indices.append(len(breakdown))
+            if slot < len(self._columns):
+                column = self._columns[slot]
+                _, display_name = grade_matrix.subsections[column]
+                breakdown.append(self._grader._section_breakdown_entry(
+                    len(breakdown),
+                    display_name,
+                    grade_matrix.percent[index, column],
+                    grade_matrix.earned[index, column],
+                    grade_matrix.possible[index, column],
+                ))
+            else:
+                breakdown.append(self._grader._unreleased_breakdown_entry(len(breakdown)))
+        return self._grader._summarize(breakdown, self.percent[index], dropped_indices)
+
+
 def _iter_graded(scores):
     """
     Yield the scores that belong to explicitly graded blocks
@@ -72,6 +72,25 @@ class DuplicateItemError(Exception):
         )
 
 
+class MissingStructureDeltaBaseError(Exception):
+    """
+    A structure stored as a delta can't be rebuilt, because a structure it is based on is missing.
+    """
+    def __init__(self, structure_id, base_id):
+        super(MissingStructureDeltaBaseError, self).__init__()
+        self.structure_id = structure_id
+        self.base_id = base_id
+
+    def __str__(self, *args, **kwargs):
+        """
+        Print info about the missing structure
+        """
+        return "Structure {structure_id} is stored as a delta of structure {base_id}, which is missing".format(
+            structure_id=self.structure_id,
+            base_id=self.base_id,
+        )
+
+
 class VersionConflictError(Exception):
     """
     The caller asked for either draft or published head and gave a version which conflicted with it.
@@ -0,0 +1,80 @@
+"""
+Performance test for storing split modulestore structures as deltas.
+"""
+
+
+import datetime
+import os
+import unittest
+from time import time
+
+import ddt
+from bson import BSON
+from six.moves import range
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore.tests.mongo_connection import MONGO_HOST, MONGO_PORT_NUM
+from xmodule.modulestore.tests.test_split_mongo_mongo_connection import edit_block, make_structure, version_structure
+
+# Number of blocks in the structure of the course being edited.
+NUM_BLOCKS = (100, 1000, 5000)
+
+# Number of versions saved per test run, each of which edits a single block.
+NUM_VERSIONS = 100
+
+# None stores every structure in full.
+SNAPSHOT_INTERVALS = (None, 10, 50)
+
+
+@ddt.ddt
+@unittest.skip
+class StructureDeltaStorage(unittest.TestCase):
+    """
+    This class exists to time saving successive versions of a course structure, and
+    to measure the storage they use, with and without storing structures as deltas.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    test_run_time = datetime.datetime.now()
+
+    @ddt.data(*NUM_BLOCKS)
+    def test_generate_structure_delta_timings(self, num_blocks):
+        """
+        Record the time spent writing and reading the versions of a structure, and
+        their total size in the database, for each snapshot interval.
+        """
+        for snapshot_interval in SNAPSHOT_INTERVALS:
+            connection = MongoConnection(
+                'test_structure_deltas_perf_{}'.format(os.getpid()), 'modulestore', MONGO_HOST,
+                port=MONGO_PORT_NUM, structure_snapshot_interval=snapshot_interval,
+            )
+            try:
+                structure = make_structure(num_blocks)
+                connection.insert_structure(structure)
+                structure_ids = [structure['_id']]
+
+                write_time = 0
+                for index in range(NUM_VERSIONS):
+                    structure = version_structure(structure)
+                    edit_block(structure, BlockKey('problem', 'problem{}'.format(index % num_blocks)))
+                    start = time()
+                    connection.insert_structure(structure)
+                    write_time += time() - start
+                    structure_ids.append(structure['_id'])
+
+                start = time()
+                connection.find_structures_by_id(structure_ids)
+                read_time = time() - start
+
+                stored_size = sum(len(BSON.encode(doc)) for doc in connection.structures.find())
+                result_str = (
+                    "{} - Blocks: {:>5} - Snapshot interval: {!s:>4} - Write: {:.3f}s - Read: {:.3f}s - "
+                    "Stored bytes: {}\n"
+                ).format(self.test_run_time, num_blocks, snapshot_interval, write_time, read_time, stored_size)
+                with open("structure_delta_sizes.txt", "a") as f:
+                    f.write(result_str)
+            finally:
+                connection._drop_database()  # pylint: disable=protected-access
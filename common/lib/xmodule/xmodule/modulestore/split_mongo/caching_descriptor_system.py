@@ -2,6 +2,7 @@
 
 import logging
 import sys
+from collections import OrderedDict
 
 import six
 from contracts import contract, new_contract
@@ -9,7 +10,7 @@ from fs.osfs import OSFS
 from lazy import lazy
 from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator, DefinitionLocator, LibraryLocator, LocalId
 from xblock.core import XBlock
-from xblock.fields import ScopeIds
+from xblock.fields import Scope, ScopeIds
 from xblock.runtime import KeyValueStore, KvsFieldData
 
 from xmodule.error_module import ErrorDescriptor
@@ -45,7 +46,10 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
     Computes the settings (nee 'metadata') inheritance upon creation.
     """
     @contract(course_entry=CourseEnvelope)
-    def __init__(self, modulestore, course_entry, default_class, module_data, lazy, **kwargs):
+    def __init__(
+        self, modulestore, course_entry, default_class, module_data, lazy, definition_prefetch_batch_size=None,
+        **kwargs
+    ):
         """
         Computes the settings inheritance and sets up the cache.
 
@@ -58,6 +62,9 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         module_data: a dict mapping Location -> json that was cached from the
             underlying modulestore
+
+        definition_prefetch_batch_size: if set, the most definitions fetched in one query when a
+            lazily loaded definition is needed, along with the other definitions likely to be needed
         """
         # needed by capa_problem (as runtime.filestore via this.resources_fs)
         if course_entry.course_key.course:
@@ -86,6 +93,12 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.default_class = default_class
         self.local_modules = {}
         self._services['library_tools'] = LibraryToolsService(modulestore, user_id=None)
+        self.definition_prefetch_batch_size = definition_prefetch_batch_size
+        # Ids of the definitions which are likely to be needed but haven't been fetched yet, in the
+        # order they were planned (the values are unused).
+        self._planned_definitions = OrderedDict()
+        self._prefetched_definitions = {}
+        self._reads_content_fields = {}
 
     @lazy
     @contract(returns="dict(BlockKey: BlockKey)")
@@ -144,6 +157,76 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.modulestore.cache_block(course_key, version_guid, block_key, block)
         return block
 
+    def plan_definition_prefetch(self, blocks):
+        """
+        Plan to fetch the definitions of those of the given BlockData whose definitions
+        haven't been loaded yet and are likely to be read, so that they are fetched in
+        a single query when the first of them is needed.
+        """
+        if not self.definition_prefetch_batch_size:
+            return
+
+        for block_data in blocks:
+            if (  # pylint: disable=bad-continuation
+                block_data.definition is not None and
+                not block_data.definition_loaded and
+                block_data.definition not in self._prefetched_definitions and
+                self._block_type_reads_content_fields(block_data.block_type)
+            ):
+                self._planned_definitions[block_data.definition] = True
+
+    def _block_type_reads_content_fields(self, block_type):
+        """
+        Return whether blocks of this type have content fields, which are stored in their
+        definitions, and so need their definitions to be loaded when they're used.
+        """
+        if block_type not in self._reads_content_fields:
+            try:
+                class_ = self.load_block_type(block_type)
+            except Exception:  # pylint: disable=broad-except
+                self._reads_content_fields[block_type] = False
+            else:
+                self._reads_content_fields[block_type] = any(
+                    field.scope == Scope.content for field in six.itervalues(class_.fields)
+                )
+        return self._reads_content_fields[block_type]
+
+    def get_definition(self, course_key, definition_id):
+        """
+        Return the definition ``definition_id``, fetching it along with the other
+        planned definitions if it hasn't been prefetched yet.
+        """
+        definition = self._prefetched_definitions.get(definition_id)
+        if definition is not None:
+            return definition
+
+        self._planned_definitions.pop(definition_id, None)
+        batch = [definition_id]
+        while self._planned_definitions and len(batch) < self.definition_prefetch_batch_size:
+            batch.append(self._planned_definitions.popitem(last=False)[0])
+
+        if len(batch) == 1:
+            definition = self.modulestore.get_definition(course_key, definition_id)
+        else:
+            for fetched_definition in self.modulestore.get_definitions(course_key, batch):
+                self._prefetched_definitions[fetched_definition['_id']] = fetched_definition
+            definition = self._prefetched_definitions.get(definition_id)
+        self._record_definition_fetch(len(batch))
+        return definition
+
+    def _record_definition_fetch(self, num_definitions):
+        """
+        Count a query for ``num_definitions`` lazily loaded definitions in this request, so
+        that the number of queries saved by batching them can be told from the
+        difference between the 'definitions' and 'queries' counts.
+        """
+        request_cache = getattr(self.modulestore, 'request_cache', None)
+        if request_cache is None:
+            return
+        counts = request_cache.data.setdefault('definition_prefetch', {'queries': 0, 'definitions': 0})
+        counts['queries'] += 1
+        counts['definitions'] += num_definitions
+
     @contract(block_key=BlockKey, course_key="CourseLocator | LibraryLocator")
     def get_module_data(self, block_key, course_key):
         """
@@ -201,7 +284,9 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 block_key.type,
                 definition_id,
                 convert_fields,
+                runtime=self,
             )
+            self.plan_definition_prefetch([block_data])
         else:
             definition_loader = None
 
@@ -3,11 +3,16 @@ Segregation of pymongo functions from the data modeling mechanisms for split mod
 """
 
 
+import copy
 import datetime
+import hashlib
+import json
 import logging
 import math
 import re
+import threading
 import zlib
+from collections import OrderedDict
 from contextlib import contextmanager
 from time import time
 
@@ -22,6 +27,7 @@ from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
+from xmodule.modulestore.exceptions import MissingStructureDeltaBaseError
 from xmodule.modulestore.split_mongo import BlockKey
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 
@@ -204,6 +210,68 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+def _block_storage_key(block):
+    """
+    Return the (block_type, block_id) pair identifying a block stored in mongo.
+    """
+    return (block['block_type'], block['block_id'])
+
+
+def _block_hash(block):
+    """
+    Return a digest of the contents of a block stored in mongo, to tell whether it changed between versions.
+    """
+    return hashlib.md5(json.dumps(block, sort_keys=True, default=six.text_type).encode('utf-8')).digest()
+
+
+def _block_query_fields(block):
+    """
+    Return the fields of a block stored in mongo which structures are queried on, so that a structure
+    stored as a delta is still matched by the same queries as a structure stored in full.
+    """
+    query_fields = {'block_type': block['block_type'], 'block_id': block['block_id']}
+    if 'update_version' in block.get('edit_info', {}):
+        query_fields['edit_info'] = {'update_version': block['edit_info']['update_version']}
+    return query_fields
+
+
+def _stored_blocks(doc):
+    """
+    Return the blocks stored in full in the mongo document of a structure, and the block keys removed
+    since its previous version: all of its blocks for a structure stored in full, or the blocks which
+    changed and the root block for a structure stored as a delta.
+    """
+    if 'delta' not in doc:
+        return doc['blocks'], []
+    root = tuple(doc['root'])
+    root_blocks = [block for block in doc.get('blocks', []) if _block_storage_key(block) == root]
+    return doc['delta']['blocks'] + root_blocks, doc['delta']['removed']
+
+
+def _apply_structure_deltas(structure, chain):
+    """
+    Rebuild the full mongo document of a structure stored as a delta.
+
+    Arguments:
+        structure: The mongo document of the delta-encoded structure.
+        chain (list): The mongo documents of the structures listed in
+            the delta's 'chain', starting with the full snapshot.
+    """
+    blocks = {}
+    for doc in chain + [structure]:
+        stored_blocks, removed = _stored_blocks(doc)
+        for block_key in removed:
+            blocks.pop(tuple(block_key), None)
+        if doc is not structure:
+            # The chain may be shared with other structures being rebuilt, so copy its blocks.
+            stored_blocks = [copy.deepcopy(block) for block in stored_blocks]
+        blocks.update((_block_storage_key(block), block) for block in stored_blocks)
+
+    del structure['delta']
+    structure['blocks'] = list(blocks.values())
+    return structure
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
@@ -222,8 +290,15 @@ class CourseStructureCache(object):
 
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
+        return self.get_with_size(key, course_context)[0]
+
+    def get_with_size(self, key, course_context=None):
+        """
+        Like get, but return a (structure, size) pair, where size is the pickled size of the
+        structure, or (None, None) if it isn't cached.
+        """
         if self.cache is None:
-            return None
+            return None, None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
             try:
@@ -233,7 +308,7 @@ class CourseStructureCache(object):
                 if compressed_pickled_data is None:
                     # Always log cache misses, because they are unexpected
                     tagger.sample_rate = 1
-                    return None
+                    return None, None
 
                 tagger.measure('compressed_size', len(compressed_pickled_data))
 
@@ -241,17 +316,20 @@ class CourseStructureCache(object):
                 tagger.measure('uncompressed_size', len(pickled_data))
 
                 if six.PY2:
-                    return pickle.loads(pickled_data)
+                    return pickle.loads(pickled_data), len(pickled_data)
                 else:
-                    return pickle.loads(pickled_data, encoding='latin-1')
+                    return pickle.loads(pickled_data, encoding='latin-1'), len(pickled_data)
             except Exception:
                 # The cached data is corrupt in some way, get rid of it.
                 log.warning("CourseStructureCache: Bad data in cache for %s", course_context)
                 self.cache.delete(key)
-                return None
+                return None, None
 
     def set(self, key, structure, course_context=None):
-        """Given a structure, will pickle, compress, and write to cache."""
+        """
+        Given a structure, will pickle, compress, and write to cache.
+        Return the pickled size of the structure, or None if there is no cache.
+        """
         if self.cache is None:
             return None
 
@@ -265,6 +343,114 @@ class CourseStructureCache(object):
 
             # Stuctures are immutable, so we set a timeout of "never"
             self.cache.set(key, compressed_pickled_data, None)
+            return len(pickled_data)
+
+    def get_block_hashes(self, key):
+        """
+        Return the digests of the blocks of the structure with id ``key``, keyed by
+        (block_type, block_id), or None if they aren't cached.
+        """
+        if self.cache is None:
+            return None
+        return self.cache.get(u'block_hashes.{}'.format(key))
+
+    def set_block_hashes(self, key, block_hashes):
+        """
+        Cache the digests of the blocks of the structure with id ``key``.
+        """
+        if self.cache is None:
+            return
+        self.cache.set(u'block_hashes.{}'.format(key), block_hashes, None)
+
+
+def _copy_structure(structure):
+    """
+    Return a copy of a decoded structure which can be handed out while the original stays cached.
+
+    Readers of a structure only replace its blocks' fields (e.g. when loading definitions) and
+    flag them as loaded, and a structure is deep copied before it is edited, so copying each
+    BlockData and its fields dict is enough to keep the cached structure intact.
+    """
+    new_structure = dict(structure)
+    new_structure['blocks'] = {}
+    for block_key, block in six.iteritems(structure['blocks']):
+        new_block = copy.copy(block)
+        new_block.fields = dict(block.fields)
+        new_structure['blocks'][block_key] = new_block
+    return new_structure
+
+
+class DecodedStructureCache(object):
+    """
+    A bounded, process-local cache of decoded structures, keyed by structure id.
+
+    Structures are immutable once saved, so they can be kept for the life of the process, which
+    saves decompressing and unpickling them from the course structure cache on every lookup.
+    The least recently used structures are evicted once the pickled size of the cached
+    structures, as an estimate of the memory they use, exceeds ``max_size`` bytes.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Maps structure ids to (structure, size) pairs, least recently used first.
+        self._structures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, tagger):
+        """
+        Return a copy of the cached structure with id ``key``, or None if it isn't cached.
+        """
+        with self._lock:
+            entry = self._structures.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._structures.move_to_end(key)
+            self._measure(tagger)
+
+        tagger.tag(from_process_cache=str(entry is not None).lower())
+        if entry is None:
+            return None
+        return _copy_structure(entry[0])
+
+    def set(self, key, structure, tagger, size=None):
+        """
+        Cache a copy of ``structure`` as the structure with id ``key``.
+
+        ``size`` is the pickled size of the structure, if it is already known.
+        """
+        if size is None:
+            size = len(pickle.dumps(structure, 4))
+        tagger.measure('process_cache_structure_size', size)
+        if size > self.max_size:
+            return
+
+        structure = _copy_structure(structure)
+        with self._lock:
+            if key in self._structures:
+                self.size -= self._structures.pop(key)[1]
+            self._structures[key] = (structure, size)
+            self.size += size
+
+            while self.size > self.max_size:
+                __, (__, evicted_size) = self._structures.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+            self._measure(tagger)
+
+    def _measure(self, tagger):
+        """
+        Record this worker's cache statistics on ``tagger``.
+        """
+        tagger.measure('process_cache_size', self.size)
+        tagger.measure('process_cache_structures', len(self._structures))
+        tagger.measure('process_cache_hits', self.hits)
+        tagger.measure('process_cache_misses', self.misses)
+        tagger.measure('process_cache_evictions', self.evictions)
 
 
 class MongoConnection(object):
@@ -273,11 +459,23 @@ class MongoConnection(object):
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_snapshot_interval=None,
+        decoded_structure_cache_size=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        If ``structure_snapshot_interval`` is set, new structures are stored as the blocks which
+        changed since their previous version, and every ``structure_snapshot_interval``-th
+        structure in a chain of versions is stored in full.
+
+        If ``decoded_structure_cache_size`` is set, up to that many bytes of decoded structures
+        are kept in a cache local to this process.
         """
+        self.structure_snapshot_interval = structure_snapshot_interval
+        self.decoded_structure_cache = None
+        if decoded_structure_cache_size:
+            self.decoded_structure_cache = DecodedStructureCache(decoded_structure_cache_size)
         # Set a write concern of 1, which makes writes complete successfully to the primary
         # only before returning. Also makes pymongo report write errors.
         kwargs['w'] = 1
@@ -307,12 +505,18 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key.
 
-        This method will use a cached version of the structure if it is available.
+        This method will use a cached version of the structure if it is available, either
+        in this process or in the course structure cache.
         """
         with TIMER.timer("get_structure", course_context) as tagger_get_structure:
+            if self.decoded_structure_cache is not None:
+                structure = self.decoded_structure_cache.get(key, tagger_get_structure)
+                if structure is not None:
+                    return structure
+
             cache = CourseStructureCache()
 
-            structure = cache.get(key, course_context)
+            structure, size = cache.get_with_size(key, course_context)
             tagger_get_structure.tag(from_cache=str(bool(structure)).lower())
             if not structure:
                 # Always log cache misses, because they are unexpected
@@ -326,11 +530,15 @@ class MongoConnection(object):
                             six.text_type(key)
                         )
                         return None
+                    doc = self._expand_structure_deltas([doc])[0]
                     tagger_find_one.measure("blocks", len(doc['blocks']))
                     structure = structure_from_mongo(doc, course_context)
                     tagger_find_one.sample_rate = 1
 
-                cache.set(key, structure, course_context)
+                size = cache.set(key, structure, course_context)
+
+            if self.decoded_structure_cache is not None:
+                self.decoded_structure_cache.set(key, structure, tagger_get_structure, size)
 
             return structure
 
@@ -346,7 +554,7 @@ class MongoConnection(object):
             tagger.measure("requested_ids", len(ids))
             docs = [
                 structure_from_mongo(structure, course_context)
-                for structure in self.structures.find({'_id': {'$in': ids}})
+                for structure in self._expand_structure_deltas(self.structures.find({'_id': {'$in': ids}}))
             ]
             tagger.measure("structures", len(docs))
             return docs
@@ -384,7 +592,7 @@ class MongoConnection(object):
             tagger.measure("base_ids", len(ids))
             docs = [
                 structure_from_mongo(structure, course_context)
-                for structure in self.structures.find({'previous_version': {'$in': ids}})
+                for structure in self._expand_structure_deltas(self.structures.find({'previous_version': {'$in': ids}}))
             ]
             tagger.measure("structures", len(docs))
             return docs
@@ -401,7 +609,7 @@ class MongoConnection(object):
         with TIMER.timer("find_ancestor_structures", course_context) as tagger:
             docs = [
                 structure_from_mongo(structure, course_context)
-                for structure in self.structures.find({
+                for structure in self._expand_structure_deltas(self.structures.find({
                     'original_version': original_version,
                     'blocks': {
                         '$elemMatch': {
@@ -412,7 +620,7 @@ class MongoConnection(object):
                             },
                         },
                     },
-                })
+                }))
             ]
             tagger.measure("structures", len(docs))
             return docs
@@ -423,7 +631,102 @@ class MongoConnection(object):
         """
         with TIMER.timer("insert_structure", course_context) as tagger:
             tagger.measure("blocks", len(structure["blocks"]))
-            self.structures.insert_one(structure_to_mongo(structure, course_context))
+            doc = structure_to_mongo(structure, course_context)
+            if self.structure_snapshot_interval:
+                block_hashes = {_block_storage_key(block): _block_hash(block) for block in doc['blocks']}
+                delta_doc = self._structure_delta(doc, block_hashes, course_context)
+                tagger.tag(delta=str(delta_doc is not None).lower())
+                if delta_doc is not None:
+                    tagger.measure("delta_blocks", len(delta_doc['delta']['blocks']))
+                    doc = delta_doc
+            self.structures.insert_one(doc)
+            if self.structure_snapshot_interval:
+                CourseStructureCache().set_block_hashes(doc['_id'], block_hashes)
+
+    def _structure_delta(self, doc, block_hashes, course_context=None):
+        """
+        Return the mongo document storing the structure ``doc`` as the blocks which changed
+        since its previous version, or None if the structure should be stored in full.
+
+        ``block_hashes`` are the digests of the blocks of ``doc``, which are compared with
+        those of its previous version.
+        """
+        base_id = doc.get('previous_version')
+        if base_id is None:
+            return None
+
+        base_doc = self.structures.find_one({'_id': base_id}, {'delta.chain': 1})
+        if base_doc is None:
+            # The previous version was never saved, e.g. it was only used within a bulk operation.
+            return None
+
+        chain = base_doc.get('delta', {}).get('chain', []) + [base_id]
+        if len(chain) >= self.structure_snapshot_interval:
+            return None
+
+        root = tuple(doc['root'])
+        base_hashes = dict(self._get_block_hashes(base_id, course_context))
+        changed_blocks = []
+        for block in doc['blocks']:
+            block_key = _block_storage_key(block)
+            if base_hashes.pop(block_key, None) != block_hashes[block_key] and block_key != root:
+                changed_blocks.append(block)
+        if len(changed_blocks) * 2 > len(doc['blocks']):
+            # Most of the structure changed, so a delta wouldn't save much.
+            return None
+
+        # The root block is always stored in full, and the other blocks only by the fields
+        # structures are queried on, so that mongo can match delta-encoded structures.
+        delta_doc = {key: value for key, value in six.iteritems(doc) if key != 'blocks'}
+        delta_doc['blocks'] = [
+            block if _block_storage_key(block) == root else _block_query_fields(block)
+            for block in doc['blocks']
+        ]
+        delta_doc['delta'] = {
+            'chain': chain,
+            'blocks': changed_blocks,
+            'removed': [list(block_key) for block_key in base_hashes],
+        }
+        return delta_doc
+
+    def _get_block_hashes(self, structure_id, course_context=None):
+        """
+        Return the digests of the blocks of the structure with id ``structure_id``, from the
+        course structure cache if possible, or else from the structure itself.
+        """
+        cache = CourseStructureCache()
+        block_hashes = cache.get_block_hashes(structure_id)
+        if block_hashes is None:
+            structure = structure_to_mongo(self.get_structure(structure_id, course_context), course_context)
+            block_hashes = {_block_storage_key(block): _block_hash(block) for block in structure['blocks']}
+            cache.set_block_hashes(structure_id, block_hashes)
+        return block_hashes
+
+    def _expand_structure_deltas(self, docs):
+        """
+        Rebuild the full mongo documents of any delta-encoded structures in ``docs``,
+        fetching all of the structures their deltas are based on in a single query.
+
+        Raises MissingStructureDeltaBaseError if any of those structures is missing.
+        """
+        docs = list(docs)
+        chain_ids = set()
+        for doc in docs:
+            if 'delta' in doc:
+                chain_ids.update(doc['delta']['chain'])
+        if not chain_ids:
+            return docs
+
+        chain_docs = {base['_id']: base for base in self.structures.find({'_id': {'$in': list(chain_ids)}})}
+        expanded_docs = []
+        for doc in docs:
+            if 'delta' in doc:
+                missing_ids = [_id for _id in doc['delta']['chain'] if _id not in chain_docs]
+                if missing_ids:
+                    raise MissingStructureDeltaBaseError(doc['_id'], missing_ids[0])
+                doc = _apply_structure_deltas(doc, [chain_docs[_id] for _id in doc['delta']['chain']])
+            expanded_docs.append(doc)
+        return expanded_docs
 
     def get_course_index(self, key, ignore_case=False):
         """
@@ -105,6 +105,7 @@ from xmodule.modulestore.exceptions import (
 )
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.modulestore.split_mongo.mongo_connection import DuplicateKeyError, MongoConnection
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.partitions.partitions_service import PartitionService
 
@@ -713,9 +714,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None, definition_prefetch_batch_size=None, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param definition_prefetch_batch_size: if set, lazily loaded definitions which are likely to be
+            needed are fetched together, up to this many in one query.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
@@ -745,6 +748,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             self.services["request_cache"] = self.request_cache
 
         self.signal_handler = signal_handler
+        self.definition_prefetch_batch_size = definition_prefetch_batch_size
 
     def close_connections(self):
         """
@@ -812,6 +816,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                         # convert_fields gets done later in the runtime's xblock_from_json
                         block.fields.update(definition.get('fields'))
                         block.definition_loaded = True
+            elif depth != 0:
+                # Lazy loading of a subtree: fetch the definitions its blocks will need
+                # together, when the first of them is needed.
+                system.plan_definition_prefetch(six.itervalues(new_module_data))
 
             system.module_data.update(new_module_data)
             return system.module_data
@@ -872,8 +880,25 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 del self.request_cache.data.setdefault('course_cache', {})[course_version_guid]
             except KeyError:
                 pass
+            self.request_cache.data.setdefault('structure_index_cache', {}).pop(course_version_guid, None)
         else:
             self.request_cache.data['course_cache'] = {}
+            self.request_cache.data['structure_index_cache'] = {}
+
+    def _get_structure_index(self, course_entry):
+        """
+        Return the StructureIndex of the structure of this course entry, which is cached
+        alongside the course cache of the structure's version.
+        """
+        structure = course_entry.structure
+        if self.request_cache is None:
+            return StructureIndex(structure)
+
+        index_cache = self.request_cache.data.setdefault('structure_index_cache', {})
+        index = index_cache.get(structure['_id'])
+        if index is None:
+            index = index_cache[structure['_id']] = StructureIndex(structure)
+        return index
 
     def _lookup_course(self, course_key, head_validation=True):
         """
@@ -1266,6 +1291,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return []
 
         course = self._lookup_course(course_locator)
+        structure_index = self._get_structure_index(course)
         items = []
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
 
@@ -1289,20 +1315,22 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
-            block_ids = []
-            for block_id, block in six.iteritems(course.structure['blocks']):
-                # Don't do an in comparison blindly; first check to make sure
-                # that the name qualifier we're looking at isn't a plain string;
-                # if it is a string, then it should match exactly. If it's other
-                # than a string, we check whether it contains the block ID; this
-                # is so a list or other iterable can be passed with multiple
-                # valid qualifiers.
-                if isinstance(block_name, six.string_types):
-                    name_matches = block_id.id == block_name
-                else:
-                    name_matches = block_id.id in block_name
-                if name_matches and _block_matches_all(block):
-                    block_ids.append(block_id)
+            # Don't do an in comparison blindly; first check to make sure
+            # that the name qualifier we're looking at isn't a plain string;
+            # if it is a string, then it should match exactly. If it's other
+            # than a string, we look up each of the block IDs it contains; this
+            # is so a list or other iterable can be passed with multiple
+            # valid qualifiers.
+            if isinstance(block_name, six.string_types):
+                block_names = [block_name]
+            else:
+                block_names = set(block_name)
+            block_ids = [
+                block_id
+                for name in block_names
+                for block_id in structure_index.blocks_by_id.get(name, [])
+                if _block_matches_all(course.structure['blocks'][block_id])
+            ]
 
             return self._load_items(course, block_ids, **kwargs)
 
@@ -1313,20 +1341,14 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
 
-        # No need of these caches unless include_orphans is set to False
-        path_cache = None
-        parents_cache = None
-
-        if not include_orphans:
-            path_cache = {}
-            parents_cache = self.build_block_key_to_parents_mapping(course.structure)
-
-        for block_id, value in six.iteritems(course.structure['blocks']):
-            if _block_matches_all(value):
+        for block_id in structure_index.candidates(qualifiers, settings):
+            if _block_matches_all(course.structure['blocks'][block_id]):
                 if not include_orphans:
                     if (  # pylint: disable=bad-continuation
                         block_id.type in DETACHED_XBLOCK_TYPES or
-                        self.has_path_to_root(block_id, course, path_cache, parents_cache)
+                        self.has_path_to_root(
+                            block_id, course, structure_index.paths_to_root, structure_index.parents,
+                        )
                     ):
                         items.append(block_id)
                 else:
@@ -1405,14 +1427,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        structure_index = self._get_structure_index(course)
+        all_parent_ids = structure_index.parents.get(BlockKey.from_usage_key(locator), [])
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
         parent_ids = [
             valid_parent
             for valid_parent in all_parent_ids
-            if self.has_path_to_root(valid_parent, course)
+            if self.has_path_to_root(valid_parent, course, structure_index.paths_to_root, structure_index.parents)
         ]
 
         if len(parent_ids) == 0:
@@ -1436,16 +1459,13 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         detached_categories = [name for name, __ in XBlock.load_tagged_classes("detached")]
         course = self._lookup_course(course_key)
-        items = set(course.structure['blocks'].keys())
-        items.remove(course.structure['root'])
-        blocks = course.structure['blocks']
-        for block_id, block_data in six.iteritems(blocks):
-            items.difference_update(BlockKey(*child) for child in block_data.fields.get('children', []))
-            if block_data.block_type in detached_categories:
-                items.discard(block_id)
+        parents = self._get_structure_index(course).parents
         return [
             course_key.make_usage_key(block_type=block_id.type, block_id=block_id.id)
-            for block_id in items
+            for block_id in course.structure['blocks']
+            if block_id != course.structure['root'] and
+            not parents.get(block_id) and
+            block_id.type not in detached_categories
         ]
 
     def get_course_index_info(self, course_key):
@@ -3459,6 +3479,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             select=self.xblock_select,
             disabled_xblock_types=self.disabled_xblock_types,
             services=services,
+            definition_prefetch_batch_size=self.definition_prefetch_batch_size,
         )
 
     def ensure_indexes(self):
@@ -0,0 +1,104 @@
+"""
+Secondary indexes over the blocks of a split modulestore structure.
+"""
+
+
+from collections import defaultdict
+
+import six
+
+from xmodule.modulestore.split_mongo import BlockKey
+
+
+class StructureIndex(object):
+    """
+    Indexes of the blocks in a structure by block type, by block id, by parent and by the
+    settings fields which are set on them. Each index is built the first time it's needed.
+
+    The structure must not change while the index is in use, so an index should only be
+    cached for as long as the course cache of the structure's version.
+    """
+    def __init__(self, structure):
+        self.structure = structure
+        self._blocks_by_type = None
+        self._blocks_by_id = None
+        self._blocks_by_field = {}
+        self._parents = None
+        # Maps BlockKeys to whether they have a path to the root of the structure.
+        self.paths_to_root = {}
+
+    @property
+    def blocks_by_type(self):
+        """
+        A dict of block types to the keys of the blocks of that type, in structure order.
+        """
+        if self._blocks_by_type is None:
+            self._blocks_by_type = defaultdict(list)
+            for block_key in self.structure['blocks']:
+                self._blocks_by_type[block_key.type].append(block_key)
+        return self._blocks_by_type
+
+    @property
+    def blocks_by_id(self):
+        """
+        A dict of block ids to the keys of the blocks with that id.
+        """
+        if self._blocks_by_id is None:
+            self._blocks_by_id = defaultdict(list)
+            for block_key in self.structure['blocks']:
+                self._blocks_by_id[block_key.id].append(block_key)
+        return self._blocks_by_id
+
+    @property
+    def parents(self):
+        """
+        A dict of block keys to the keys of their parents, as built by
+        SplitMongoModuleStore.build_block_key_to_parents_mapping.
+        """
+        if self._parents is None:
+            self._parents = defaultdict(list)
+            for parent_key, block_data in six.iteritems(self.structure['blocks']):
+                for child_key in block_data.fields.get('children', []):
+                    self._parents[child_key].append(parent_key)
+        return self._parents
+
+    def blocks_with_field(self, field_name):
+        """
+        Return the keys of the blocks which have the settings field ``field_name`` set, in structure order.
+        """
+        if field_name not in self._blocks_by_field:
+            self._blocks_by_field[field_name] = [
+                block_key
+                for block_key, block_data in six.iteritems(self.structure['blocks'])
+                if field_name in block_data.fields
+            ]
+        return self._blocks_by_field[field_name]
+
+    def candidates(self, qualifiers, settings):
+        """
+        Return the keys of the blocks which may match the get_items ``qualifiers`` and
+        ``settings``, in structure order. Every matching block is included, but the
+        caller still needs to check each candidate against the criteria.
+        """
+        candidate_lists = []
+        block_type = qualifiers.get('block_type')
+        if isinstance(block_type, six.string_types):
+            candidate_lists.append(self.blocks_by_type.get(block_type, []))
+
+        for field_name, criteria in six.iteritems(settings):
+            if field_name == 'children' and isinstance(criteria, BlockKey):
+                candidate_lists.append(self.parents.get(criteria, []))
+            elif not (isinstance(criteria, dict) and '$exists' in criteria and not criteria['$exists']):
+                # Only blocks with the field set can match anything but {'$exists': False}.
+                candidate_lists.append(self.blocks_with_field(field_name))
+
+        if not candidate_lists:
+            return list(self.structure['blocks'])
+
+        candidate_lists.sort(key=len)
+        other_candidates = [set(candidate_list) for candidate_list in candidate_lists[1:]]
+        return [
+            block_key
+            for block_key in candidate_lists[0]
+            if all(block_key in candidate_set for candidate_set in other_candidates)
+        ]
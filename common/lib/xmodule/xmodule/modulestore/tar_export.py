@@ -0,0 +1,160 @@
+"""
+A write-only filesystem which streams the files written to it into a tar archive.
+"""
+
+
+import io
+import tarfile
+import time
+from tempfile import SpooledTemporaryFile
+
+from fs import errors
+from fs.base import FS
+from fs.info import Info
+from fs.mode import Mode
+from fs.path import basename, dirname, relpath
+
+# Files up to this size are buffered in memory until they are added to the archive,
+# larger files are buffered in a temporary file.
+MAX_IN_MEMORY_FILE_SIZE = 1024 * 1024
+
+
+class TarExportFS(FS):
+    """
+    A pyfilesystem which adds every file written to it to a tar archive as soon as the
+    file is closed, so that an export can be streamed into ``fileobj`` while it is still
+    being written, without first writing the whole export to disk. ``fileobj`` doesn't
+    need to be seekable, and the archive is compressed with ``compression``.
+
+    The filesystem is write-only: files can't be read back or removed once they have been
+    streamed into the archive. Writing to a file a second time adds a second member with
+    the same name to the archive, which replaces the first one when the archive is
+    extracted.
+
+    The archive is complete once the filesystem is closed.
+    """
+    _meta = {
+        'case_insensitive': False,
+        'invalid_path_chars': '\0',
+        'network': False,
+        'read_only': False,
+        'thread_safe': True,
+        'unicode_paths': True,
+        'virtual': True,
+    }
+
+    def __init__(self, fileobj, compression='gz'):
+        super(TarExportFS, self).__init__()
+        self._tar = tarfile.open(fileobj=fileobj, mode='w|' + compression)
+        # Maps the paths written so far to whether they are directories.
+        self._entries = {u'/': True}
+
+    def __repr__(self):
+        return u'TarExportFS({!r})'.format(self._tar.fileobj)
+
+    def getinfo(self, path, namespaces=None):
+        _path = self.validatepath(path)
+        with self._lock:
+            if _path not in self._entries:
+                raise errors.ResourceNotFound(path)
+            return Info({'basic': {'name': basename(_path), 'is_dir': self._entries[_path]}})
+
+    def listdir(self, path):
+        _path = self.validatepath(path)
+        with self._lock:
+            if _path not in self._entries:
+                raise errors.ResourceNotFound(path)
+            if not self._entries[_path]:
+                raise errors.DirectoryExpected(path)
+            return [basename(entry) for entry in self._entries if entry != u'/' and dirname(entry) == _path]
+
+    def makedir(self, path, permissions=None, recreate=False):
+        _path = self.validatepath(path)
+        with self._lock:
+            if _path in self._entries:
+                if recreate and self._entries[_path]:
+                    return self.opendir(_path)
+                raise errors.DirectoryExists(path)
+            if not self._entries.get(dirname(_path)):
+                raise errors.ResourceNotFound(path)
+            self._add_member(_path, tarfile.DIRTYPE, 0o755)
+            self._entries[_path] = True
+        return self.opendir(_path)
+
+    def openbin(self, path, mode='r', buffering=-1, **options):
+        _mode = Mode(mode)
+        _mode.validate_bin()
+        _path = self.validatepath(path)
+        if _mode.reading or _mode.appending:
+            # The contents of the file have already been streamed into the archive.
+            raise errors.Unsupported(path)
+        with self._lock:
+            if self._entries.get(_path):
+                raise errors.FileExpected(path)
+            if _mode.exclusive and _path in self._entries:
+                raise errors.FileExists(path)
+            if not self._entries.get(dirname(_path)):
+                raise errors.ResourceNotFound(path)
+            self._entries[_path] = False
+        return _TarMemberFile(self, _path, mode)
+
+    def remove(self, path):
+        raise errors.Unsupported(path)
+
+    def removedir(self, path):
+        raise errors.Unsupported(path)
+
+    def setinfo(self, path, info):
+        self.getinfo(path)
+
+    def close(self):
+        if not self.isclosed():
+            self._tar.close()
+        super(TarExportFS, self).close()
+
+    def add_file(self, path, fileobj):
+        """
+        Add the whole contents of the seekable file ``fileobj`` to the archive as ``path``.
+        """
+        fileobj.seek(0, io.SEEK_END)
+        size = fileobj.tell()
+        fileobj.seek(0)
+        with self._lock:
+            self._add_member(path, tarfile.REGTYPE, 0o644, fileobj, size)
+
+    def _add_member(self, path, member_type, mode, fileobj=None, size=0):
+        """
+        Add a member to the archive. The caller must hold the filesystem's lock.
+        """
+        tarinfo = tarfile.TarInfo(relpath(path))
+        tarinfo.type = member_type
+        tarinfo.mode = mode
+        tarinfo.mtime = time.time()
+        tarinfo.size = size
+        self._tar.addfile(tarinfo, fileobj)
+
+
+class _TarMemberFile(io.RawIOBase):
+    """
+    A file being written to a TarExportFS, which is added to the archive when it is closed.
+    """
+    def __init__(self, tar_fs, path, mode):
+        super(_TarMemberFile, self).__init__()
+        self.name = path
+        self.mode = mode
+        self._tar_fs = tar_fs
+        self._buffer = SpooledTemporaryFile(max_size=MAX_IN_MEMORY_FILE_SIZE)
+
+    def writable(self):
+        return True
+
+    def write(self, data):  # pylint: disable=arguments-differ
+        return self._buffer.write(data)
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._tar_fs.add_file(self.name, self._buffer)
+            finally:
+                self._buffer.close()
+        super(_TarMemberFile, self).close()
@@ -12,6 +12,7 @@ from uuid import uuid4
 
 import ddt
 import path
+import six
 from opaque_keys.edx.keys import AssetKey
 from opaque_keys.edx.locator import AssetLocator, CourseLocator
 
@@ -211,6 +212,136 @@ class TestContentstore(unittest.TestCase):
         __, count = self.contentstore.get_all_content_for_course(dest_course)
         self.assertEqual(count, 5)
 
+    @ddt.data(True, False)
+    def test_copy_assets_skips_unchanged(self, deprecated):
+        """
+        Copying assets again only rewrites the ones which changed
+        """
+        self.set_up_assets(deprecated)
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        upload_dates = {
+            six.text_type(asset['asset_key']): asset['uploadDate']
+            for asset in self.contentstore.get_all_content_for_course(dest_course)[0]
+        }
+
+        changed_key = self.course1_key.make_asset_key('asset', self.course1_files[0])
+        self.contentstore.set_attr(changed_key, 'locked', True)
+        self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+
+        for asset in self.contentstore.get_all_content_for_course(dest_course)[0]:
+            if asset['asset_key'].block_id == changed_key.block_id:
+                self.assertNotEqual(asset['uploadDate'], upload_dates[six.text_type(asset['asset_key'])])
+                self.assertTrue(asset['locked'])
+            else:
+                self.assertEqual(asset['uploadDate'], upload_dates[six.text_type(asset['asset_key'])])
+
+    @ddt.data(True, False)
+    def test_save_many(self, deprecated):
+        """
+        Test saving many assets at once, skipping the unchanged ones
+        """
+        self.set_up_assets(deprecated)
+        contents = [
+            StaticContent(self.course1_key.make_asset_key('asset', filename), filename, 'text/plain', data)
+            for filename, data in [('new.txt', b'new' * 100000), ('empty.txt', b''), ('other.txt', u'other')]
+        ]
+        self.assertEqual(self.contentstore.save_many(contents), contents)
+        for content, data in zip(contents, [b'new' * 100000, b'', b'other']):
+            found = self.contentstore.find(content.location)
+            self.assertEqual(found.data, data)
+            self.assertEqual(found.name, content.name)
+
+        contents[1].data = b'changed'
+        self.assertEqual(self.contentstore.save_many(contents), [contents[1]])
+        self.assertEqual(self.contentstore.find(contents[1].location).data, b'changed')
+        __, count = self.contentstore.get_all_content_for_course(self.course1_key)
+        self.assertEqual(count, len(self.course1_files) + len(contents))
+
+    @ddt.data(True, False)
+    def test_content_addressed(self, deprecated):
+        """
+        Test sharing the data of assets with the same content, and deleting it with the last of them
+        """
+        self.set_up_assets(deprecated)
+        self.contentstore.content_addressed = True
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        asset_key = self.course1_key.make_asset_key('asset', 'shared.txt')
+        self.contentstore.save(StaticContent(asset_key, 'shared.txt', 'text/plain', b'shared'))
+        self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+
+        dest_key = dest_course.make_asset_key('asset', 'shared.txt')
+        self.assertEqual(self.contentstore.find(dest_key).data, b'shared')
+        blob = self.contentstore.blob_files.find_one({'length': len(b'shared')})
+        self.assertEqual(blob['refcount'], 2)
+        dest_id, __ = self.contentstore.asset_db_key(dest_key)
+        self.assertEqual(self.contentstore.chunks.count_documents({'files_id': dest_id}), 0)
+
+        self.contentstore.delete(asset_key)
+        self.assertEqual(b''.join(self.contentstore.find(dest_key, as_stream=True).stream_data()), b'shared')
+        self.contentstore.save(StaticContent(dest_key, 'shared.txt', 'text/plain', b'changed'))
+        self.assertIsNone(self.contentstore.blob_files.find_one({'_id': blob['_id']}))
+        self.assertEqual(self.contentstore.blob_chunks.count_documents({'files_id': blob['_id']}), 0)
+
+    @ddt.data(True, False)
+    def test_convert_to_content_addressed(self, deprecated):
+        """
+        Test converting existing assets to content-addressed storage
+        """
+        self.set_up_assets(deprecated)
+        asset_files = self.course1_files + self.course2_files
+        self.assertEqual(self.contentstore.convert_to_content_addressed(), len(asset_files))
+        self.assertEqual(self.contentstore.convert_to_content_addressed(), 0)
+        self.assertEqual(self.contentstore.chunks.count_documents({}), 0)
+
+        for course_key, files in [(self.course1_key, self.course1_files), (self.course2_key, self.course2_files)]:
+            for filename in files:
+                with open("{}/static/{}".format(DATA_DIR, filename), "rb") as f:
+                    data = f.read()
+                self.assertEqual(self.contentstore.find(course_key.make_asset_key('asset', filename)).data, data)
+
+        # Both courses have picture1.jpg.
+        stats = self.contentstore.get_storage_stats()
+        shared_length = self.contentstore.find(self.course1_key.make_asset_key('asset', 'picture1.jpg')).length
+        self.assertEqual(stats['asset_bytes'] - stats['stored_bytes'], shared_length)
+
+    @ddt.data(True, False)
+    def test_remove_redundant_content_addressed(self, deprecated):
+        """
+        Test that removing redundant assets releases the content-addressed blobs they refer to
+        """
+        self.set_up_assets(deprecated)
+        self.contentstore.content_addressed = True
+        for filename in ['._shared.txt', '.DS_Store']:
+            asset_key = self.course1_key.make_asset_key('asset', filename)
+            self.contentstore.save(StaticContent(asset_key, filename, 'text/plain', b'shared'))
+        asset_key = self.course2_key.make_asset_key('asset', 'shared.txt')
+        self.contentstore.save(StaticContent(asset_key, 'shared.txt', 'text/plain', b'shared'))
+
+        self.assertEqual(self.contentstore.remove_redundant_content_for_courses(), 2)
+        blob = self.contentstore.blob_files.find_one({'length': len(b'shared')})
+        self.assertEqual(blob['refcount'], 1)
+        self.contentstore.delete(asset_key)
+        self.assertIsNone(self.contentstore.blob_files.find_one({'_id': blob['_id']}))
+        self.assertEqual(self.contentstore.blob_chunks.count_documents({'files_id': blob['_id']}), 0)
+
+    @ddt.data(True, False)
+    def test_release_deleted_blob(self, deprecated):
+        """
+        Test that a blob being deleted is neither deleted twice nor referenced again
+        """
+        self.set_up_assets(deprecated)
+        self.contentstore.content_addressed = True
+        asset_key = self.course1_key.make_asset_key('asset', 'shared.txt')
+        self.contentstore.save(StaticContent(asset_key, 'shared.txt', 'text/plain', b'shared'))
+        blob = self.contentstore.blob_files.find_one({'length': len(b'shared')})
+        self.contentstore.blob_files.update_one({'_id': blob['_id']}, {'$set': {'refcount': 0, 'deleted': True}})
+
+        self.contentstore._release_blob(blob['_id'])  # pylint: disable=protected-access
+        self.assertEqual(self.contentstore.blob_chunks.count_documents({'files_id': blob['_id']}), 1)
+        with self.assertRaises(NotFoundError):
+            self.contentstore._add_blob_references(blob['_id'], 1, None)  # pylint: disable=protected-access
+
     @ddt.data(True, False)
     def test_delete_assets(self, deprecated):
         """
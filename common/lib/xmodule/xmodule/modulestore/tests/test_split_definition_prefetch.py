@@ -0,0 +1,54 @@
+"""
+Tests for batching the lazy loading of definitions in split's CachingDescriptorSystem.
+"""
+
+
+import copy
+
+import ddt
+from mock import patch
+from six.moves import range
+
+from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.utils import MixedSplitTestCase
+
+
+@ddt.ddt
+class TestDefinitionPrefetch(MixedSplitTestCase):
+    """
+    Test fetching the definitions of a subtree's blocks together.
+    """
+    MIXED_OPTIONS = copy.deepcopy(MixedSplitTestCase.MIXED_OPTIONS)
+    MIXED_OPTIONS['stores'][0]['OPTIONS'] = dict(
+        MIXED_OPTIONS['stores'][0]['OPTIONS'], definition_prefetch_batch_size=None,
+    )
+
+    def setUp(self):
+        super(TestDefinitionPrefetch, self).setUp()
+        course = CourseFactory.create(modulestore=self.store)
+        self.vertical = self.make_block('vertical', course)
+        for index in range(3):
+            self.make_block('html', self.vertical, data=u'<p>HTML {}</p>'.format(index))
+        self.split_store = self.store._get_modulestore_for_courselike(course.id)  # pylint: disable=protected-access
+
+    @ddt.data(
+        (None, 3, 0),
+        (2, 1, 1),
+        (3, 0, 1),
+    )
+    @ddt.unpack
+    def test_prefetch(self, batch_size, num_single_fetches, num_batch_fetches):
+        self.split_store.definition_prefetch_batch_size = batch_size
+        self.split_store._clear_cache()  # pylint: disable=protected-access
+        vertical = self.store.get_item(self.vertical.location, depth=1)
+
+        with patch.object(
+            self.split_store, 'get_definition', wraps=self.split_store.get_definition,
+        ) as mock_get_definition, patch.object(
+            self.split_store, 'get_definitions', wraps=self.split_store.get_definitions,
+        ) as mock_get_definitions:
+            data = [child.data for child in vertical.get_children()]
+
+        self.assertEqual(data, [u'<p>HTML {}</p>'.format(index) for index in range(3)])
+        self.assertEqual(mock_get_definition.call_count, num_single_fetches)
+        self.assertEqual(mock_get_definitions.call_count, num_batch_fetches)
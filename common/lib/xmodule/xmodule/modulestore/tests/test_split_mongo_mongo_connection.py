@@ -1,13 +1,22 @@
 """ Test the behavior of split_mongo/MongoConnection """
 
 
+import copy
+import os
 import unittest
 
+from bson.objectid import ObjectId
 from mock import patch
 from pymongo.errors import ConnectionFailure
+from six.moves import cPickle as pickle
+from six.moves import range
 
 from xmodule.exceptions import HeartbeatFailure
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.exceptions import MissingStructureDeltaBaseError
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import DecodedStructureCache, MongoConnection, Tagger
+from xmodule.modulestore.tests.mongo_connection import MONGO_HOST, MONGO_PORT_NUM
 
 
 class TestHeartbeatFailureException(unittest.TestCase):
@@ -23,3 +32,266 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
             with self.assertRaises(HeartbeatFailure):
                 useless_conn.heartbeat()
+
+
+def make_structure(num_blocks, previous_version=None):
+    """
+    Return a structure of a course with ``num_blocks`` problems, as a new version of ``previous_version``.
+    """
+    structure_id = ObjectId()
+    root = BlockKey('course', 'course')
+    blocks = {
+        BlockKey('problem', 'problem{}'.format(index)): BlockData(
+            block_type='problem',
+            definition=ObjectId(),
+            fields={'display_name': 'Problem {}'.format(index)},
+            edit_info={'update_version': structure_id},
+        )
+        for index in range(num_blocks)
+    }
+    blocks[root] = BlockData(
+        block_type='course',
+        definition=ObjectId(),
+        fields={'children': sorted(blocks)},
+        edit_info={'update_version': structure_id},
+    )
+    return {
+        '_id': structure_id,
+        'root': root,
+        'previous_version': previous_version,
+        'original_version': structure_id,
+        'edited_by': 'test_user',
+        'edited_on': None,
+        'schema_version': 1,
+        'blocks': blocks,
+    }
+
+
+def version_structure(structure):
+    """
+    Return a copy of ``structure`` as its next version, like SplitMongoModuleStore.version_structure.
+    """
+    new_structure = copy.deepcopy(structure)
+    new_structure['_id'] = ObjectId()
+    new_structure['previous_version'] = structure['_id']
+    return new_structure
+
+
+def edit_block(structure, block_key):
+    """
+    Change the display name of the block ``block_key`` in ``structure``.
+    """
+    block = structure['blocks'][block_key]
+    block.fields['display_name'] = 'Edited in {}'.format(structure['_id'])
+    block.edit_info.update_version = structure['_id']
+
+
+@patch('xmodule.modulestore.split_mongo.mongo_connection.CourseStructureCache.get_with_size', return_value=(None, None))
+class TestStructureDeltas(unittest.TestCase):
+    """ Test storing structures as deltas against their previous versions """
+
+    def setUp(self):
+        super(TestStructureDeltas, self).setUp()
+        self.connection = MongoConnection(
+            'test_structure_deltas_{}'.format(os.getpid()), 'modulestore', MONGO_HOST,
+            port=MONGO_PORT_NUM, structure_snapshot_interval=3,
+        )
+        self.addCleanup(self.connection._drop_database)  # pylint: disable=protected-access
+
+    def insert_versions(self, num_versions, num_blocks=10):
+        """
+        Insert ``num_versions`` versions of a structure, each of which edits one block.
+        """
+        structures = [make_structure(num_blocks)]
+        self.connection.insert_structure(structures[0])
+        for index in range(1, num_versions):
+            structure = version_structure(structures[-1])
+            edit_block(structure, BlockKey('problem', 'problem{}'.format(index % num_blocks)))
+            self.connection.insert_structure(structure)
+            structures.append(structure)
+        return structures
+
+    def is_delta(self, structure):
+        """
+        Return whether ``structure`` is stored as a delta.
+        """
+        return 'delta' in self.connection.structures.find_one({'_id': structure['_id']})
+
+    def test_snapshot_interval(self, _mock_cache_get):
+        structures = self.insert_versions(7)
+        self.assertEqual(
+            [self.is_delta(structure) for structure in structures],
+            [False, True, True, False, True, True, False],
+        )
+        delta_doc = self.connection.structures.find_one({'_id': structures[2]['_id']})
+        self.assertEqual(delta_doc['delta']['chain'], [structures[0]['_id'], structures[1]['_id']])
+        self.assertEqual([block['block_id'] for block in delta_doc['delta']['blocks']], ['problem2'])
+        # The root block is stored in full, and the other blocks only by the fields queries use.
+        stored_blocks = {block['block_id']: block for block in delta_doc['blocks']}
+        self.assertEqual(len(stored_blocks), 11)
+        self.assertIn('fields', stored_blocks['course'])
+        self.assertEqual(
+            stored_blocks['problem2'],
+            {'block_type': 'problem', 'block_id': 'problem2', 'edit_info': {'update_version': structures[2]['_id']}},
+        )
+
+    def test_get_structure(self, _mock_cache_get):
+        structures = self.insert_versions(5)
+        for structure in structures:
+            self.assertEqual(self.connection.get_structure(structure['_id']), structure)
+
+    def test_find_structures_by_id(self, _mock_cache_get):
+        structures = self.insert_versions(5)
+        found = self.connection.find_structures_by_id([structure['_id'] for structure in structures])
+        self.assertEqual(
+            sorted(found, key=lambda structure: structure['_id']),
+            sorted(structures, key=lambda structure: structure['_id']),
+        )
+
+    def test_removed_block(self, _mock_cache_get):
+        structure = make_structure(10)
+        self.connection.insert_structure(structure)
+        new_structure = version_structure(structure)
+        del new_structure['blocks'][BlockKey('problem', 'problem3')]
+        new_structure['blocks'][BlockKey('course', 'course')].fields['children'].remove(
+            BlockKey('problem', 'problem3')
+        )
+        self.connection.insert_structure(new_structure)
+
+        self.assertTrue(self.is_delta(new_structure))
+        self.assertEqual(self.connection.get_structure(new_structure['_id']), new_structure)
+
+    def test_unsaved_previous_version(self, _mock_cache_get):
+        structure = version_structure(make_structure(10))
+        self.connection.insert_structure(structure)
+        self.assertFalse(self.is_delta(structure))
+        self.assertEqual(self.connection.get_structure(structure['_id']), structure)
+
+    def test_mostly_changed_structure(self, _mock_cache_get):
+        structure = make_structure(4)
+        self.connection.insert_structure(structure)
+        new_structure = version_structure(structure)
+        for index in range(3):
+            edit_block(new_structure, BlockKey('problem', 'problem{}'.format(index)))
+        self.connection.insert_structure(new_structure)
+        self.assertFalse(self.is_delta(new_structure))
+
+    def test_find_ancestor_structures(self, _mock_cache_get):
+        structures = self.insert_versions(5)
+        ancestors = self.connection.find_ancestor_structures(
+            structures[0]['original_version'], BlockKey('problem', 'problem2'),
+        )
+        self.assertEqual(
+            sorted(ancestors, key=lambda structure: structure['_id']),
+            sorted(structures, key=lambda structure: structure['_id']),
+        )
+
+    def test_find_courselike_blocks_by_id(self, _mock_cache_get):
+        structures = self.insert_versions(3)
+        found = self.connection.find_courselike_blocks_by_id(
+            [structure['_id'] for structure in structures], 'course',
+        )
+        self.assertEqual(
+            sorted((structure['_id'], list(structure['blocks'])) for structure in found),
+            sorted((structure['_id'], [BlockKey('course', 'course')]) for structure in structures),
+        )
+
+    def test_base_structure_is_not_rebuilt(self, _mock_cache_get):
+        block_hashes = {}
+        with patch.multiple(
+            'xmodule.modulestore.split_mongo.mongo_connection.CourseStructureCache',
+            get_block_hashes=lambda cache, key: block_hashes.get(key),
+            set_block_hashes=lambda cache, key, value: block_hashes.__setitem__(key, value),
+        ):
+            with patch.object(self.connection, 'get_structure') as mock_get_structure:
+                structures = self.insert_versions(3)
+        # The blocks of each version are compared with the cached digests of its previous version.
+        self.assertFalse(mock_get_structure.called)
+        self.assertTrue(self.is_delta(structures[2]))
+        self.assertEqual(self.connection.find_structures_by_id([structures[2]['_id']]), [structures[2]])
+
+    def test_missing_base_structure(self, _mock_cache_get):
+        structures = self.insert_versions(3)
+        self.connection.structures.delete_one({'_id': structures[1]['_id']})
+        with self.assertRaises(MissingStructureDeltaBaseError) as context:
+            self.connection.find_structures_by_id([structures[2]['_id']])
+        self.assertIn(str(structures[1]['_id']), str(context.exception))
+
+
+class TestDecodedStructureCache(unittest.TestCase):
+    """ Test the process-local cache of decoded structures """
+
+    def setUp(self):
+        super(TestDecodedStructureCache, self).setUp()
+        self.tagger = Tagger(1)
+        self.structure_size = len(pickle.dumps(make_structure(10), 4))
+        self.cache = DecodedStructureCache(self.structure_size * 2)
+
+    def test_get(self):
+        structure = make_structure(10)
+        self.assertIsNone(self.cache.get(structure['_id'], self.tagger))
+        self.cache.set(structure['_id'], structure, self.tagger)
+
+        cached_structure = self.cache.get(structure['_id'], self.tagger)
+        self.assertEqual(cached_structure, structure)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertIn(('from_process_cache', 'true'), self.tagger.added_tags)
+
+    def test_cached_structure_is_isolated(self):
+        structure = make_structure(10)
+        self.cache.set(structure['_id'], structure, self.tagger)
+        root = BlockKey('course', 'course')
+
+        structure['blocks'][root].fields['display_name'] = 'Changed by the caller'
+        cached_structure = self.cache.get(structure['_id'], self.tagger)
+        cached_structure['blocks'][root].fields['display_name'] = 'Changed by a reader'
+        cached_structure['blocks'][root].definition_loaded = True
+
+        cached_structure = self.cache.get(structure['_id'], self.tagger)
+        self.assertNotIn('display_name', cached_structure['blocks'][root].fields)
+        self.assertFalse(cached_structure['blocks'][root].definition_loaded)
+
+    def test_eviction(self):
+        structures = [make_structure(10) for __ in range(3)]
+        self.cache.set(structures[0]['_id'], structures[0], self.tagger)
+        self.cache.set(structures[1]['_id'], structures[1], self.tagger)
+        # Using the first structure makes the second the least recently used.
+        self.cache.get(structures[0]['_id'], self.tagger)
+        self.cache.set(structures[2]['_id'], structures[2], self.tagger)
+
+        self.assertIsNotNone(self.cache.get(structures[0]['_id'], self.tagger))
+        self.assertIsNone(self.cache.get(structures[1]['_id'], self.tagger))
+        self.assertIsNotNone(self.cache.get(structures[2]['_id'], self.tagger))
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertLessEqual(self.cache.size, self.cache.max_size)
+
+    def test_known_size(self):
+        structure = make_structure(10)
+        with patch('xmodule.modulestore.split_mongo.mongo_connection.pickle.dumps') as mock_dumps:
+            self.cache.set(structure['_id'], structure, self.tagger, self.structure_size)
+        mock_dumps.assert_not_called()
+        self.assertEqual(self.cache.size, self.structure_size)
+
+    def test_structure_too_large(self):
+        structure = make_structure(100)
+        self.cache.set(structure['_id'], structure, self.tagger)
+        self.assertIsNone(self.cache.get(structure['_id'], self.tagger))
+        self.assertEqual(self.cache.size, 0)
+
+    @patch(
+        'xmodule.modulestore.split_mongo.mongo_connection.CourseStructureCache.get_with_size',
+        return_value=(None, None),
+    )
+    def test_get_structure(self, _mock_cache_get):
+        connection = MongoConnection(
+            'test_decoded_structure_cache_{}'.format(os.getpid()), 'modulestore', MONGO_HOST,
+            port=MONGO_PORT_NUM, decoded_structure_cache_size=self.structure_size * 2,
+        )
+        self.addCleanup(connection._drop_database)  # pylint: disable=protected-access
+        structure = make_structure(10)
+        connection.insert_structure(structure)
+
+        self.assertEqual(connection.get_structure(structure['_id']), structure)
+        with patch.object(connection.structures, 'find_one') as mock_find_one:
+            self.assertEqual(connection.get_structure(structure['_id']), structure)
+        mock_find_one.assert_not_called()
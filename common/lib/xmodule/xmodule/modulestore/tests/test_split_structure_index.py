@@ -0,0 +1,52 @@
+""" Test the secondary indexes of split modulestore structures """
+
+
+import re
+import unittest
+
+from six.moves import range
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex
+from xmodule.modulestore.tests.test_split_mongo_mongo_connection import make_structure
+
+
+class TestStructureIndex(unittest.TestCase):
+    """ Test StructureIndex """
+
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        self.structure = make_structure(10)
+        self.root = BlockKey('course', 'course')
+        self.problems = [BlockKey('problem', 'problem{}'.format(index)) for index in range(10)]
+        self.structure['blocks'][self.problems[3]].fields['group_access'] = {1: [1]}
+        self.structure['blocks'][self.problems[5]].fields['group_access'] = {}
+        self.index = StructureIndex(self.structure)
+
+    def test_blocks_by_type(self):
+        self.assertEqual(self.index.blocks_by_type['course'], [self.root])
+        self.assertEqual(sorted(self.index.blocks_by_type['problem']), sorted(self.problems))
+
+    def test_blocks_by_id(self):
+        self.assertEqual(self.index.blocks_by_id['problem4'], [self.problems[4]])
+        self.assertNotIn('missing', self.index.blocks_by_id)
+
+    def test_parents(self):
+        self.assertEqual(self.index.parents[self.problems[0]], [self.root])
+        self.assertEqual(self.index.parents.get(self.root, []), [])
+
+    def test_candidates_by_type(self):
+        self.assertEqual(sorted(self.index.candidates({'block_type': 'problem'}, {})), sorted(self.problems))
+        self.assertEqual(self.index.candidates({'block_type': 'video'}, {}), [])
+
+    def test_candidates_by_field(self):
+        self.assertEqual(
+            sorted(self.index.candidates({'block_type': 'problem'}, {'group_access': {'$exists': True}})),
+            [self.problems[3], self.problems[5]],
+        )
+        self.assertEqual(self.index.candidates({}, {'children': self.problems[2]}), [self.root])
+
+    def test_unindexed_criteria(self):
+        all_blocks = sorted(self.structure['blocks'])
+        self.assertEqual(sorted(self.index.candidates({'block_type': re.compile('prob')}, {})), all_blocks)
+        self.assertEqual(sorted(self.index.candidates({}, {'group_access': {'$exists': False}})), all_blocks)
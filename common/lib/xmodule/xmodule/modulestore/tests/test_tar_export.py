@@ -0,0 +1,86 @@
+"""
+Tests for streaming exports into tar archives.
+"""
+
+
+import tarfile
+import unittest
+from io import BytesIO
+
+from fs import errors
+
+from xmodule.modulestore.tar_export import MAX_IN_MEMORY_FILE_SIZE, TarExportFS
+
+
+class NonSeekableFile(BytesIO):
+    """
+    A file which, like a pipe or an HTTP response, can only be written to in order.
+    """
+    def seekable(self):
+        return False
+
+    def seek(self, *args):  # pylint: disable=arguments-differ
+        raise IOError('not seekable')
+
+    def tell(self):
+        raise IOError('not seekable')
+
+
+class TestTarExportFS(unittest.TestCase):
+    """
+    Test TarExportFS.
+    """
+    def setUp(self):
+        super(TestTarExportFS, self).setUp()
+        self.output = NonSeekableFile()
+        self.tar_fs = TarExportFS(self.output)
+        self.addCleanup(self.tar_fs.close)
+
+    def read_archive(self):
+        """
+        Return a dict of the names of the members of the archive to their contents,
+        which is None for directories.
+        """
+        with tarfile.open(fileobj=BytesIO(self.output.getvalue()), mode='r:gz') as tar_file:
+            return {
+                member.name: tar_file.extractfile(member).read() if member.isfile() else None
+                for member in tar_file.getmembers()
+            }
+
+    def test_export(self):
+        course_fs = self.tar_fs.makedir(u'course')
+        course_fs.makedirs(u'html/nested', recreate=True)
+        course_fs.makedir(u'policies', recreate=True)
+        course_fs.makedir(u'policies', recreate=True)
+        with course_fs.open(u'course.xml', 'wb') as course_xml:
+            course_xml.write(b'<course/>')
+        with course_fs.open(u'html/nested/large.html', 'w') as large_file:
+            large_file.write(u'x' * (MAX_IN_MEMORY_FILE_SIZE + 1))
+        self.assertEqual(sorted(course_fs.listdir(u'/')), [u'course.xml', u'html', u'policies'])
+        self.assertTrue(course_fs.isdir(u'html/nested'))
+        self.assertTrue(course_fs.isfile(u'course.xml'))
+        self.tar_fs.close()
+
+        self.assertEqual(self.read_archive(), {
+            u'course': None,
+            u'course/html': None,
+            u'course/html/nested': None,
+            u'course/policies': None,
+            u'course/course.xml': b'<course/>',
+            u'course/html/nested/large.html': b'x' * (MAX_IN_MEMORY_FILE_SIZE + 1),
+        })
+
+    def test_errors(self):
+        with self.tar_fs.open(u'course.xml', 'wb') as course_xml:
+            course_xml.write(b'<course/>')
+
+        with self.assertRaises(errors.Unsupported):
+            self.tar_fs.open(u'course.xml', 'rb')
+        with self.assertRaises(errors.Unsupported):
+            self.tar_fs.remove(u'course.xml')
+        with self.assertRaises(errors.ResourceNotFound):
+            self.tar_fs.open(u'missing/course.xml', 'wb')
+        with self.assertRaises(errors.DirectoryExists):
+            self.tar_fs.makedir(u'course.xml', recreate=True)
+        with self.assertRaises(errors.FileExists):
+            self.tar_fs.open(u'course.xml', 'xb')
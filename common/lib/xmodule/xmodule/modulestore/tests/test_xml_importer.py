@@ -381,6 +381,72 @@ class StaticContentImporterTest(unittest.TestCase):
                 'static/inner/file1.txt', base_dir=expected_base_dir
             )
 
+    def test_import_static_content_directory_workers(self):
+        mocked_os_walk_yield = [
+            ('static', None, ['file1.txt', 'file2.txt', 'file3.txt']),
+            ('static/inner', None, ['file1.txt', '.DS_Store']),
+        ]
+        self.static_content_importer.workers = 3
+        with mock.patch(
+            'xmodule.modulestore.xml_importer.os.walk',
+            return_value=mocked_os_walk_yield
+        ), mock.patch.object(
+            self.static_content_importer, 'import_static_file',
+            side_effect=lambda file_path, base_dir: ('/' + file_path, file_path.upper()),
+        ) as patched_import_static_file:
+            remap_dict = self.static_content_importer.import_static_content_directory('static')
+
+        self.assertEqual(patched_import_static_file.call_count, 4)
+        self.assertEqual(remap_dict, {
+            '/static/file1.txt': 'STATIC/FILE1.TXT',
+            '/static/file2.txt': 'STATIC/FILE2.TXT',
+            '/static/file3.txt': 'STATIC/FILE3.TXT',
+            '/static/inner/file1.txt': 'STATIC/INNER/FILE1.TXT',
+        })
+
+    def test_import_static_content_directory_saves_together(self):
+        mocked_os_walk_yield = [
+            ('static', None, ['file1.txt', 'file2.txt']),
+            ('static/inner', None, ['file1.txt']),
+        ]
+        self.mocked_content_store.generate_thumbnail.return_value = (None, None)
+        with mock.patch(
+            'xmodule.modulestore.xml_importer.os.walk',
+            return_value=mocked_os_walk_yield
+        ), mock.patch(OPEN_BUILTIN, mock.mock_open(read_data=b"data")):
+            self.static_content_importer.import_static_content_directory('static')
+
+        self.mocked_content_store.save.assert_not_called()
+        self.mocked_content_store.save_many.assert_called_once()
+        saved_contents = self.mocked_content_store.save_many.call_args[0][0]
+        self.assertEqual(
+            [content.import_path for content in saved_contents],
+            ['static/file1.txt', 'static/file2.txt', 'static/inner/file1.txt'],
+        )
+
+    def test_import_static_content_directory_save_failure(self):
+        mocked_os_walk_yield = [
+            ('static', None, ['file1.txt', 'file2.txt', 'file3.txt']),
+        ]
+        def save(content):
+            if content.import_path == 'static/file2.txt':
+                raise Exception('invalid content')
+
+        self.mocked_content_store.generate_thumbnail.return_value = (None, None)
+        self.mocked_content_store.save_many.side_effect = Exception('invalid content')
+        self.mocked_content_store.save.side_effect = save
+        with mock.patch(
+            'xmodule.modulestore.xml_importer.os.walk',
+            return_value=mocked_os_walk_yield
+        ), mock.patch(OPEN_BUILTIN, mock.mock_open(read_data=b"data")):
+            remap_dict = self.static_content_importer.import_static_content_directory('static')
+
+        self.assertEqual(
+            [call[0][0].import_path for call in self.mocked_content_store.save.call_args_list],
+            ['static/file1.txt', 'static/file2.txt', 'static/file3.txt'],
+        )
+        self.assertEqual(len(remap_dict), 3)
+
     def test_import_static_file(self):
         base_dir = path('/path/to/dir')
         full_file_path = os.path.join(base_dir, 'static/some_file.txt')
@@ -4,12 +4,12 @@ Methods for exporting course data to XML
 
 
 import logging
-import os
 from abc import abstractmethod
 from json import dumps
 
 import lxml.etree
 import six
+from fs.base import FS
 from fs.osfs import OSFS
 from opaque_keys.edx.locator import CourseLocator, LibraryLocator
 from six import text_type
@@ -22,6 +22,7 @@ from xmodule.modulestore import LIBRARY_ROOT, EdxJSONEncoder, ModuleStoreEnum
 from xmodule.modulestore.draft_and_published import DIRECT_ONLY_CATEGORIES
 from xmodule.modulestore.inheritance import own_metadata
 from xmodule.modulestore.store_utilities import draft_node_constructor, get_draft_subtree_roots
+from xmodule.modulestore.tar_export import TarExportFS
 
 DRAFT_DIR = "drafts"
 PUBLISHED_DIR = "published"
@@ -114,7 +115,7 @@ class ExportManager(object):
         `modulestore`: A `ModuleStore` object that is the source of the modules to export
         `contentstore`: A `ContentStore` object that is the source of the content to export, can be None
         `courselike_key`: The Locator of the Descriptor to export
-        `root_dir`: The directory to write the exported xml to
+        `root_dir`: The directory to write the exported xml to, or a pyfilesystem `FS` to write it into
         `target_dir`: The name of the directory inside `root_dir` to write the content to
         """
         self.modulestore = modulestore
@@ -135,7 +136,7 @@ class ExportManager(object):
         Perform any additional tasks to the root XML node.
         """
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         """
         Process additional content, like static assets.
         """
@@ -157,7 +158,7 @@ class ExportManager(object):
         """
         with self.modulestore.bulk_operations(self.courselike_key):
 
-            fsm = OSFS(self.root_dir)
+            fsm = self.root_dir if isinstance(self.root_dir, FS) else OSFS(self.root_dir)
             root = lxml.etree.Element('unknown')
 
             # export only the published content
@@ -175,8 +176,7 @@ class ExportManager(object):
             self.process_root(root, export_fs)
 
             # Process extra items-- drafts, assets, etc
-            root_courselike_dir = self.root_dir + '/' + self.target_dir
-            self.process_extra(root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs)
+            self.process_extra(root, courselike, xml_centric_courselike_key, export_fs)
 
             # Any last pass adjustments
             self.post_process(root, export_fs)
@@ -203,27 +203,23 @@ class CourseExportManager(ExportManager):
         with export_fs.open(u'course.xml', 'wb') as course_xml:
             lxml.etree.ElementTree(root).write(course_xml, encoding='utf-8')
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         # Export the modulestore's asset metadata.
-        asset_dir = root_courselike_dir + '/' + AssetMetadata.EXPORTED_ASSET_DIR + '/'
-        if not os.path.isdir(asset_dir):
-            os.makedirs(asset_dir)
+        asset_dir = export_fs.makedir(AssetMetadata.EXPORTED_ASSET_DIR, recreate=True)
         asset_root = lxml.etree.Element(AssetMetadata.ALL_ASSETS_XML_TAG)
         course_assets = self.modulestore.get_all_asset_metadata(self.courselike_key, None)
         for asset_md in course_assets:
             # All asset types are exported using the "asset" tag - but their asset type is specified in each asset key.
             asset = lxml.etree.SubElement(asset_root, AssetMetadata.ASSET_XML_TAG)
             asset_md.to_xml(asset)
-        with OSFS(asset_dir).open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'wb') as asset_xml_file:
+        with asset_dir.open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'wb') as asset_xml_file:
             lxml.etree.ElementTree(asset_root).write(asset_xml_file, encoding='utf-8')
 
         # export the static assets
         policies_dir = export_fs.makedir('policies', recreate=True)
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                root_courselike_dir + '/static/',
-                root_courselike_dir + '/policies/assets.json',
+            self.contentstore.export_all_for_course_to_fs(
+                self.courselike_key, export_fs, u'static', u'policies/assets.json',
             )
 
             # If we are using the default course image, export it to the
@@ -239,10 +235,8 @@ class CourseExportManager(ExportManager):
                 except NotFoundError:
                     pass
                 else:
-                    output_dir = root_courselike_dir + '/static/images/'
-                    if not os.path.isdir(output_dir):
-                        os.makedirs(output_dir)
-                    with OSFS(output_dir).open(u'course_image.jpg', 'wb') as course_image_file:
+                    output_dir = export_fs.makedirs(u'static/images', recreate=True)
+                    with output_dir.open(u'course_image.jpg', 'wb') as course_image_file:
                         course_image_file.write(course_image.data)
 
         # export the static tabs
@@ -310,7 +304,7 @@ class LibraryExportManager(ExportManager):
         root.set('org', self.courselike_key.org)
         root.set('library', self.courselike_key.library)
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         """
         Notionally, libraries may have assets. This is currently unsupported, but the structure is here
         to ease in duck typing during import. This may be expanded as a useful feature eventually.
@@ -319,10 +313,8 @@ class LibraryExportManager(ExportManager):
         export_fs.makedir('policies', recreate=True)
 
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                self.root_dir + '/' + self.target_dir + '/static/',
-                self.root_dir + '/' + self.target_dir + '/policies/assets.json',
+            self.contentstore.export_all_for_course_to_fs(
+                self.courselike_key, export_fs, u'static', u'policies/assets.json',
             )
 
     def post_process(self, root, export_fs):
@@ -352,6 +344,24 @@ def export_library_to_xml(modulestore, contentstore, library_key, root_dir, libr
     LibraryExportManager(modulestore, contentstore, library_key, root_dir, library_dir).export()
 
 
+def export_course_to_tar(modulestore, contentstore, course_key, fileobj, course_dir):
+    """
+    Export a course as xml into a .tar.gz archive which is streamed into the file object `fileobj`
+    while the course is exported, with the course in the directory `course_dir` of the archive.
+    """
+    with TarExportFS(fileobj) as tar_fs:
+        export_course_to_xml(modulestore, contentstore, course_key, tar_fs, course_dir)
+
+
+def export_library_to_tar(modulestore, contentstore, library_key, fileobj, library_dir):
+    """
+    Export a library as xml into a .tar.gz archive which is streamed into the file object `fileobj`
+    while the library is exported, with the library in the directory `library_dir` of the archive.
+    """
+    with TarExportFS(fileobj) as tar_fs:
+        export_library_to_xml(modulestore, contentstore, library_key, tar_fs, library_dir)
+
+
 def adapt_references(subtree, destination_course_key, export_fs):
     """
     Map every reference in the subtree into destination_course_key and set it back into the xblock fields
@@ -28,7 +28,12 @@ import logging
 import mimetypes
 import os
 import re
+import threading
+import time
 from abc import abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 import six
 import xblock
@@ -61,6 +66,10 @@ log = logging.getLogger(__name__)
 
 DEFAULT_STATIC_CONTENT_SUBDIR = 'static'
 
+# Static files imported from a directory are saved to the content store together,
+# once their combined size reaches this many bytes.
+STATIC_CONTENT_SAVE_BATCH_SIZE = 16 * 1024 * 1024
+
 
 class LocationMixin(XBlockMixin):
     """
@@ -84,10 +93,19 @@ class LocationMixin(XBlockMixin):
 
 
 class StaticContentImporter:
-    def __init__(self, static_content_store, course_data_path, target_id):
+    def __init__(self, static_content_store, course_data_path, target_id, workers=1):
+        """
+        If ``workers`` is more than 1, that many files are read, thumbnailed and saved
+        to the static content store at a time.
+        """
         self.static_content_store = static_content_store
         self.target_id = target_id
         self.course_data_path = course_data_path
+        self.workers = workers
+        # The contents waiting to be saved together while importing a directory.
+        self._pending_contents = None
+        self._pending_size = 0
+        self._pending_lock = threading.Lock()
         try:
             with open(course_data_path / 'policies/assets.json') as f:
                 self.policy = json.load(f)
@@ -104,6 +122,7 @@ class StaticContentImporter:
         remap_dict = {}
 
         static_dir = self.course_data_path / content_subdir
+        file_paths = []
         for dirname, _, filenames in os.walk(static_dir):
             for filename in filenames:
 
@@ -117,12 +136,29 @@ class StaticContentImporter:
                 if verbose:
                     log.debug('importing static content %s...', file_path)
 
-                imported_file_attrs = self.import_static_file(file_path, base_dir=static_dir)
+                file_paths.append(file_path)
 
-                if imported_file_attrs:
-                    # store the remapping information which will be needed
-                    # to subsitute in the module data
-                    remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
+        import_file = lambda file_path: self.import_static_file(file_path, base_dir=static_dir)
+        self._pending_contents = []
+        try:
+            if self.workers > 1 and len(file_paths) > 1:
+                # Reading files, generating thumbnails and writing to the content store mostly wait
+                # on IO or release the GIL, so they overlap well across threads. The results are
+                # collected in walk order, so the remapping is the same as a serial import.
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    all_imported_file_attrs = list(executor.map(import_file, file_paths))
+            else:
+                all_imported_file_attrs = [import_file(file_path) for file_path in file_paths]
+        finally:
+            pending_contents, self._pending_contents, self._pending_size = self._pending_contents, None, 0
+            if pending_contents:
+                self._save_contents(pending_contents)
+
+        for imported_file_attrs in all_imported_file_attrs:
+            if imported_file_attrs:
+                # store the remapping information which will be needed
+                # to subsitute in the module data
+                remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
 
         return remap_dict
 
@@ -170,14 +206,46 @@ class StaticContentImporter:
             content.thumbnail_location = thumbnail_location
 
         # then commit the content
+        with self._pending_lock:
+            if self._pending_contents is None:
+                contents = [content]
+            else:
+                # Save the contents of the directory being imported in batches.
+                self._pending_contents.append(content)
+                self._pending_size += len(data)
+                if self._pending_size < STATIC_CONTENT_SAVE_BATCH_SIZE:
+                    contents = []
+                else:
+                    contents, self._pending_contents, self._pending_size = self._pending_contents, [], 0
+        if contents:
+            self._save_contents(contents)
+
+        return file_subpath, asset_key
+
+    def _save_contents(self, contents):
+        """
+        Save the imported `contents` to the static content store together.
+        If that fails, save them one by one, so that only the contents
+        which can't be saved are lost.
+        """
         try:
-            self.static_content_store.save(content)
-        except Exception as err:
-            log.exception(u'Error importing {0}, error={1}'.format(
-                file_subpath, err
+            self.static_content_store.save_many(contents)
+            return
+        except Exception as err:  # pylint: disable=broad-except
+            if len(contents) == 1:
+                log.exception(u'Error importing {0}, error={1}'.format(contents[0].import_path, err))
+                return
+            log.warning(u'Error importing {0} together, saving them one by one, error={1}'.format(
+                u', '.join(content.import_path for content in contents), err
             ))
 
-        return file_subpath, asset_key
+        for content in contents:
+            try:
+                self.static_content_store.save(content)
+            except Exception as err:  # pylint: disable=broad-except
+                log.exception(u'Error importing {0}, error={1}'.format(
+                    content.import_path, err
+                ))
 
 
 class ImportManager(object):
@@ -222,6 +290,10 @@ class ImportManager(object):
             create this file to implement custom logic in their course.
 
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
+
+        static_import_workers: The number of static files to import at a time.
+
+    The time spent in each stage of the import is logged, and kept in ``stage_timings``.
     """
     store_class = XMLModuleStore
 
@@ -234,6 +306,7 @@ class ImportManager(object):
             create_if_not_present=False, raise_on_failure=False,
             static_content_subdir=DEFAULT_STATIC_CONTENT_SUBDIR,
             python_lib_filename='python_lib.zip',
+            static_import_workers=1,
     ):
         self.store = store
         self.user_id = user_id
@@ -249,17 +322,32 @@ class ImportManager(object):
         self.do_import_python_lib = do_import_python_lib
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
-        self.xml_module_store = self.store_class(
-            data_dir,
-            default_class=default_class,
-            source_dirs=source_dirs,
-            load_error_modules=load_error_modules,
-            xblock_mixins=store.xblock_mixins,
-            xblock_select=store.xblock_select,
-            target_course_id=target_id,
-        )
+        self.static_import_workers = static_import_workers
+        # Maps the names of the stages of the import to the seconds spent in them.
+        self.stage_timings = OrderedDict()
+        with self.timed_stage('parse'):
+            self.xml_module_store = self.store_class(
+                data_dir,
+                default_class=default_class,
+                source_dirs=source_dirs,
+                load_error_modules=load_error_modules,
+                xblock_mixins=store.xblock_mixins,
+                xblock_select=store.xblock_select,
+                target_course_id=target_id,
+            )
         self.logger, self.errors = make_error_tracker()
 
+    @contextmanager
+    def timed_stage(self, stage):
+        """
+        Add the time spent in the wrapped block to the timing of the import stage ``stage``.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.stage_timings[stage] = self.stage_timings.get(stage, 0) + time.time() - start
+
     def preflight(self):
         """
         Perform any pre-import sanity checks.
@@ -280,7 +368,8 @@ class ImportManager(object):
         static_content_importer = StaticContentImporter(
             self.static_content_store,
             course_data_path=data_path,
-            target_id=dest_id
+            target_id=dest_id,
+            workers=self.static_import_workers,
         )
         if self.do_import_static:
             if self.verbose:
@@ -510,26 +599,37 @@ class ImportManager(object):
             # This bulk operation wraps all the operations to populate the published branch.
             with self.store.bulk_operations(dest_id):
                 # Retrieve the course itself.
-                source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
+                with self.timed_stage('courselike'):
+                    source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
 
                 # Import all static pieces.
-                self.import_static(data_path, dest_id)
+                with self.timed_stage('static'):
+                    self.import_static(data_path, dest_id)
 
                 # Import asset metadata stored in XML.
-                self.import_asset_metadata(data_path, dest_id)
+                with self.timed_stage('asset_metadata'):
+                    self.import_asset_metadata(data_path, dest_id)
 
                 # Import all children
-                self.import_children(source_courselike, courselike, courselike_key, dest_id)
+                with self.timed_stage('children'):
+                    self.import_children(source_courselike, courselike, courselike_key, dest_id)
 
             # This bulk operation wraps all the operations to populate the draft branch with any items
             # from the /drafts subdirectory.
             # Drafts must be imported in a separate bulk operation from published items to import properly,
             # due to the recursive_build() above creating a draft item for each course block
             # and then publishing it.
-            with self.store.bulk_operations(dest_id):
+            with self.timed_stage('drafts'), self.store.bulk_operations(dest_id):
                 # Import all draft items into the courselike.
                 courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
 
+            log.info(
+                u'Import of %s stage timings: %s',
+                dest_id,
+                u', '.join(
+                    u'{}={:.3f}s'.format(stage, seconds) for stage, seconds in six.iteritems(self.stage_timings)
+                ),
+            )
             yield courselike
 
 
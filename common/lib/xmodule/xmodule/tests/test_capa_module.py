@@ -1901,6 +1901,23 @@ class ProblemBlockTest(unittest.TestCase):
             assert 0 <= module.seed < 1000
             i -= 1
 
+    @ddt.data(
+        RANDOMIZATION.ALWAYS,
+        RANDOMIZATION.PER_STUDENT,
+        RANDOMIZATION.ONRESET
+    )
+    def test_random_seed_pool(self, rerandomize):
+        # Assert that the seeds are limited to the pool of seeds, when one is configured.
+        with patch('xmodule.capa_base.get_seed_pool_size', return_value=5):
+            for __ in range(50):
+                module = CapaFactory.create(rerandomize=rerandomize)
+                assert 0 <= module.seed < 5
+
+    def test_random_seed_pool_no_randomization(self):
+        with patch('xmodule.capa_base.get_seed_pool_size', return_value=5):
+            module = CapaFactory.create(rerandomize=RANDOMIZATION.NEVER)
+            self.assertEqual(module.seed, 1)
+
     @patch('xmodule.capa_base.log')
     @patch('xmodule.capa_base.Progress')
     def test_get_progress_error(self, mock_progress, mock_log):
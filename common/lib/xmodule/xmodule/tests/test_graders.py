@@ -3,10 +3,12 @@ Grading tests
 """
 
 
+import random
 import unittest
 from datetime import datetime, timedelta
 
 import ddt
+import numpy
 from pytz import UTC
 import six
 from six import text_type
@@ -361,6 +363,73 @@ class GraderTest(unittest.TestCase):
         self.assertIn(expected_error_message, text_type(error.exception))
 
 
+@ddt.ddt
+class GradeMatrixTest(unittest.TestCase):
+    """
+    Tests that grading the users of a GradeMatrix at once gives the same
+    results as grading the grade sheet of each user.
+    """
+    grader = graders.grader_from_conf([
+        {'type': "Homework", 'min_count': 12, 'drop_count': 2, 'short_label': "HW", 'weight': 0.25},
+        {'type': "Lab", 'min_count': '7', 'drop_count': 3, 'category': "Labs", 'weight': 0.25},
+        {'type': "Midterm", 'min_count': 0, 'drop_count': 0, 'short_label': "Midterm", 'weight': 0.5},
+        {'type': "Quiz", 'min_count': 2, 'drop_count': 5, 'show_only_average': True, 'weight': 0.1},
+        {'type': "Final", 'min_count': 1, 'drop_count': 0, 'hide_average': True, 'weight': 0.0},
+    ])
+
+    def assert_grade_matrix_parity(self, subsections, earned, possible):
+        """
+        Asserts that the GradeMatrix of the given graded totals grades each
+        user as their grade sheet is graded.
+        """
+        result = self.grader.grade_matrix(graders.GradeMatrix(subsections, earned, possible))
+        for index in range(len(earned)):
+            grade_sheet = {}
+            for column, (subsection_format, display_name) in enumerate(subsections):
+                if possible[index][column] > 0:
+                    grade_sheet.setdefault(subsection_format, {})[column] = GraderTest.MockGrade(
+                        AggregatedScore(
+                            tw_earned=earned[index][column],
+                            tw_possible=possible[index][column],
+                            graded=True,
+                            first_attempted=None,
+                        ),
+                        display_name=display_name,
+                    )
+            expected_summary = self.grader.grade(grade_sheet)
+            self.assertEqual(result.summary(index), expected_summary)
+            self.assertEqual(result.percent[index], expected_summary['percent'])
+
+    def test_test_gradesheet(self):
+        subsections, earned, possible = [], [], []
+        for subsection_format, grades in six.iteritems(GraderTest.test_gradesheet):
+            for grade in grades.values():
+                subsections.append((subsection_format, grade.display_name))
+                earned.append(grade.graded_total.earned)
+                possible.append(grade.graded_total.possible)
+        self.assert_grade_matrix_parity(subsections, [earned], [possible])
+
+    def test_no_subsections(self):
+        self.assert_grade_matrix_parity([], numpy.zeros((3, 0)), numpy.zeros((3, 0)))
+
+    @ddt.data(*range(10))
+    def test_random_scores(self, seed):
+        rand = random.Random(seed)
+        subsections = [
+            (rand.choice(["Homework", "Lab", "Midterm", "Quiz", "Final", "Ungraded"]), u"Subsection {}".format(index))
+            for index in range(rand.randint(1, 20))
+        ]
+        possible = [
+            [rand.choice([0, 1, 2, 3, 7, 13.5]) for _ in subsections]
+            for _ in range(10)
+        ]
+        earned = [
+            [rand.choice([0, points / 3.0, points / 2.0, rand.uniform(0, points), points]) for points in user_possible]
+            for user_possible in possible
+        ]
+        self.assert_grade_matrix_parity(subsections, earned, possible)
+
+
 @ddt.ddt
 class ShowCorrectnessTest(unittest.TestCase):
     """
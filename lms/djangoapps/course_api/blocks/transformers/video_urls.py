@@ -3,6 +3,8 @@ Video block URL Transformer
 """
 
 
+from copy import deepcopy
+
 import six
 from django.conf import settings
 
@@ -51,8 +53,14 @@ class VideoBlockURLTransformer(BlockStructureTransformer):
             only_on_web = student_view_data.get('only_on_web')
             if only_on_web:
                 continue
+            # The collected data may be shared with other block structures,
+            # so the rewritten URLs are set on a copy of it.
+            student_view_data = deepcopy(student_view_data)
             encoded_videos = student_view_data.get('encoded_videos')
             for video_format, video_data in six.iteritems(encoded_videos):
                 if video_format in self.VIDEO_FORMAT_EXCEPTIONS:
                     continue
                 video_data['url'] = rewrite_video_url(self.CDN_URL, video_data['url'])
+            block_structure.set_transformer_block_field(
+                block_key, StudentViewTransformer, StudentViewTransformer.STUDENT_VIEW_DATA, student_view_data
+            )
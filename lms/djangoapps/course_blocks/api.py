@@ -4,17 +4,29 @@ get_course_blocks function.
 """
 
 
+from collections import OrderedDict
+
 from django.conf import settings
-from edx_when import field_data
 
 from lms.djangoapps.course_api.blocks.transformers.block_completion import BlockCompletionTransformer
 from openedx.core.djangoapps.content.block_structure.api import get_block_structure_manager
 from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
 from openedx.features.content_type_gating.block_transformers import ContentTypeGateTransformer
 
-from .transformers import library_content, load_override_data, start_date, user_partitions, visibility
+from .transformers import (
+    date_overrides,
+    library_content,
+    load_override_data,
+    start_date,
+    user_partitions,
+    visibility
+)
 from .usage_info import CourseUsageInfo
 
+# The maximum number of transformed block structures kept for sharing
+# amongst users by get_course_blocks_for_users.
+MAX_SHARED_TRANSFORMED_STRUCTURES = 20
+
 INDIVIDUAL_STUDENT_OVERRIDE_PROVIDER = (
     'lms.djangoapps.courseware.student_field_overrides.IndividualStudentOverrideProvider'
 )
@@ -45,7 +57,7 @@ def get_course_block_access_transformers(user):
         ContentTypeGateTransformer(),
         user_partitions.UserPartitionTransformer(),
         visibility.VisibilityTransformer(),
-        field_data.DateOverrideTransformer(user),
+        date_overrides.DateOverrideTransformer(user),
     ]
 
     if has_individual_student_override_provider():
@@ -103,3 +115,89 @@ def get_course_blocks(
         starting_block_usage_key,
         collected_block_structure,
     )
+
+
+def get_course_blocks_for_users(
+        users,
+        starting_block_usage_key,
+        collected_block_structure=None,
+        allow_start_dates_in_future=False,
+):
+    """
+    Yields a transformed block structure, as returned by
+    get_course_blocks with the default transformers, for each of the
+    given users.
+
+    Users whose access to the course blocks is the same, as determined
+    by the access signatures of the transformers, share a single
+    transform of the block structure: each of them gets a
+    copy-on-write view of the transformed structure.
+
+    Arguments:
+        users ([django.contrib.auth.models.User]) - Users for which
+            the block structure is to be transformed.
+
+        starting_block_usage_key, collected_block_structure,
+            allow_start_dates_in_future - See get_course_blocks.
+
+    Yields:
+        (User, BlockStructureBlockData) - Each of the given users along
+            with the transformed block structure for the user.
+    """
+    get_blocks = get_course_blocks_getter(
+        starting_block_usage_key,
+        collected_block_structure,
+        allow_start_dates_in_future,
+    )
+    for user in users:
+        yield user, get_blocks(user)
+
+
+def get_course_blocks_getter(
+        starting_block_usage_key,
+        collected_block_structure=None,
+        allow_start_dates_in_future=False,
+):
+    """
+    Returns a function that takes a user and returns the transformed
+    block structure for the user, as described in
+    get_course_blocks_for_users.  The function can be used by callers
+    that need to handle a failure to transform the structure for one
+    user without aborting the iteration over the other users.
+    """
+    course_key = starting_block_usage_key.course_key
+    manager = get_block_structure_manager(course_key)
+    if collected_block_structure is None:
+        # Share the same version of the collected structure amongst all users.
+        collected_block_structure = manager.get_collected()
+
+    # Map of access signature to the transformed block structure shared by
+    # the users with that signature, ordered from least to most recently used.
+    shared_structures = OrderedDict()
+
+    def get_blocks(user):
+        """
+        Returns the transformed block structure for the given user.
+        """
+        transformers = BlockStructureTransformers(get_course_block_access_transformers(user))
+        transformers.usage_info = CourseUsageInfo(course_key, user, allow_start_dates_in_future)
+
+        signature = transformers.access_signature(collected_block_structure)
+        if signature is None:
+            return manager.get_transformed(transformers, starting_block_usage_key, collected_block_structure)
+
+        transformed_structure = shared_structures.pop(signature, None)
+        if transformed_structure is None:
+            transformed_structure = manager.get_transformed(
+                transformers,
+                starting_block_usage_key,
+                collected_block_structure,
+            )
+            if len(shared_structures) >= MAX_SHARED_TRANSFORMED_STRUCTURES:
+                shared_structures.popitem(last=False)
+        shared_structures[signature] = transformed_structure
+
+        # The shared structure must not be modified, so hand out views of it.
+        return transformed_structure.copy_on_write()
+
+    return get_blocks
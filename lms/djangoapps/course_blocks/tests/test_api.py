@@ -0,0 +1,77 @@
+"""
+Tests for the course_blocks api.
+"""
+
+
+from mock import patch
+
+from common.djangoapps.course_modes.models import CourseMode
+from common.djangoapps.student.tests.factories import CourseEnrollmentFactory, UserFactory
+from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+from ..api import get_course_blocks, get_course_blocks_for_users
+from ..transformers.visibility import VisibilityTransformer
+
+
+class GetCourseBlocksForUsersTestCase(SharedModuleStoreTestCase):
+    """
+    Tests for get_course_blocks_for_users.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(GetCourseBlocksForUsersTestCase, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=cls.course, category='chapter')
+        cls.sequential = ItemFactory.create(parent=chapter, category='sequential')
+        cls.staff_only_sequential = ItemFactory.create(
+            parent=chapter, category='sequential', visible_to_staff_only=True,
+        )
+
+    def setUp(self):
+        super(GetCourseBlocksForUsersTestCase, self).setUp()
+        self.students = [UserFactory.create() for _ in range(3)]
+        for student in self.students:
+            CourseEnrollmentFactory.create(user=student, course_id=self.course.id, mode=CourseMode.DEFAULT_MODE_SLUG)
+        self.staff = UserFactory.create(is_staff=True)
+        self.users = self.students + [self.staff]
+
+    def get_course_blocks_for_users(self):
+        """
+        Returns the transformed block structures of all users, along with
+        the number of times the block structure was transformed.
+        """
+        with patch.object(
+            BlockStructureTransformers, 'transform', autospec=True, side_effect=BlockStructureTransformers.transform,
+        ) as mock_transform:
+            structures = dict(get_course_blocks_for_users(self.users, self.course.location))
+        return structures, mock_transform.call_count
+
+    def test_shared_transforms(self):
+        structures, num_transforms = self.get_course_blocks_for_users()
+        self.assertEqual(num_transforms, 2)
+
+        for user in self.users:
+            self.assertEqual(
+                set(structures[user].get_block_keys()),
+                set(get_course_blocks(user, self.course.location).get_block_keys()),
+            )
+        self.assertIn(self.staff_only_sequential.location, structures[self.staff])
+        self.assertNotIn(self.staff_only_sequential.location, structures[self.students[0]])
+
+    def test_shared_transforms_are_independent(self):
+        structures, _ = self.get_course_blocks_for_users()
+        structures[self.students[0]].remove_block(self.sequential.location, keep_descendants=False)
+        structures[self.students[0]].override_xblock_field(self.course.location, 'display_name', 'Changed')
+
+        self.assertIn(self.sequential.location, structures[self.students[1]])
+        self.assertNotEqual(
+            structures[self.students[1]].get_xblock_field(self.course.location, 'display_name'), 'Changed',
+        )
+
+    def test_unshareable_transforms(self):
+        with patch.object(VisibilityTransformer, 'access_signature', return_value=None):
+            structures, num_transforms = self.get_course_blocks_for_users()
+        self.assertEqual(num_transforms, len(self.users))
+        self.assertNotIn(self.staff_only_sequential.location, structures[self.students[0]])
@@ -83,19 +83,9 @@ class ContentLibraryTransformer(FilteringTransformerMixin, BlockStructureTransfo
             library_children = block_structure.get_children(block_key)
             if library_children:
                 all_library_children.update(library_children)
-                selected = []
                 mode = block_structure.get_xblock_field(block_key, 'mode')
                 max_count = block_structure.get_xblock_field(block_key, 'max_count')
-
-                # Retrieve "selected" json from LMS MySQL database.
-                state_dict = get_student_module_as_dict(usage_info.user, usage_info.course_key, block_key)
-                for selected_block in state_dict.get('selected', []):
-                    # Add all selected entries for this user for this
-                    # library module to the selected list.
-                    block_type, block_id = selected_block
-                    usage_key = usage_info.course_key.make_usage_key(block_type, block_id)
-                    if usage_key in library_children:
-                        selected.append(selected_block)
+                state_dict, selected = self._get_stored_selection(usage_info, block_key, library_children)
 
                 # Update selected
                 previous_count = len(selected)
@@ -140,6 +130,47 @@ class ContentLibraryTransformer(FilteringTransformerMixin, BlockStructureTransfo
 
         return [block_structure.create_removal_filter(check_child_removal)]
 
+    def access_signature(self, usage_info, block_structure):
+        signature = []
+        for block_key in block_structure:
+            if block_key.block_type != 'library_content':
+                continue
+            library_children = block_structure.get_children(block_key)
+            if library_children:
+                _, selected = self._get_stored_selection(usage_info, block_key, library_children)
+                block_keys = LibraryContentBlock.make_selection(
+                    selected,
+                    library_children,
+                    block_structure.get_xblock_field(block_key, 'max_count'),
+                    block_structure.get_xblock_field(block_key, 'mode'),
+                )
+
+                # Changes to the selection are saved and published during
+                # the transform, so it cannot be shared.
+                if any(block_keys[changed] for changed in ('invalid', 'overlimit', 'added')):
+                    return None
+                signature.append((block_key, frozenset(tuple(selected_block) for selected_block in selected)))
+        return tuple(signature)
+
+    @staticmethod
+    def _get_stored_selection(usage_info, block_key, library_children):
+        """
+        Returns the user's stored state of the given library_content
+        block along with the stored selected entries that are still
+        among its library_children.
+        """
+        # Retrieve "selected" json from LMS MySQL database.
+        state_dict = get_student_module_as_dict(usage_info.user, usage_info.course_key, block_key)
+        selected = []
+        for selected_block in state_dict.get('selected', []):
+            # Add all selected entries for this user for this
+            # library module to the selected list.
+            block_type, block_id = selected_block
+            usage_key = usage_info.course_key.make_usage_key(block_type, block_id)
+            if usage_key in library_children:
+                selected.append(selected_block)
+        return state_dict, selected
+
     def _publish_events(self, block_structure, location, previous_count, max_count, block_keys, user_id):
         """
         Helper method to publish events for analytics purposes
@@ -212,6 +243,17 @@ class ContentLibraryOrderTransformer(BlockStructureTransformer):
         # There is nothing to collect
         pass  # pylint:disable=unnecessary-pass
 
+    def access_signature(self, usage_info, block_structure):
+        # The order of the children only depends on the stored selections.
+        signature = []
+        for block_key in block_structure:
+            if block_key.block_type == 'library_content' and block_structure.get_children(block_key):
+                state_dict = get_student_module_as_dict(usage_info.user, usage_info.course_key, block_key)
+                signature.append(
+                    (block_key, tuple(tuple(selected_block) for selected_block in state_dict.get('selected', [])))
+                )
+        return tuple(signature)
+
     def transform(self, usage_info, block_structure):
         """
         Transforms the order of the children of the randomized content block
@@ -242,4 +284,6 @@ class ContentLibraryOrderTransformer(BlockStructureTransformer):
                     )
                 else:
                     ordering_data = {block[1]: position for position, block in enumerate(state_dict['selected'])}
-                    library_children.sort(key=lambda block, data=ordering_data: data[block.block_id])
+                    block_structure.sort_children(
+                        block_key, key=lambda block, data=ordering_data: data[block.block_id]
+                    )
@@ -80,6 +80,18 @@ class OverrideDataTransformer(BlockStructureTransformer):
         # collect basic xblock fields
         block_structure.request_xblock_fields(*REQUESTED_FIELDS)
 
+    def access_signature(self, usage_info, block_structure):
+        """
+        returns all of the user's override data in the course
+        """
+        return frozenset(
+            StudentFieldOverride.objects.filter(
+                course_id=usage_info.course_key,
+                field__in=REQUESTED_FIELDS,
+                student__id=self.user.id,
+            ).values_list('location', 'field', 'value')
+        )
+
     def transform(self, usage_info, block_structure):
         """
         loads override data into blocks
@@ -5,7 +5,9 @@ Start Date Transformer implementation.
 from datetime import datetime
 from pytz import UTC
 
+from common.djangoapps.student.roles import CourseBetaTesterRole
 from lms.djangoapps.courseware.access_utils import check_start_date
+from lms.djangoapps.courseware.masquerade import get_course_masquerade
 from openedx.core.djangoapps.content.block_structure.transformer import (
     BlockStructureTransformer,
     FilteringTransformerMixin
@@ -71,6 +73,18 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
             func_merge_ancestors=max,
         )
 
+    def access_signature(self, usage_info, block_structure):
+        # Users with staff access bypass the Start Date check.
+        if usage_info.has_staff_access or usage_info.allow_start_dates_in_future:
+            return ('all',)
+
+        # Otherwise, the start dates only vary for beta testers and for
+        # masquerading users.
+        return (
+            CourseBetaTesterRole(usage_info.course_key).has_user(usage_info.user),
+            bool(get_course_masquerade(usage_info.user, usage_info.course_key)),
+        )
+
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Start Date check.
         if usage_info.has_staff_access or usage_info.allow_start_dates_in_future:
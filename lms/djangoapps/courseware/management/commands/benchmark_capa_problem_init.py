@@ -0,0 +1,130 @@
+"""
+Command to measure the time the problem template cache saves when initializing capa problems.
+"""
+
+
+import gettext
+import logging
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from capa.capa_problem import LoncapaProblem, LoncapaSystem, problem_template_cache
+from openedx.core.lib.command_utils import parse_course_keys
+from xmodule.modulestore.django import modulestore
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_capa_problem_init 'course-v1:edX+DemoX+Demo_Course' --settings=devstack
+        $ ./manage.py lms benchmark_capa_problem_init 'course-v1:edX+DemoX+Demo_Course' \
+            --seeds 20 --repeat 10 --settings=devstack
+
+    For each course, reports the time taken to initialize every capa problem of the course once
+    per seed, the way a problem is initialized for each learner and request, both with the
+    problem template cache cleared before every initialization and with the cache in use.
+    """
+    help = u'Benchmarks the initialization of the capa problems of courses with and without the problem template cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'courses',
+            nargs='+',
+            help=u'Course keys of the courses to benchmark.',
+        )
+        parser.add_argument(
+            '--seeds',
+            help=u'Number of seeds each problem is initialized with.',
+            default=10,
+            type=int,
+        )
+        parser.add_argument(
+            '--repeat',
+            help=u'Number of times each measurement is repeated; the best time is reported.',
+            default=5,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        seeds = list(range(options['seeds']))
+        for course_key in parse_course_keys(options['courses']):
+            problems = [
+                problem for problem in modulestore().get_items(course_key, qualifiers={'category': 'problem'})
+                if _can_initialize(problem)
+            ]
+            self.stdout.write(u'{}: {} problems'.format(course_key, len(problems)))
+            if not problems:
+                continue
+
+            def initialize_problems(clear_cache):
+                """
+                Initializes every problem with every seed.
+                """
+                for problem in problems:
+                    for seed in seeds:
+                        if clear_cache:
+                            problem_template_cache.clear()
+                        _new_loncapa_problem(problem, seed)
+
+            uncached_ms = _best_time_ms(lambda: initialize_problems(True), options['repeat'])
+            cached_ms = _best_time_ms(lambda: initialize_problems(False), options['repeat'])
+            initializations = len(problems) * len(seeds)
+            self.stdout.write(u'  uncached: {:>8.1f} ms, cached: {:>8.1f} ms, saved per problem initialization: '
+                              u'{:>6.3f} ms ({:.1f}%)'.format(
+                                  uncached_ms,
+                                  cached_ms,
+                                  (uncached_ms - cached_ms) / initializations,
+                                  100.0 * (uncached_ms - cached_ms) / uncached_ms,
+                              ))
+
+
+def _new_loncapa_problem(problem, seed):
+    """
+    Initializes a LoncapaProblem from the given problem block, with the given seed.
+    """
+    capa_system = LoncapaSystem(
+        ajax_url=u'',
+        anonymous_student_id=u'benchmark',
+        cache=None,
+        can_execute_unsafe_code=lambda: False,
+        get_python_lib_zip=lambda: None,
+        DEBUG=False,
+        filestore=problem.runtime.resources_fs,
+        i18n=gettext.NullTranslations(),
+        node_path=u'',
+        render_template=lambda template, context: u'',
+        seed=seed,
+        STATIC_URL=u'',
+        xqueue=None,
+    )
+    return LoncapaProblem(
+        problem_text=problem.data,
+        id=problem.location.html_id(),
+        capa_system=capa_system,
+        capa_module=problem,
+        seed=seed,
+        extract_tree=False,
+    )
+
+
+def _can_initialize(problem):
+    """
+    Returns whether the given problem block can be initialized outside of a request.
+    """
+    try:
+        _new_loncapa_problem(problem, 0)
+    except Exception:  # pylint: disable=broad-except
+        log.warning(u'Skipping problem %s, which could not be initialized', problem.location, exc_info=True)
+        return False
+    return True
+
+
+def _best_time_ms(func, repeat):
+    """
+    Returns the best wall time, in milliseconds, of the given number
+    of calls to the given function.
+    """
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
@@ -0,0 +1,108 @@
+"""
+Command to execute the scripts of the capa problems of courses for every seed of the seed pool,
+so that their results are in the safe_exec cache before learners need them.
+"""
+
+
+import gettext
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from capa.safe_exec import SafeExecCache, cache_stats
+from openedx.core.lib.command_utils import parse_course_keys
+from xmodule.capa_base import RANDOMIZATION, get_seed_pool_size
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore
+from xmodule.util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms warm_capa_seed_pool 'course-v1:edX+DemoX+Demo_Course' --settings=devstack
+
+    Every capa problem with a script is initialized once for each seed it can have: once with
+    a seed of 1 for problems which aren't randomized, and once for each seed of the pool of
+    CAPA_SEED_POOL_SIZE seeds for randomized problems. Problems whose scripts use the learner's
+    anonymous id are skipped, since their results are cached for each learner.
+    """
+    help = u'Executes the scripts of the capa problems of courses for every seed of the seed pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'courses',
+            nargs='+',
+            help=u'Course keys of the courses whose problems are executed.',
+        )
+        parser.add_argument(
+            '--seeds',
+            help=u'Number of seeds of randomized problems to execute, instead of CAPA_SEED_POOL_SIZE.',
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        seed_pool_size = options['seeds'] or get_seed_pool_size()
+        if not seed_pool_size:
+            raise CommandError(u'CAPA_SEED_POOL_SIZE is not set; pass the number of seeds with --seeds.')
+
+        for course_key in parse_course_keys(options['courses']):
+            executed = cached = failed = 0
+            problems = modulestore().get_items(course_key, qualifiers={'category': 'problem'})
+            for problem in problems:
+                if '<script' not in problem.data or 'anonymous_student_id' in problem.data:
+                    continue
+
+                slug = problem.location.html_id()
+                before = cache_stats.get(slug)
+                seeds = [1] if problem.rerandomize == RANDOMIZATION.NEVER else range(seed_pool_size)
+                for seed in seeds:
+                    try:
+                        _new_loncapa_problem(problem, seed)
+                    except Exception:  # pylint: disable=broad-except
+                        log.warning(u'Could not initialize problem %s with seed %d', problem.location, seed,
+                                    exc_info=True)
+                        failed += 1
+                after = cache_stats.get(slug)
+                executed += after['misses'] - before['misses']
+                cached += after['hits'] - before['hits']
+
+            self.stdout.write(u'{}: executed {} problem variants, {} were already cached, {} failed'.format(
+                course_key, executed, cached, failed
+            ))
+
+
+def _new_loncapa_problem(problem, seed):
+    """
+    Initializes a LoncapaProblem from the given problem block with the given seed, which executes
+    the problem's scripts unless their results are cached.
+    """
+    course_key = problem.location.course_key
+    capa_system = LoncapaSystem(
+        ajax_url=u'',
+        anonymous_student_id=u'',
+        cache=SafeExecCache(cache),
+        can_execute_unsafe_code=lambda: can_execute_unsafe_code(course_key),
+        get_python_lib_zip=lambda: get_python_lib_zip(contentstore, course_key),
+        DEBUG=False,
+        filestore=problem.runtime.resources_fs,
+        i18n=gettext.NullTranslations(),
+        node_path=settings.NODE_PATH,
+        render_template=lambda template, context: u'',
+        seed=seed,
+        STATIC_URL=u'',
+        xqueue=None,
+    )
+    return LoncapaProblem(
+        problem_text=problem.data,
+        id=problem.location.html_id(),
+        capa_system=capa_system,
+        capa_module=problem,
+        seed=seed,
+        extract_tree=False,
+    )
@@ -32,16 +32,24 @@ from contracts import contract, new_contract
 from django.db import DatabaseError, IntegrityError, transaction
 from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from opaque_keys.edx.block_types import BlockTypeKeyV1
-from opaque_keys.edx.keys import LearningContextKey
+from opaque_keys.edx.keys import CourseKey, LearningContextKey
 from xblock.core import XBlockAside
 from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
 from xblock.fields import Scope, UserScope
 from xblock.runtime import KeyValueStore
 
+from lms.djangoapps.courseware.toggles import PREFETCH_USER_STATE_FROM_BLOCK_STRUCTURE
 from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
 from xmodule.modulestore.django import modulestore
 
-from .models import StudentModule, XModuleStudentInfoField, XModuleStudentPrefsField, XModuleUserStateSummaryField
+from .models import (
+    StudentModule,
+    XModuleStudentInfoField,
+    XModuleStudentPrefsField,
+    XModuleUserStateSummaryField,
+    chunks
+)
 
 log = logging.getLogger(__name__)
 
@@ -347,7 +355,11 @@ class UserStateCache(object):
     Cache for Scope.user_state xblock field data.
     """
     def __init__(self, user, course_id):
+        # Maps block keys to either the dict of their field values, or, for
+        # prefetched blocks whose fields have not been accessed yet, their
+        # JSON serialized state.
         self._cache = defaultdict(dict)
+        self._prefetched_block_keys = set()
         self.course_id = course_id
         self.user = user
         self._client = DjangoXBlockUserStateClient(self.user)
@@ -364,11 +376,29 @@ class UserStateCache(object):
         """
         block_field_state = self._client.get_many(
             self.user.username,
-            _all_usage_keys(xblocks, aside_types),
+            _all_usage_keys(xblocks, aside_types) - self._prefetched_block_keys,
         )
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
 
+    def prefetch_block_keys(self, block_keys):
+        """
+        Load the state of all of the supplied ``block_keys`` into this cache,
+        with a single paginated query. The state of each block is only
+        deserialized when its fields are first accessed, so that the state of
+        blocks that are never accessed is never parsed.
+
+        Arguments:
+            block_keys (set of :class:`UsageKey`): The blocks to cache the state of.
+        """
+        block_keys = set(block_keys) - self._prefetched_block_keys
+        if not block_keys:
+            return
+
+        for block_key, state in self._client.get_many_serialized(self.user.username, self.course_id, block_keys):
+            self._cache[block_key] = state
+        self._prefetched_block_keys.update(block_keys)
+
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def set(self, kvs_key, value):
         """
@@ -440,7 +470,7 @@ class UserStateCache(object):
         if cache_key not in self._cache:
             raise KeyError(kvs_key.field_name)
 
-        return self._cache[cache_key][kvs_key.field_name]
+        return self._field_state(cache_key)[kvs_key.field_name]
 
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def delete(self, kvs_key):
@@ -456,7 +486,7 @@ class UserStateCache(object):
         if cache_key not in self._cache:
             raise KeyError(kvs_key.field_name)
 
-        field_state = self._cache[cache_key]
+        field_state = self._field_state(cache_key)
 
         if kvs_key.field_name not in field_state:
             raise KeyError(kvs_key.field_name)
@@ -478,12 +508,22 @@ class UserStateCache(object):
 
         return (
             cache_key in self._cache and
-            kvs_key.field_name in self._cache[cache_key]
+            kvs_key.field_name in self._field_state(cache_key)
         )
 
     def __len__(self):
         return len(self._cache)
 
+    def _field_state(self, cache_key):
+        """
+        Return the dict of field values cached for the block ``cache_key``,
+        deserializing it first if it was prefetched.
+        """
+        field_state = self._cache[cache_key]
+        if isinstance(field_state, six.string_types):
+            field_state = self._cache[cache_key] = json.loads(field_state)
+        return field_state
+
     def _cache_key_for_kvs_key(self, key):
         """
         Return the key used in this DjangoOrmFieldCache for the specified KeyValueStore key.
@@ -772,11 +812,52 @@ class FieldDataCache(object):
 
             return descriptors
 
+        if self._should_prefetch_user_state():
+            self._prefetch_user_state_for_descendents(descriptor.location, depth)
+
         with modulestore().bulk_operations(descriptor.location.course_key):
             descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
 
         self.add_descriptors_to_cache(descriptors)
 
+    def _should_prefetch_user_state(self):
+        """
+        Returns whether the user state of descendants should be prefetched
+        using the course's collected block structure.
+        """
+        return (
+            self.user.is_authenticated and
+            isinstance(self.course_id, CourseKey) and
+            PREFETCH_USER_STATE_FROM_BLOCK_STRUCTURE.is_enabled(self.course_id)
+        )
+
+    def _prefetch_user_state_for_descendents(self, usage_key, depth):
+        """
+        Prefetch the user state of the block `usage_key` and of its
+        descendants down to the given depth, as found in the course's
+        collected block structure, so that no descriptors are needed to
+        find them. Blocks that are not in the block structure, such as
+        asides, are loaded once their descriptors are added to this cache.
+        """
+        block_structure = get_course_in_cache(self.course_id)
+        if usage_key not in block_structure:
+            return
+
+        block_keys = set()
+        blocks_to_visit = [(usage_key, depth)]
+        while blocks_to_visit:
+            block_key, block_depth = blocks_to_visit.pop()
+            if block_key in block_keys:
+                continue
+            block_keys.add(block_key)
+            if block_depth is None or block_depth > 0:
+                child_depth = block_depth - 1 if block_depth is not None else None
+                blocks_to_visit.extend(
+                    (child_key, child_depth) for child_key in block_structure.get_children(block_key)
+                )
+
+        self.cache[Scope.user_state].prefetch_block_keys(block_keys)
+
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
@@ -990,6 +1071,58 @@ class ScoresClient(object):
         return client
 
 
+class BulkScoresClient(object):
+    """
+    Client for retrieving the Score information of many users in a course at
+    once, which hands out a ScoresClient for each of the users.
+    """
+    # Number of locations to query at a time, to limit the number of query parameters.
+    LOCATIONS_CHUNK_SIZE = 500
+
+    def __init__(self, course_key, user_ids):
+        self.course_key = course_key
+        self.user_ids = set(user_ids)
+        self._user_locations_to_scores = defaultdict(dict)
+        self._has_fetched = False
+
+    def fetch_scores(self, locations):
+        """Grab score information of all of the users."""
+        for locations_chunk in chunks(list(set(locations)), self.LOCATIONS_CHUNK_SIZE):
+            scores_qset = StudentModule.objects.filter(
+                student_id__in=self.user_ids,
+                course_id=self.course_key,
+                module_state_key__in=locations_chunk,
+            )
+            for user_id, location, correct, total, created in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade', 'created',
+            ):
+                # See ScoresClient.fetch_scores for why the course key is added.
+                self._user_locations_to_scores[user_id][location.map_into_course(self.course_key)] = ScoresClient.Score(
+                    correct, total, created,
+                )
+        self._has_fetched = True
+
+    def for_user(self, user_id):
+        """
+        Return a ScoresClient with the pre-fetched data of the given user.
+        """
+        if not self._has_fetched:
+            raise ValueError(u"Tried to get the scores of a user from BulkScoresClient before fetch_scores() has run.")
+        if user_id not in self.user_ids:
+            raise ValueError(u"Tried to get the scores of user {} that were not fetched.".format(user_id))
+        client = ScoresClient(self.course_key, user_id)
+        client._locations_to_scores = self._user_locations_to_scores[user_id]  # pylint: disable=protected-access
+        client._has_fetched = True  # pylint: disable=protected-access
+        return client
+
+    @classmethod
+    def create_for_locations(cls, course_id, user_ids, scorable_locations):
+        """Create a BulkScoresClient with pre-fetched data for the given users and locations."""
+        client = cls(course_id, user_ids)
+        client.fetch_scores(scorable_locations)
+        return client
+
+
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
     """
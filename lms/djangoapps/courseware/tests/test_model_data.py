@@ -6,8 +6,10 @@ Test for lms courseware app, module data (runtime data storage for XBlocks)
 import json
 from functools import partial
 
+import six
 from django.db import connections, DatabaseError
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from edx_toggles.toggles.testutils import override_waffle_flag
 from mock import Mock, patch
 from xblock.core import XBlock
 from xblock.exceptions import KeyValueMultiSaveError
@@ -23,7 +25,12 @@ from lms.djangoapps.courseware.models import (
 from lms.djangoapps.courseware.tests.factories import StudentInfoFactory
 from lms.djangoapps.courseware.tests.factories import StudentModuleFactory as cmfStudentModuleFactory
 from lms.djangoapps.courseware.tests.factories import StudentPrefsFactory, UserStateSummaryFactory, course_id, location
+from lms.djangoapps.courseware.toggles import PREFETCH_USER_STATE_FROM_BLOCK_STRUCTURE
+from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
 from common.djangoapps.student.tests.factories import UserFactory
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 
 def mock_field(scope, name):
@@ -424,3 +431,73 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+@override_waffle_flag(PREFETCH_USER_STATE_FROM_BLOCK_STRUCTURE, active=True)
+class TestPrefetchUserState(SharedModuleStoreTestCase):
+    """Tests for prefetching user_state using the course's block structure"""
+    @classmethod
+    def setUpClass(cls):
+        super(TestPrefetchUserState, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=cls.course, category='chapter')
+        cls.sequential = ItemFactory.create(parent=chapter, category='sequential')
+        cls.problem = ItemFactory.create(parent=cls.sequential, category='problem')
+        other_sequential = ItemFactory.create(parent=chapter, category='sequential')
+        cls.other_problem = ItemFactory.create(parent=other_sequential, category='problem')
+
+    def setUp(self):
+        super(TestPrefetchUserState, self).setUp()
+        self.user = UserFactory.create()
+        for problem in (self.problem, self.other_problem):
+            cmfStudentModuleFactory.create(
+                student=self.user,
+                course_id=self.course.id,
+                module_state_key=problem.location,
+                state=json.dumps({'a_field': 'a_value'}),
+            )
+
+    def cache_for_descriptor_descendents(self, usage_key):
+        """
+        Returns a FieldDataCache of the descendants of `usage_key`, along with
+        the block keys of which the user state was loaded via descriptors.
+        """
+        descriptor = modulestore().get_item(usage_key)
+        with patch.object(
+            DjangoXBlockUserStateClient, 'get_many', autospec=True, side_effect=DjangoXBlockUserStateClient.get_many,
+        ) as mock_get_many:
+            field_data_cache = FieldDataCache.cache_for_descriptor_descendents(self.course.id, self.user, descriptor)
+        loaded_block_keys = set()
+        for call_args in mock_get_many.call_args_list:
+            loaded_block_keys.update(call_args[0][2])
+        return field_data_cache, loaded_block_keys
+
+    def user_state_key(self, block):
+        return DjangoKeyValueStore.Key(Scope.user_state, self.user.id, block.location, 'a_field')
+
+    def test_prefetch_descendents(self):
+        field_data_cache, loaded_block_keys = self.cache_for_descriptor_descendents(self.sequential.location)
+        self.assertNotIn(self.problem.location, loaded_block_keys)
+
+        kvs = DjangoKeyValueStore(field_data_cache)
+        with self.assertNumQueries(0):
+            self.assertEqual(kvs.get(self.user_state_key(self.problem)), 'a_value')
+            self.assertFalse(kvs.has(self.user_state_key(self.other_problem)))
+
+    def test_state_is_deserialized_on_access(self):
+        field_data_cache, _ = self.cache_for_descriptor_descendents(self.course.location)
+        user_state_cache = field_data_cache.cache[Scope.user_state]
+        DjangoKeyValueStore(field_data_cache).get(self.user_state_key(self.problem))
+
+        # pylint: disable=protected-access
+        self.assertEqual(user_state_cache._cache[self.problem.location], {'a_field': 'a_value'})
+        self.assertIsInstance(user_state_cache._cache[self.other_problem.location], six.string_types)
+
+    @override_settings(USER_STATE_BATCH_SIZE=1)
+    def test_get_many_serialized_in_chunks(self):
+        client = DjangoXBlockUserStateClient()
+        with self.assertNumQueries(2):
+            states = dict(client.get_many_serialized(
+                self.user.username, self.course.id, [self.problem.location, self.sequential.location],
+            ))
+        self.assertEqual(states, {self.problem.location: json.dumps({'a_field': 'a_value'})})
@@ -101,6 +101,22 @@ COURSEWARE_PROCTORING_IMPROVEMENTS = CourseWaffleFlag(
     WAFFLE_FLAG_NAMESPACE, 'proctoring_improvements', __name__
 )
 
+# .. toggle_name: courseware.prefetch_user_state_from_block_structure
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: Waffle flag to prefetch the user state (StudentModules) of all of the blocks being rendered
+#   with a single paginated query, using the course's collected block structure to find the blocks, rather than
+#   querying the state of the blocks found by loading their descriptors in chunks. Prefetched state is only
+#   deserialized when it is first accessed.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2020-11-02
+# .. toggle_target_removal_date: 2021-02-01
+# .. toggle_warnings: None
+# .. toggle_tickets: None
+PREFETCH_USER_STATE_FROM_BLOCK_STRUCTURE = CourseWaffleFlag(
+    WAFFLE_FLAG_NAMESPACE, 'prefetch_user_state_from_block_structure', __name__
+)
+
 
 def course_exit_page_is_active(course_key):
     return (
@@ -19,7 +19,7 @@ from edx_django_utils import monitoring as monitoring_utils
 from edx_user_state_client.interface import XBlockUserState, XBlockUserStateClient
 from xblock.fields import Scope
 
-from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule
+from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule, chunks
 
 try:
     import simplejson as json
@@ -209,6 +209,45 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         duration = (finish_time - evt_time) * 1000  # milliseconds
         self._nr_stat_accumulate('get_many', 'duration', duration)
 
+    def get_many_serialized(self, username, course_key, block_keys):
+        """
+        Retrieve the stored XBlock state for the specified XBlock usages of a
+        course, without deserializing it.
+
+        The states are read in chunks of ``USER_STATE_BATCH_SIZE`` block keys,
+        without loading the StudentModule objects.
+
+        Arguments:
+            username: The name of the user whose state should be retrieved
+            course_key (CourseKey): The course of the xblock states to load.
+            block_keys ([UsageKey]): UsageKeys identifying which xblock states to load.
+
+        Yields:
+            (usage_key, state) tuples for each specified UsageKey in block_keys that
+            has stored state, where state is the JSON serialized dict of its fields.
+        """
+        block_keys = set(block_keys)
+        evt_time = time()
+
+        self._nr_stat_increment('get_many_serialized', 'calls')
+        self._nr_stat_accumulate('get_many_serialized', 'blocks_requested', len(block_keys))
+
+        for block_keys_chunk in chunks(block_keys, settings.USER_STATE_BATCH_SIZE):
+            modules = StudentModule.objects.filter(
+                student__username=username,
+                course_id=course_key,
+                module_state_key__in=block_keys_chunk,
+            ).values_list('module_state_key', 'state')
+
+            for module_state_key, state in modules:
+                # See get_many for the semantics of None and empty states.
+                if state is None or state == '{}':
+                    continue
+                yield module_state_key.map_into_course(course_key), state
+
+        duration = (time() - evt_time) * 1000  # milliseconds
+        self._nr_stat_accumulate('get_many_serialized', 'duration', duration)
+
     def set_many(self, username, block_keys_to_state, scope=Scope.user_state):
         """
         Set fields for a particular XBlock.
@@ -6,7 +6,13 @@ Defines grading configuration.
 from django.conf import settings
 
 from lms.djangoapps.grades.config.models import PersistentGradesEnabledFlag
-from lms.djangoapps.grades.config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT
+from lms.djangoapps.grades.config.waffle import (
+    ASSUME_ZERO_GRADE_IF_ABSENT,
+    BULK_FETCH_SCORES,
+    GRADE_MATRIX,
+    SHARE_COURSE_BLOCKS_TRANSFORMS,
+    VERIFY_INCREMENTAL_COURSE_GRADES
+)
 from lms.djangoapps.grades.config.waffle import waffle as waffle_func
 
 
@@ -27,3 +33,43 @@ def should_persist_grades(course_key):
     Returns whether grades should be persisted.
     """
     return PersistentGradesEnabledFlag.feature_enabled(course_key)
+
+
+def should_share_course_blocks_transforms():
+    """
+    Returns whether the transformed course blocks should be shared
+    amongst users with the same access when grading many users.
+    """
+    return waffle_func().is_enabled(SHARE_COURSE_BLOCKS_TRANSFORMS)
+
+
+def should_bulk_fetch_scores():
+    """
+    Returns whether the scores of many users should be fetched at once
+    when grading many users.
+    """
+    return waffle_func().is_enabled(BULK_FETCH_SCORES)
+
+
+def should_grade_matrix():
+    """
+    Returns whether the course grades of a batch of users should be
+    computed at once when recomputing the grades of many users.
+    """
+    return waffle_func().is_enabled(GRADE_MATRIX)
+
+
+def should_update_course_grades_incrementally():
+    """
+    Returns whether course grades should be updated incrementally
+    when a single subsection grade changes.
+    """
+    return settings.FEATURES.get('ENABLE_INCREMENTAL_COURSE_GRADE_UPDATES', False)
+
+
+def should_verify_incremental_course_grades():
+    """
+    Returns whether incrementally updated course grades should be
+    verified against a full recomputation.
+    """
+    return waffle_func().is_enabled(VERIFY_INCREMENTAL_COURSE_GRADES)
@@ -34,6 +34,55 @@ ASSUME_ZERO_GRADE_IF_ABSENT = u'assume_zero_grade_if_absent'
 # .. toggle_warnings: None
 # .. toggle_tickets: https://github.com/edx/edx-platform/pull/15733
 DISABLE_REGRADE_ON_POLICY_CHANGE = u'disable_regrade_on_policy_change'
+# .. toggle_name: grades.share_course_blocks_transforms
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, grading many users at once (for example, in grade reports) transforms the
+#   course blocks once per distinct combination of access rules, such as the user's partition groups and content
+#   library selections, and shares the transformed course blocks amongst the users with that combination, instead of
+#   transforming the course blocks separately for every user.
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: None
+# .. toggle_warnings: None
+# .. toggle_tickets: None
+SHARE_COURSE_BLOCKS_TRANSFORMS = u'share_course_blocks_transforms'
+# .. toggle_name: grades.bulk_fetch_scores
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, grading many users at once (for example, in grade reports) fetches the
+#   StudentModule and Submissions API scores of a batch of users with a few queries, instead of querying the scores
+#   of every user separately.
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: None
+# .. toggle_warnings: None
+# .. toggle_tickets: None
+BULK_FETCH_SCORES = u'bulk_fetch_scores'
+# .. toggle_name: grades.verify_incremental_course_grades
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, every incrementally updated course grade is compared against a full
+#   recomputation of the course grade. Mismatches are logged, and the fully recomputed course grade is used instead.
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: None
+# .. toggle_warnings: This undoes the savings of incremental course grade updates, so it is only meant to be enabled
+#   temporarily, while verifying the ENABLE_INCREMENTAL_COURSE_GRADE_UPDATES feature.
+# .. toggle_tickets: None
+VERIFY_INCREMENTAL_COURSE_GRADES = u'verify_incremental_course_grades'
+# .. toggle_name: grades.grade_matrix
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled along with grades.bulk_fetch_scores, recomputing the course grades of many users
+#   at once (for example, when regrading a whole course) applies the course's grader to a batch of users at once with
+#   NumPy, instead of applying it to every user separately.
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: None
+# .. toggle_warnings: None
+# .. toggle_tickets: None
+GRADE_MATRIX = u'grade_matrix'
 
 # Course Flags
 
@@ -6,6 +6,7 @@ CourseGrade Class
 from abc import abstractmethod
 from collections import OrderedDict, defaultdict
 
+import numpy
 import six
 from ccx_keys.locator import CCXLocator
 from django.conf import settings
@@ -14,6 +15,7 @@ from lazy import lazy
 
 from openedx.core.lib.grade_utils import round_away_from_zero
 from xmodule import block_metadata_utils
+from xmodule.graders import GradeMatrix
 
 from .config import assume_zero_if_absent
 from .scores import compute_percent
@@ -291,6 +293,83 @@ class CourseGrade(CourseGradeBase):
             # Pass read_only here so the subsection grades can be persisted in bulk at the end.
             return self._subsection_grade_factory.create(subsection, read_only=True)
 
+    @classmethod
+    def update_many(cls, course_grades):
+        """
+        Updates the grades of the given CourseGrades, which must all be
+        for the same version of a course, at once, as update would update
+        each of them.
+        """
+        if not course_grades:
+            return course_grades
+
+        subsection_grades = [
+            {
+                location: subsection_grade
+                for subsections in six.itervalues(course_grade.graded_subsections_by_format)
+                for location, subsection_grade in six.iteritems(subsections)
+            }
+            for course_grade in course_grades
+        ]
+
+        # The columns of the matrix are the graded subsections of any of
+        # the users, in course order.
+        course_data = course_grades[0].course_data
+        structure = course_data.collected_structure
+        course_order = {
+            subsection_key: index
+            for index, subsection_key in enumerate(
+                subsection_key
+                for chapter_key in structure.get_children(structure.root_block_usage_key)
+                for subsection_key in structure.get_children(chapter_key)
+            )
+        }
+        locations = sorted(
+            set(location for grades in subsection_grades for location in grades),
+            key=lambda location: course_order[location],
+        )
+
+        subsections = []
+        earned = numpy.zeros((len(course_grades), len(locations)))
+        possible = numpy.zeros((len(course_grades), len(locations)))
+        for column, location in enumerate(locations):
+            subsection = None
+            for row, grades in enumerate(subsection_grades):
+                subsection_grade = grades.get(location)
+                if subsection_grade is not None:
+                    if subsection is None:
+                        subsection = subsection_grade
+                    earned[row, column] = subsection_grade.graded_total.earned
+                    possible[row, column] = subsection_grade.graded_total.possible
+            subsections.append((subsection.format, subsection.display_name))
+
+        __, percents, letter_grades, passed = cls.grade_matrix(
+            course_data.course,
+            GradeMatrix(subsections, earned, possible),
+        )
+        for index, course_grade in enumerate(course_grades):
+            course_grade.percent = float(percents[index])
+            course_grade.letter_grade = letter_grades[index]
+            course_grade.passed = bool(passed[index])
+        return course_grades
+
+    @classmethod
+    def grade_matrix(cls, course, grade_matrix):
+        """
+        Grades all of the users of the given GradeMatrix at once, as update
+        would grade each of them.
+
+        Returns a tuple of the course grader's GradeMatrixResult, and NumPy
+        arrays of the users' percents, letter grades and whether they passed.
+        """
+        course = cls._prep_course_for_grading(course)
+        grader_result = course.grader.grade_matrix(grade_matrix)
+        grade_cutoffs = course.grade_cutoffs
+        percents = cls._compute_percents(grader_result.percent)
+        letter_grades = cls._compute_letter_grades(grade_cutoffs, percents)
+        passed = cls._compute_passed_many(grade_cutoffs, percents)
+        return grader_result, percents, letter_grades, passed
+
     @staticmethod
     def _compute_percent(grader_result):
         """
@@ -329,6 +408,41 @@ class CourseGrade(CourseGradeBase):
         success_cutoff = min(nonzero_cutoffs) if nonzero_cutoffs else None
         return success_cutoff and percent >= success_cutoff
 
+    @staticmethod
+    def _compute_percents(grader_percents):
+        """
+        Vectorized equivalent of _compute_percent, given the percents of
+        the grader's GradeMatrixResult.
+        """
+        # Rounds away from zero, like round_away_from_zero.
+        percents = grader_percents * 100 + 0.05
+        return numpy.where(percents >= 0, numpy.floor(percents + 0.5), numpy.ceil(percents - 0.5)) / 100
+
+    @staticmethod
+    def _compute_letter_grades(grade_cutoffs, percents):
+        """
+        Vectorized equivalent of _compute_letter_grade.
+        """
+        letter_grades = numpy.full(len(percents), None, dtype=object)
+
+        # Assign the grades in ascending order of score, so that each
+        # percent ends up with the highest grade it reaches.
+        descending_grades = sorted(grade_cutoffs, key=lambda x: grade_cutoffs[x], reverse=True)
+        for possible_grade in reversed(descending_grades):
+            letter_grades[percents >= grade_cutoffs[possible_grade]] = possible_grade
+
+        return letter_grades
+
+    @staticmethod
+    def _compute_passed_many(grade_cutoffs, percents):
+        """
+        Vectorized equivalent of _compute_passed.
+        """
+        nonzero_cutoffs = [cutoff for cutoff in grade_cutoffs.values() if cutoff > 0]
+        if not nonzero_cutoffs:
+            return numpy.zeros(len(percents), dtype=bool)
+        return percents >= min(nonzero_cutoffs)
+
 
 def _uniqueify_and_keep_order(iterable):
     return list(OrderedDict([(item, None) for item in iterable]).keys())
@@ -0,0 +1,188 @@
+"""
+CourseGradeAggregate Class
+"""
+
+
+from collections import OrderedDict, defaultdict, namedtuple
+
+import six
+from django.conf import settings
+from django.core.cache import cache
+
+from xmodule.graders import AggregatedScore
+
+from .course_grade import CourseGrade
+from .scores import compute_percent
+
+# The graded totals of a single subsection, as kept in the aggregate.
+_SubsectionTotals = namedtuple(
+    '_SubsectionTotals', ['format', 'graded', 'display_name', 'earned', 'possible', 'attempted'],
+)
+
+
+class CourseGradeAggregate(object):
+    """
+    The graded totals of all of a user's subsections in a course, grouped
+    by assignment type by the grader, from which the course grade can be
+    computed without reading any subsection grades.
+
+    The aggregate is kept in the django cache, so that a change to a
+    single subsection grade only needs to update that subsection's
+    totals before recomputing the course grade.
+    """
+    # The aggregate is dropped after a day, so that it is eventually
+    # refreshed from a full recomputation of the course grade.
+    CACHE_TIMEOUT = 60 * 60 * 24
+
+    def __init__(self, user, course_data, subsection_totals):
+        self.user = user
+        self.course_data = course_data
+        # OrderedDict of subsection locations to _SubsectionTotals, in course order.
+        self._subsection_totals = subsection_totals
+
+    @classmethod
+    def from_course_grade(cls, course_grade):
+        """
+        Returns the aggregate of the subsection grades of the given fully
+        computed CourseGrade.
+        """
+        subsection_totals = OrderedDict()
+        for chapter in six.itervalues(course_grade.chapter_grades):
+            for subsection_grade in chapter['sections']:
+                subsection_totals[six.text_type(subsection_grade.location)] = _get_subsection_totals(subsection_grade)
+        return cls(course_grade.user, course_grade.course_data, subsection_totals)
+
+    @classmethod
+    def read(cls, user, course_data):
+        """
+        Returns the cached aggregate for the given user and course,
+        or None if it is not cached.
+        """
+        subsection_totals = cache.get(cls._cache_key(user, course_data))
+        if subsection_totals is None:
+            return None
+        return cls(user, course_data, subsection_totals)
+
+    @classmethod
+    def delete(cls, user, course_data):
+        """
+        Drops the cached aggregate for the given user and course.
+        """
+        cache.delete(cls._cache_key(user, course_data))
+
+    def save(self):
+        """
+        Caches this aggregate.
+        """
+        cache.set(self._cache_key(self.user, self.course_data), self._subsection_totals, self.CACHE_TIMEOUT)
+
+    def update_subsection_grade(self, subsection_grade):
+        """
+        Replaces the totals of the given subsection grade's subsection.
+        Returns False if the subsection is not part of this aggregate,
+        for example when the user's access to the course changed.
+        """
+        location = six.text_type(subsection_grade.location)
+        if location not in self._subsection_totals:
+            return False
+        self._subsection_totals[location] = _get_subsection_totals(subsection_grade)
+        return True
+
+    @property
+    def attempted(self):
+        """
+        Returns whether any of the subsections in this aggregate
+        have been attempted by the user.
+        """
+        return any(totals.attempted for totals in six.itervalues(self._subsection_totals))
+
+    @property
+    def graded_subsections_by_format(self):
+        """
+        Returns the graded subsections in a dict keyed by subsection
+        format types, as expected by the course grader.
+        """
+        subsections_by_format = defaultdict(OrderedDict)
+        for location, totals in six.iteritems(self._subsection_totals):
+            if totals.graded and totals.possible > 0:
+                subsections_by_format[totals.format][location] = _AggregatedSubsectionGrade(totals)
+        return subsections_by_format
+
+    def create_course_grade(self):
+        """
+        Returns the CourseGrade computed from this aggregate.
+        """
+        course = CourseGrade._prep_course_for_grading(self.course_data.course)  # pylint: disable=protected-access
+        grader_result = course.grader.grade(
+            self.graded_subsections_by_format,
+            generate_random_scores=settings.GENERATE_PROFILE_SCORES,
+        )
+        grade_cutoffs = course.grade_cutoffs
+        percent = CourseGrade._compute_percent(grader_result)  # pylint: disable=protected-access
+        course_grade = CourseGrade(
+            self.user,
+            self.course_data,
+            percent,
+            CourseGrade._compute_letter_grade(grade_cutoffs, percent),  # pylint: disable=protected-access
+            CourseGrade._compute_passed(grade_cutoffs, percent),  # pylint: disable=protected-access
+        )
+        course_grade.grader_result = grader_result
+        return course_grade
+
+    @staticmethod
+    def _cache_key(user, course_data):
+        return u'grades.course_grade_aggregate.{}.{}.{}.{}'.format(
+            user.id,
+            course_data.course_key,
+            course_data.version,
+            course_data.grading_policy_hash,
+        )
+
+
+class _AggregatedSubsectionGrade(object):
+    """
+    The subset of a subsection grade's interface used by the course
+    grader, built from the subsection's cached totals.
+    """
+    def __init__(self, totals):
+        self.display_name = totals.display_name
+        self.format = totals.format
+        self.graded = totals.graded
+        self.graded_total = AggregatedScore(
+            tw_earned=totals.earned,
+            tw_possible=totals.possible,
+            graded=True,
+            first_attempted=None,
+        )
+
+    @property
+    def percent_graded(self):
+        return compute_percent(self.graded_total.earned, self.graded_total.possible)
+
+
+def _get_subsection_totals(subsection_grade):
+    """
+    Returns the _SubsectionTotals of the given subsection grade.
+    """
+    graded_total = subsection_grade.graded_total
+    return _SubsectionTotals(
+        format=subsection_grade.format,
+        graded=subsection_grade.graded,
+        display_name=subsection_grade.display_name,
+        earned=graded_total.earned,
+        possible=graded_total.possible,
+        attempted=subsection_grade.all_total.first_attempted is not None,
+    )
+
+
+def check_course_grade(course_grade):
+    """
+    Compares the given incrementally updated course grade against a full
+    recomputation of the course grade, without persisting the latter.
+    Returns the names of the fields of the course grade which differ.
+    """
+    full_course_grade = CourseGrade(course_grade.user, course_grade.course_data).update()
+    return [
+        field for field in ('percent', 'letter_grade', 'passed')
+        if getattr(course_grade, field) != getattr(full_course_grade, field)
+    ]
@@ -4,22 +4,36 @@ Course Grade Factory Class
 
 
 from collections import namedtuple
+from itertools import islice
 from logging import getLogger
 
 import six
+from django.conf import settings
+from django.db import transaction
 from six import text_type
 
+from lms.djangoapps.course_blocks.api import get_course_blocks_getter
 from openedx.core.djangoapps.signals.signals import (
     COURSE_GRADE_CHANGED,
     COURSE_GRADE_NOW_FAILED,
     COURSE_GRADE_NOW_PASSED
 )
 
-from .config import assume_zero_if_absent, should_persist_grades
+from .config import (
+    assume_zero_if_absent,
+    should_bulk_fetch_scores,
+    should_grade_matrix,
+    should_persist_grades,
+    should_share_course_blocks_transforms,
+    should_update_course_grades_incrementally,
+    should_verify_incremental_course_grades
+)
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
+from .course_grade_aggregate import CourseGradeAggregate, check_course_grade
 from .models import PersistentCourseGrade
 from .models_api import prefetch_grade_overrides_and_visible_blocks
+from .subsection_grade_factory import SubsectionGradeFactory
 
 log = getLogger(__name__)
 
@@ -30,6 +44,10 @@ class CourseGradeFactory(object):
     """
     GradeResult = namedtuple('GradeResult', ['student', 'course_grade', 'error'])
 
+    # Number of users whose scores are fetched at once when iterating
+    # over many users.
+    SCORES_BATCH_SIZE = 100
+
     def read(
             self,
             user,
@@ -83,6 +101,29 @@ class CourseGradeFactory(object):
             force_update_subsections=force_update_subsections
         )
 
+    def update_for_subsection(
+            self,
+            user,
+            subsection_grade,
+            course=None,
+            course_structure=None,
+    ):
+        """
+        Updates and returns the CourseGrade for the given user in the
+        course, after the grade of a single subsection changed to the
+        given subsection grade.
+
+        The course grade is updated incrementally from the cached totals
+        of the user's other subsections if possible. Otherwise, it is
+        fully recomputed.
+        """
+        course_data = CourseData(user, course, structure=course_structure)
+        if should_persist_grades(course_data.course_key) and should_update_course_grades_incrementally():
+            course_grade = self._update_incrementally(user, course_data, subsection_grade)
+            if course_grade is not None:
+                return course_grade
+        return self._update(user, course_data)
+
     def iter(
             self,
             users,
@@ -109,10 +150,40 @@ class CourseGradeFactory(object):
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
         stats_tags = [u'action:{}'.format(course_data.course_key)]
-        for user in users:
-            yield self._iter_grade_result(user, course_data, force_update)
 
-    def _iter_grade_result(self, user, course_data, force_update):
+        # Optimization: users with the same access to the course blocks
+        # share the transform of the collected course_structure.
+        get_course_blocks = None
+        if should_share_course_blocks_transforms():
+            get_course_blocks = get_course_blocks_getter(course_data.location, course_data.collected_structure)
+
+        if not should_bulk_fetch_scores():
+            for user in users:
+                yield self._iter_grade_result(user, course_data, force_update, get_course_blocks)
+            return
+
+        # Optimization: the course grades of a batch of users are
+        # computed at once. Random profiling scores are only generated
+        # when grading each user.
+        grade_matrix = force_update and should_grade_matrix() and not settings.GENERATE_PROFILE_SCORES
+
+        # Optimization: the scores of a batch of users are fetched at once.
+        users = iter(users)
+        user_batch = list(islice(users, self.SCORES_BATCH_SIZE))
+        while user_batch:
+            SubsectionGradeFactory.prefetch_scores(course_data, user_batch)
+            try:
+                if grade_matrix:
+                    for result in self._iter_updated_grade_results(user_batch, course_data, get_course_blocks):
+                        yield result
+                else:
+                    for user in user_batch:
+                        yield self._iter_grade_result(user, course_data, force_update, get_course_blocks)
+            finally:
+                SubsectionGradeFactory.clear_prefetched_scores(course_data.course_key)
+            user_batch = list(islice(users, self.SCORES_BATCH_SIZE))
+
+    def _iter_grade_result(self, user, course_data, force_update, get_course_blocks=None):
         try:
             kwargs = {
                 'user': user,
@@ -120,6 +191,8 @@ class CourseGradeFactory(object):
                 'collected_block_structure': course_data.collected_structure,
                 'course_key': course_data.course_key,
             }
+            if get_course_blocks:
+                kwargs['course_structure'] = get_course_blocks(user)
             if force_update:
                 kwargs['force_update_subsections'] = True
 
@@ -127,15 +200,65 @@ class CourseGradeFactory(object):
             course_grade = method(**kwargs)
             return self.GradeResult(user, course_grade, None)
         except Exception as exc:  # pylint: disable=broad-except
-            # Keep marching on even if this student couldn't be graded for
-            # some reason, but log it for future reference.
-            log.exception(
-                u'Cannot grade student %s in course %s because of exception: %s',
-                user.id,
-                course_data.course_key,
-                text_type(exc)
-            )
-            return self.GradeResult(user, None, exc)
+            return self._grade_error_result(user, course_data, exc)
+
+    def _iter_updated_grade_results(self, users, course_data, get_course_blocks=None):
+        """
+        Yields a GradeResult for every one of the given users, as
+        _iter_grade_result does with force_update, but updates the course
+        grades of all of the users at once.
+        """
+        should_persist = should_persist_grades(course_data.course_key)
+        results = []
+        for user in users:
+            try:
+                user_course_data = CourseData(
+                    user,
+                    course_data.course,
+                    course_data.collected_structure,
+                    get_course_blocks(user) if get_course_blocks else None,
+                    course_data.course_key,
+                )
+                course_grade = self._create_for_update(user, user_course_data, should_persist, True)
+                # Compute the user's subsection grades.
+                course_grade.graded_subsections_by_format  # pylint: disable=pointless-statement
+                results.append(self.GradeResult(user, course_grade, None))
+            except Exception as exc:  # pylint: disable=broad-except
+                results.append(self._grade_error_result(user, course_data, exc))
+
+        try:
+            CourseGrade.update_many([result.course_grade for result in results if result.course_grade])
+        except Exception as exc:  # pylint: disable=broad-except
+            for result in results:
+                yield result if result.error else self._grade_error_result(result.student, course_data, exc)
+            return
+
+        for result in results:
+            if result.error:
+                yield result
+                continue
+            try:
+                course_grade = self._save_update(
+                    result.student, result.course_grade.course_data, result.course_grade, should_persist,
+                )
+                yield self.GradeResult(result.student, course_grade, None)
+            except Exception as exc:  # pylint: disable=broad-except
+                yield self._grade_error_result(result.student, course_data, exc)
+
+    def _grade_error_result(self, user, course_data, exc):
+        """
+        Logs the exception with which the given user couldn't be graded,
+        and returns the GradeResult of the error.
+        """
+        # Keep marching on even if this student couldn't be graded for
+        # some reason, but log it for future reference.
+        log.exception(
+            u'Cannot grade student %s in course %s because of exception: %s',
+            user.id,
+            course_data.course_key,
+            text_type(exc)
+        )
+        return self.GradeResult(user, None, exc)
 
     @staticmethod
     def _create_zero(user, course_data):
@@ -175,30 +298,127 @@ class CourseGradeFactory(object):
         COURSE_GRADE_NOW_FAILED if learner is now failing course
         """
         should_persist = should_persist_grades(course_data.course_key)
+        course_grade = CourseGradeFactory._create_for_update(
+            user, course_data, should_persist, force_update_subsections,
+        )
+        course_grade = course_grade.update()
+        return CourseGradeFactory._save_update(user, course_data, course_grade, should_persist)
+
+    @staticmethod
+    def _create_for_update(user, course_data, should_persist, force_update_subsections=False):
+        """
+        Returns a new CourseGrade object to be updated for the given
+        user and course.
+        """
         if should_persist and force_update_subsections:
             prefetch_grade_overrides_and_visible_blocks(user, course_data.course_key)
 
-        course_grade = CourseGrade(
+        return CourseGrade(
             user,
             course_data,
             force_update_subsections=force_update_subsections
         )
-        course_grade = course_grade.update()
 
+    @staticmethod
+    def _save_update(user, course_data, course_grade, should_persist):
+        """
+        Saves and returns the given updated CourseGrade object for the
+        given user and course, and sends the signals of _update.
+        """
         should_persist = should_persist and course_grade.attempted
         if should_persist:
             course_grade._subsection_grade_factory.bulk_create_unsaved()
-            PersistentCourseGrade.update_or_create(
-                user_id=user.id,
-                course_id=course_data.course_key,
-                course_version=course_data.version,
-                course_edited_timestamp=course_data.edited_on,
-                grading_policy_hash=course_data.grading_policy_hash,
-                percent_grade=course_grade.percent,
-                letter_grade=course_grade.letter_grade or "",
-                passed=course_grade.passed,
-            )
+            CourseGradeFactory._persist(user, course_data, course_grade)
 
+        if should_update_course_grades_incrementally():
+            # Refresh the totals from which later changes to single
+            # subsection grades update the course grade.
+            if should_persist:
+                CourseGradeAggregate.from_course_grade(course_grade).save()
+            else:
+                CourseGradeAggregate.delete(user, course_data)
+
+        CourseGradeFactory._send_signals(user, course_data, course_grade)
+
+        log.info(
+            u'Grades: Update, %s, User: %s, %s, persisted: %s',
+            course_data.full_string(), user.id, course_grade, should_persist,
+        )
+
+        return course_grade
+
+    @staticmethod
+    def _update_incrementally(user, course_data, subsection_grade):
+        """
+        Updates the CourseGrade for the given user and course from the
+        cached totals of the user's subsections, replacing only the
+        totals of the given subsection grade's subsection.
+        Returns None if the course grade must be fully recomputed instead.
+        """
+        with transaction.atomic():
+            # Lock the user's persisted course grade, so that concurrent
+            # updates of the user's subsection grades don't overwrite
+            # each other's changes to the cached totals.
+            try:
+                PersistentCourseGrade.objects.select_for_update().get(
+                    user_id=user.id,
+                    course_id=course_data.course_key,
+                )
+            except PersistentCourseGrade.DoesNotExist:
+                return None
+
+            aggregate = CourseGradeAggregate.read(user, course_data)
+            if aggregate is None or not aggregate.update_subsection_grade(subsection_grade):
+                return None
+            if not (aggregate.attempted or assume_zero_if_absent(course_data.course_key)):
+                return None
+
+            course_grade = aggregate.create_course_grade()
+            if should_verify_incremental_course_grades():
+                mismatched_fields = check_course_grade(course_grade)
+                if mismatched_fields:
+                    log.warning(
+                        u'Grades: Incremental update mismatch, %s, User: %s, %s, fields: %s',
+                        course_data.full_string(), user.id, course_grade, mismatched_fields,
+                    )
+                    CourseGradeAggregate.delete(user, course_data)
+                    return None
+
+            CourseGradeFactory._persist(user, course_data, course_grade)
+            aggregate.save()
+
+        CourseGradeFactory._send_signals(user, course_data, course_grade)
+
+        log.info(
+            u'Grades: Incremental update, %s, User: %s, %s',
+            course_data.full_string(), user.id, course_grade,
+        )
+
+        return course_grade
+
+    @staticmethod
+    def _persist(user, course_data, course_grade):
+        """
+        Saves the given CourseGrade for the given user and course.
+        """
+        PersistentCourseGrade.update_or_create(
+            user_id=user.id,
+            course_id=course_data.course_key,
+            course_version=course_data.version,
+            course_edited_timestamp=course_data.edited_on,
+            grading_policy_hash=course_data.grading_policy_hash,
+            percent_grade=course_grade.percent,
+            letter_grade=course_grade.letter_grade or "",
+            passed=course_grade.passed,
+        )
+
+    @staticmethod
+    def _send_signals(user, course_data, course_grade):
+        """
+        Sends a COURSE_GRADE_CHANGED signal to listeners and
+        COURSE_GRADE_NOW_PASSED if learner has passed course or
+        COURSE_GRADE_NOW_FAILED if learner is now failing course
+        """
         COURSE_GRADE_CHANGED.send_robust(
             sender=None,
             user=user,
@@ -219,10 +439,3 @@ class CourseGradeFactory(object):
                 course_id=course_data.course_key,
                 grade=course_grade,
             )
-
-        log.info(
-            u'Grades: Update, %s, User: %s, %s, persisted: %s',
-            course_data.full_string(), user.id, course_grade, should_persist,
-        )
-
-        return course_grade
@@ -248,7 +248,9 @@ def recalculate_course_grade_only(sender, course, course_structure, user, **kwar
     Updates a saved course grade, but does not update the subsection
     grades the user has in this course.
     """
-    CourseGradeFactory().update(user, course=course, course_structure=course_structure)
+    CourseGradeFactory().update_for_subsection(
+        user, kwargs['subsection_grade'], course=course, course_structure=course_structure,
+    )
 
 
 @receiver(ENROLLMENT_TRACK_UPDATED)
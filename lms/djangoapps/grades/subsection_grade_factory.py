@@ -3,18 +3,21 @@ SubsectionGrade Factory Class
 """
 
 
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from logging import getLogger
 
 from lazy import lazy
 from submissions import api as submissions_api
+from submissions.models import ScoreSummary
+from submissions.serializers import UnannotatedScoreSerializer
 
-from lms.djangoapps.courseware.model_data import ScoresClient
+from lms.djangoapps.courseware.model_data import BulkScoresClient, ScoresClient
 from lms.djangoapps.grades.config import assume_zero_if_absent, should_persist_grades
 from lms.djangoapps.grades.models import PersistentSubsectionGrade
 from lms.djangoapps.grades.scores import possibly_scored
+from openedx.core.lib.cache_utils import get_cache
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
-from common.djangoapps.student.models import anonymous_id_for_user
+from common.djangoapps.student.models import AnonymousUserId, anonymous_id_for_user
 
 from .course_data import CourseData
 from .subsection_grade import CreateSubsectionGrade, ReadSubsectionGrade, ZeroSubsectionGrade
@@ -26,6 +29,8 @@ class SubsectionGradeFactory(object):
     """
     Factory for Subsection Grades.
     """
+    _PREFETCHED_SCORES_CACHE_NAMESPACE = u'grades.subsection_grade_factory.prefetched_scores'
+
     def __init__(self, student, course=None, course_structure=None, course_data=None):
         self.student = student
         self.course_data = course_data or CourseData(student, course=course, structure=course_structure)
@@ -106,12 +111,36 @@ class SubsectionGradeFactory(object):
 
         return calculated_grade
 
+    @classmethod
+    def prefetch_scores(cls, course_data, users):
+        """
+        Prefetches the scores stored in the user state (in CSM) and by the
+        Submissions API of the given users in the course, for use by the
+        subsection grade factories of those users until the scores are
+        cleared with clear_prefetched_scores. The scores of all of the users
+        are fetched at once, when first needed for one of them.
+        """
+        get_cache(cls._PREFETCHED_SCORES_CACHE_NAMESPACE)[str(course_data.course_key)] = _PrefetchedScores(
+            course_data, users,
+        )
+
+    @classmethod
+    def clear_prefetched_scores(cls, course_key):
+        """
+        Clears the prefetched scores of the course.
+        """
+        get_cache(cls._PREFETCHED_SCORES_CACHE_NAMESPACE).pop(str(course_key), None)
+
     @lazy
     def _csm_scores(self):
         """
         Lazily queries and returns all the scores stored in the user
         state (in CSM) for the course, while caching the result.
         """
+        prefetched_scores = self._get_prefetched_scores()
+        if prefetched_scores is not None:
+            return prefetched_scores.csm_scores.for_user(self.student.id)
+
         scorable_locations = [block_key for block_key in self.course_data.structure if possibly_scored(block_key)]
         return ScoresClient.create_for_locations(self.course_data.course_key, self.student.id, scorable_locations)
 
@@ -121,9 +150,23 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        prefetched_scores = self._get_prefetched_scores()
+        if prefetched_scores is not None:
+            return prefetched_scores.submissions_scores[self.student.id]
+
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
+    def _get_prefetched_scores(self):
+        """
+        Returns the prefetched scores of the course if they include the
+        scores of the student, or None otherwise.
+        """
+        prefetched_scores = get_cache(self._PREFETCHED_SCORES_CACHE_NAMESPACE).get(str(self.course_data.course_key))
+        if prefetched_scores is not None and self.student.id in prefetched_scores.user_ids:
+            return prefetched_scores
+        return None
+
     def _get_bulk_cached_grade(self, subsection):
         """
         Returns the student's SubsectionGrade for the subsection,
@@ -169,3 +212,69 @@ class SubsectionGradeFactory(object):
             getattr(subsection, 'subtree_edited_on', None),
             self.student.id,
         ))
+
+
+class _PrefetchedScores(object):
+    """
+    The scores of a batch of users in a course, which are fetched for all
+    of the users at once.
+    """
+    def __init__(self, course_data, users):
+        self.course_data = course_data
+        self.users = users
+        self.user_ids = {user.id for user in users}
+
+    @lazy
+    def csm_scores(self):
+        """
+        Returns a BulkScoresClient of the scores stored in the user state
+        (in CSM) of the users, for all scorable blocks in the course.
+        """
+        scorable_locations = [
+            block_key for block_key in self.course_data.collected_structure if possibly_scored(block_key)
+        ]
+        return BulkScoresClient.create_for_locations(self.course_data.course_key, self.user_ids, scorable_locations)
+
+    @lazy
+    def submissions_scores(self):
+        """
+        Returns a dict mapping the id of each of the users to their scores
+        stored by the Submissions API for the course.
+        """
+        return _get_submissions_scores_for_users(self.course_data.course_key, self.users)
+
+
+def _get_submissions_scores_for_users(course_key, users):
+    """
+    Returns a dict mapping the id of each of the given users to their scores
+    stored by the Submissions API for the course, in the format returned by
+    submissions_api.get_scores, using a couple of queries for all of the users.
+    """
+    anonymous_user_ids = defaultdict(list)
+    for user_id, anonymous_user_id in AnonymousUserId.objects.filter(
+        user_id__in=[user.id for user in users],
+        course_id=course_key,
+    ).values_list('user_id', 'anonymous_user_id'):
+        anonymous_user_ids[user_id].append(anonymous_user_id)
+
+    # Users without an anonymous id in the course have never made submissions
+    # in it. Users with several anonymous ids, created with an earlier secret
+    # key, only have their submissions with their current anonymous id used.
+    user_ids_by_anonymous_id = {}
+    for user in users:
+        if len(anonymous_user_ids[user.id]) == 1:
+            user_ids_by_anonymous_id[anonymous_user_ids[user.id][0]] = user.id
+        elif anonymous_user_ids[user.id]:
+            user_ids_by_anonymous_id[anonymous_id_for_user(user, course_key)] = user.id
+
+    scores = {user.id: {} for user in users}
+    score_summaries = ScoreSummary.objects.filter(
+        student_item__course_id=str(course_key),
+        student_item__student_id__in=list(user_ids_by_anonymous_id),
+    ).select_related('latest', 'latest__submission', 'student_item')
+    for summary in score_summaries:
+        # As in submissions_api.get_scores, hidden scores are excluded.
+        if not summary.latest.is_hidden():
+            user_id = user_ids_by_anonymous_id[summary.student_item.student_id]
+            scores[user_id][summary.student_item.item_id] = UnannotatedScoreSerializer(summary.latest).data
+    return scores
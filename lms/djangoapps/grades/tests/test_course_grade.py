@@ -9,14 +9,15 @@ from openedx.core.djangolib.testing.utils import get_mock_request
 from common.djangoapps.student.models import CourseEnrollment
 from common.djangoapps.student.tests.factories import UserFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.graders import GradeMatrix
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, waffle_switch
 from ..course_data import CourseData
-from ..course_grade import ZeroCourseGrade
+from ..course_grade import CourseGrade, ZeroCourseGrade
 from ..course_grade_factory import CourseGradeFactory
 from .base import GradeTestBase
-from .utils import answer_problem
+from .utils import answer_problem, mock_get_score
 
 
 @patch.dict(settings.FEATURES, {'ASSUME_ZERO_GRADE_IF_ABSENT_FOR_ALL_TESTS': False})
@@ -57,6 +58,43 @@ class ZeroGradeTest(GradeTestBase):
                         self.assertEqual({}, section.problem_scores)
 
 
+class GradeMatrixTest(GradeTestBase):
+    """
+    Tests that grading many users at once with a GradeMatrix gives the
+    same course grades as grading each user.
+    """
+    def test_grade_matrix(self):
+        course_grades = []
+        for earned in (0, 1, 2):
+            user = UserFactory.create()
+            CourseEnrollment.enroll(user, self.course.id)
+            with mock_get_score(earned, 2):
+                course_grades.append(
+                    CourseGradeFactory().update(user, self.course, force_update_subsections=True)
+                )
+
+        subsection_locations = [self.sequence.location, self.sequence2.location]
+        subsections, earned, possible = [], [], []
+        for location in subsection_locations:
+            subsection_grade = course_grades[0].subsection_grades[location]
+            subsections.append((subsection_grade.format, subsection_grade.display_name))
+        for course_grade in course_grades:
+            graded_totals = [course_grade.subsection_grades[location].graded_total for location in subsection_locations]
+            earned.append([graded_total.earned for graded_total in graded_totals])
+            possible.append([graded_total.possible for graded_total in graded_totals])
+
+        grader_result, percents, letter_grades, passed = CourseGrade.grade_matrix(
+            self.course, GradeMatrix(subsections, earned, possible),
+        )
+
+        self.assertEqual(list(percents), [course_grade.percent for course_grade in course_grades])
+        self.assertEqual(list(letter_grades), [None, u'Pass', u'Pass'])
+        self.assertEqual(list(letter_grades), [course_grade.letter_grade for course_grade in course_grades])
+        self.assertEqual(list(passed), [bool(course_grade.passed) for course_grade in course_grades])
+        for index, course_grade in enumerate(course_grades):
+            self.assertEqual(grader_result.summary(index), course_grade.grader_result)
+
+
 class TestScoreForModule(SharedModuleStoreTestCase):
     """
     Test the method that calculates the score for a given block based on the
@@ -7,18 +7,28 @@ import itertools
 
 import ddt
 from django.conf import settings
+from django.test.utils import override_settings
 from mock import patch
 from six import text_type
 from edx_toggles.toggles.testutils import override_waffle_switch
 from lms.djangoapps.courseware.access import has_access
+from lms.djangoapps.courseware.model_data import ScoresClient
+from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
 from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
 from common.djangoapps.student.tests.factories import UserFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 
-from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, waffle_switch
+from ..config.waffle import (
+    ASSUME_ZERO_GRADE_IF_ABSENT,
+    BULK_FETCH_SCORES,
+    GRADE_MATRIX,
+    VERIFY_INCREMENTAL_COURSE_GRADES,
+    waffle_switch
+)
 from ..course_grade import CourseGrade, ZeroCourseGrade
+from ..course_grade_aggregate import CourseGradeAggregate
 from ..course_grade_factory import CourseGradeFactory
 from ..subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
 from .base import GradeTestBase
@@ -187,6 +197,62 @@ class TestCourseGradeFactory(GradeTestBase):
             ))
         self.assertEqual(mock_update.called, force_update)
 
+    @ddt.data(True, False)
+    def test_iter_bulk_fetch_scores(self, bulk_fetch_scores):
+        other_user = UserFactory.create()
+        for user, grade in ((self.request.user, 1), (other_user, 2)):
+            StudentModuleFactory.create(
+                student=user,
+                course_id=self.course.id,
+                module_state_key=self.problem.location,
+                grade=grade,
+                max_grade=2,
+            )
+
+        with override_waffle_switch(waffle_switch(BULK_FETCH_SCORES), active=bulk_fetch_scores):
+            with patch.object(
+                ScoresClient, 'create_for_locations', wraps=ScoresClient.create_for_locations,
+            ) as mock_create_for_locations:
+                course_grades = {
+                    student: course_grade
+                    for student, course_grade, _ in CourseGradeFactory().iter(
+                        users=[self.request.user, other_user], course=self.course,
+                    )
+                }
+
+        self.assertEqual(mock_create_for_locations.called, not bulk_fetch_scores)
+        for user, expected_percent in ((self.request.user, 0.5), (other_user, 1.0)):
+            all_total = course_grades[user].subsection_grades[self.sequence.location].all_total
+            self.assertEqual(all_total.earned / all_total.possible, expected_percent)
+
+    @ddt.data(True, False)
+    def test_iter_grade_matrix(self, grade_matrix):
+        users = [self.request.user] + [UserFactory.create() for _ in range(2)]
+        for user, grade in zip(users[1:], (1, 2)):
+            StudentModuleFactory.create(
+                student=user,
+                course_id=self.course.id,
+                module_state_key=self.problem.location,
+                grade=grade,
+                max_grade=2,
+            )
+
+        with override_waffle_switch(waffle_switch(BULK_FETCH_SCORES), active=True):
+            with override_waffle_switch(waffle_switch(GRADE_MATRIX), active=grade_matrix):
+                with patch.object(CourseGrade, 'update', wraps=CourseGrade.update, autospec=True) as mock_update:
+                    results = list(CourseGradeFactory().iter(users=users, course=self.course, force_update=True))
+
+        self.assertEqual(mock_update.called, not grade_matrix)
+        self.assertEqual([result.student for result in results], users)
+        for result in results:
+            self.assertIsNone(result.error)
+            expected_grade = CourseGradeFactory().update(result.student, self.course)
+            self.assertEqual(
+                (result.course_grade.percent, result.course_grade.letter_grade, bool(result.course_grade.passed)),
+                (expected_grade.percent, expected_grade.letter_grade, bool(expected_grade.passed)),
+            )
+            self.assertEqual(CourseGradeFactory().read(result.student, self.course).percent, expected_grade.percent)
+
     def test_course_grade_summary(self):
         with mock_get_score(1, 2):
             self.subsection_grade_factory.update(self.course_structure[self.sequence.location])
@@ -243,6 +309,91 @@ class TestCourseGradeFactory(GradeTestBase):
         self.assertEqual(expected_summary, actual_summary)
 
 
+@ddt.ddt
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'incremental_course_grade_updates',
+    },
+})
+class TestIncrementalCourseGradeUpdates(GradeTestBase):
+    """
+    Test that CourseGrades are updated incrementally when a single
+    subsection grade changes.
+    """
+    def setUp(self):
+        super(TestIncrementalCourseGradeUpdates, self).setUp()
+        features_patcher = patch.dict(settings.FEATURES, {'ENABLE_INCREMENTAL_COURSE_GRADE_UPDATES': True})
+        features_patcher.start()
+        self.addCleanup(features_patcher.stop)
+        self.addCleanup(CourseGradeAggregate.delete, self.request.user, self.course_data)
+
+        # Fully compute the course grade, caching the subsection totals.
+        with mock_get_score(1, 2):
+            CourseGradeFactory().update(self.request.user, self.course, force_update_subsections=True)
+
+    def _update_for_subsection(self, earned, possible):
+        """
+        Updates the grade of the first subsection and then the course
+        grade, returning the course grade and whether it was fully
+        recomputed.
+        """
+        with mock_get_score(earned, possible):
+            subsection_grade = self.subsection_grade_factory.update(self.course_structure[self.sequence.location])
+        with patch.object(CourseGradeFactory, '_update', wraps=CourseGradeFactory._update) as mock_update:
+            course_grade = CourseGradeFactory().update_for_subsection(
+                self.request.user, subsection_grade, course=self.course, course_structure=self.course_structure,
+            )
+        return course_grade, mock_update.called
+
+    @ddt.data(True, False)
+    def test_update_incrementally(self, verify):
+        with override_waffle_switch(waffle_switch(VERIFY_INCREMENTAL_COURSE_GRADES), active=verify):
+            with patch.object(
+                CourseGrade, '_get_subsection_grade', autospec=True, side_effect=CourseGrade._get_subsection_grade,
+            ) as mock_get_subsection_grade:
+                course_grade, fully_recomputed = self._update_for_subsection(2, 2)
+
+        self.assertFalse(fully_recomputed)
+        # Subsection grades are only read to verify the course grade.
+        self.assertEqual(mock_get_subsection_grade.called, verify)
+        self.assertEqual(course_grade.percent, 0.75)
+        self.assertEqual(course_grade.letter_grade, u'Pass')
+        self.assertEqual(CourseGradeFactory().read(self.request.user, self.course).percent, 0.75)
+
+        # Later changes build on the updated subsection totals.
+        course_grade, fully_recomputed = self._update_for_subsection(0, 2)
+        self.assertFalse(fully_recomputed)
+        self.assertEqual(course_grade.percent, 0.25)
+        self.assertIsNone(course_grade.letter_grade)
+
+    def test_update_without_aggregate(self):
+        CourseGradeAggregate.delete(self.request.user, self.course_data)
+        course_grade, fully_recomputed = self._update_for_subsection(2, 2)
+        self.assertTrue(fully_recomputed)
+        self.assertEqual(course_grade.percent, 0.75)
+
+        # The full recomputation caches the subsection totals again.
+        course_grade, fully_recomputed = self._update_for_subsection(0, 2)
+        self.assertFalse(fully_recomputed)
+        self.assertEqual(course_grade.percent, 0.25)
+
+    def test_update_with_inconsistent_aggregate(self):
+        # Change the persisted subsection grade without updating the
+        # subsection totals.
+        with mock_get_score(2, 2):
+            self.subsection_grade_factory.update(self.course_structure[self.sequence2.location])
+
+        course_grade, fully_recomputed = self._update_for_subsection(1, 2)
+        self.assertFalse(fully_recomputed)
+        self.assertEqual(course_grade.percent, 0.5)
+
+        with override_waffle_switch(waffle_switch(VERIFY_INCREMENTAL_COURSE_GRADES), active=True):
+            course_grade, fully_recomputed = self._update_for_subsection(1, 2)
+        self.assertTrue(fully_recomputed)
+        self.assertEqual(course_grade.percent, 0.75)
+
+
 class TestGradeIteration(SharedModuleStoreTestCase):
     """
     Test iteration through student course grades.
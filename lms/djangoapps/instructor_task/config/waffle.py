@@ -16,6 +16,8 @@ OPTIMIZE_GET_LEARNERS_FOR_COURSE = 'optimize_get_learners_for_course'
 # Course override flags
 GENERATE_PROBLEM_GRADE_REPORT_VERIFIED_ONLY = 'generate_problem_grade_report_verified_only'
 GENERATE_COURSE_GRADE_REPORT_VERIFIED_ONLY = 'generate_course_grade_report_verified_only'
+PARALLEL_COURSE_GRADE_REPORT = 'parallel_course_grade_report'
+PARALLEL_PROBLEM_RESCORE = 'parallel_problem_rescore'
 
 
 def waffle_flags():
@@ -33,6 +35,16 @@ def waffle_flags():
             flag_name=GENERATE_COURSE_GRADE_REPORT_VERIFIED_ONLY,
             module_name=__name__,
         ),
+        PARALLEL_COURSE_GRADE_REPORT: CourseWaffleFlag(
+            waffle_namespace=INSTRUCTOR_TASK_WAFFLE_FLAG_NAMESPACE,
+            flag_name=PARALLEL_COURSE_GRADE_REPORT,
+            module_name=__name__,
+        ),
+        PARALLEL_PROBLEM_RESCORE: CourseWaffleFlag(
+            waffle_namespace=INSTRUCTOR_TASK_WAFFLE_FLAG_NAMESPACE,
+            flag_name=PARALLEL_PROBLEM_RESCORE,
+            module_name=__name__,
+        ),
     }
 
 
@@ -59,3 +71,21 @@ def course_grade_report_verified_only(course_id):
     False otherwise.
     """
     return waffle_flags()[GENERATE_COURSE_GRADE_REPORT_VERIFIED_ONLY].is_enabled(course_id)
+
+
+def parallel_course_grade_report_enabled(course_id):
+    """
+    Returns True if course grade reports should be generated by
+    subtasks that each grade a range of the enrolled users in the
+    given course, False otherwise.
+    """
+    return waffle_flags()[PARALLEL_COURSE_GRADE_REPORT].is_enabled(course_id)
+
+
+def parallel_problem_rescore_enabled(course_id):
+    """
+    Returns True if problems should be rescored for all students by
+    subtasks that each rescore a range of the submissions to the
+    problem in the given course, False otherwise.
+    """
+    return waffle_flags()[PARALLEL_PROBLEM_RESCORE].is_enabled(course_id)
@@ -20,13 +20,14 @@ import hashlib
 import json
 import logging
 import os.path
+from tempfile import TemporaryFile
 from uuid import uuid4
 
 import six
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.db import models, transaction
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext as _
@@ -196,9 +197,8 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Large reports should be written to a ReportFile, which can be
+    appended to batch by batch, rather than passing in the whole dataset.
     """
     @classmethod
     def from_config(cls, config_name):
@@ -230,7 +230,8 @@ class ReportStore(object):
             )
         return DjangoStorageReportStore.from_config(config_name)
 
-    def _get_utf8_encoded_rows(self, rows):
+    @staticmethod
+    def _get_utf8_encoded_rows(rows):
         """
         Given a list of `rows` containing unicode strings, return a
         new list of rows with those strings encoded as utf-8 for CSV
@@ -281,7 +282,11 @@ class DjangoStorageReportStore(ReportStore):
         path = self.path_to(course_id, filename)
         # See https://github.com/boto/boto/issues/2868
         # Boto doesn't play nice with unicode in python3
-        if not six.PY2:
+        if not six.PY2 and 'b' in getattr(buff, 'mode', ''):
+            # Binary files are streamed to the storage as they are, rather
+            # than being read into memory.
+            buff = File(buff)
+        elif not six.PY2:
             buff_contents = buff.read()
 
             if not isinstance(buff_contents, bytes):
@@ -295,15 +300,27 @@ class DjangoStorageReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
+        `rows` can be any iterable, including a generator.
         """
-        output_buffer = ContentFile('')
-        # Adding unicode signature (BOM) for MS Excel 2013 compatibility
-        if six.PY2:
-            output_buffer.write(codecs.BOM_UTF8)
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        with ReportFile() as report_file:
+            report_file.writerows(rows)
+            self.store(course_id, filename, report_file.rewind())
+
+    def open(self, course_id, filename):
+        """
+        Open the stored file `filename` of the given `course_id` for
+        reading in binary mode, or return None if it does not exist.
+        """
+        path = self.path_to(course_id, filename)
+        if not self.storage.exists(path):
+            return None
+        return self.storage.open(path, 'rb')
+
+    def delete(self, course_id, filename):
+        """
+        Delete the stored file `filename` of the given `course_id`, if any.
+        """
+        self.storage.delete(self.path_to(course_id, filename))
 
     def links_for(self, course_id):
         """
@@ -339,3 +356,86 @@ class DjangoStorageReportStore(ReportStore):
         """
         hashed_course_id = hashlib.sha1(text_type(course_id).encode('utf-8')).hexdigest()
         return os.path.join(hashed_course_id, filename)
+
+
+class ReportFile(object):
+    """
+    A temporary CSV file that rows can be appended to, batch by batch, before
+    it is stored using a ReportStore. Rows are encoded as utf-8 as they are
+    written and spooled to disk, so that a report is never held in memory
+    as a whole, regardless of its number of rows.
+    """
+    # Number of rows encoded in memory before being written to the file.
+    ROWS_PER_CHUNK = 1000
+
+    def __init__(self, header=None):
+        self.file = TemporaryFile()
+        # Number of rows written to the file, not including the header.
+        self.num_rows = 0
+        # Adding unicode signature (BOM) for MS Excel 2013 compatibility
+        if six.PY2:
+            self.file.write(codecs.BOM_UTF8)
+        if header is not None:
+            self._write_chunk([header])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def writerow(self, row):
+        """
+        Append a single row, which is an iterable of strings, to the file.
+        """
+        self.writerows([row])
+
+    def writerows(self, rows):
+        """
+        Append the given rows, which can be any iterable of rows (including
+        a generator), to the file.
+        """
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.ROWS_PER_CHUNK:
+                self.num_rows += self._write_chunk(chunk)
+                chunk = []
+        self.num_rows += self._write_chunk(chunk)
+
+    def write(self, data):
+        """
+        Append the given utf-8 encoded CSV data, for example a chunk of
+        another report, to the file as is. The rows it contains are not
+        counted in num_rows.
+        """
+        self.file.write(data)
+
+    def rewind(self):
+        """
+        Return the underlying binary file, ready to be read from the
+        beginning.
+        """
+        self.file.seek(0)
+        return self.file
+
+    def close(self):
+        """
+        Close, and therefore delete, the underlying temporary file.
+        """
+        self.file.close()
+
+    def _write_chunk(self, rows):
+        """
+        Encode the given list of rows as CSV and write them to the file.
+        Returns the number of rows written.
+        """
+        chunk_buffer = six.StringIO()
+        csv.writer(chunk_buffer).writerows(
+            ReportStore._get_utf8_encoded_rows(rows)  # pylint: disable=protected-access
+        )
+        chunk = chunk_buffer.getvalue()
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode('utf-8')
+        self.file.write(chunk)
+        return len(rows)
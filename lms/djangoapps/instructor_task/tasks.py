@@ -46,7 +46,8 @@ from lms.djangoapps.instructor_task.tasks_helper.module_state import (
     delete_problem_module_state,
     override_score_module_state,
     perform_module_state_update,
-    rescore_problem_module_state,
+    perform_problem_rescore,
+    rescore_problem_module_states_shard,
     reset_attempts_module_state
 )
 from lms.djangoapps.instructor_task.tasks_helper.runner import run_main_task
@@ -75,12 +76,23 @@ def rescore_problem(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
-    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
-
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    visit_fcn = partial(perform_problem_rescore, xmodule_instance_args)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task
+def rescore_problem_shard(entry_id, xmodule_instance_args, student_module_ids, subtask_status_dict):
+    """
+    Rescores the given StudentModules of a problem as a subtask of `rescore_problem`.
+
+    Progress is tracked in the InstructorTask entry of the parent task, so
+    this task does not use BaseInstructorTask.
+    """
+    return rescore_problem_module_states_shard(
+        entry_id, xmodule_instance_args, student_module_ids, subtask_status_dict,
+    )
+
+
 @task(base=BaseInstructorTask)
 def override_problem_score(entry_id, xmodule_instance_args):
     """
@@ -191,6 +203,22 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
+def calculate_grades_csv_shard(entry_id, xmodule_instance_args, shard_index, user_ids, subtask_status_dict):
+    """
+    Grade the given users of a course as a subtask of `calculate_grades_csv`,
+    and store their partial grade report.  The last of the subtasks to
+    complete merges the partial reports and pushes the result to an S3
+    bucket for download.
+
+    Progress is tracked in the InstructorTask entry of the parent task, so
+    this task does not use BaseInstructorTask.
+    """
+    return CourseGradeReport.generate_shard(
+        entry_id, xmodule_instance_args, shard_index, user_ids, subtask_status_dict,
+    )
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
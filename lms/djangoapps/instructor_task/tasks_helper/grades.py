@@ -2,22 +2,25 @@
 Functionality for generating grade reports.
 """
 
+import json
 import logging
 from collections import OrderedDict, defaultdict
 from datetime import datetime
-from itertools import chain
+from itertools import chain, count
 from time import time
 
 import re
+import traceback
 import six
 from lms.djangoapps.course_blocks.api import get_course_blocks
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from lazy import lazy
 from opaque_keys.edx.keys import UsageKey
+from celery.states import FAILURE, SUCCESS
 from pytz import UTC
 from six import text_type
-from six.moves import zip, zip_longest
+from six.moves import zip_longest
 
 from common.djangoapps.course_modes.models import CourseMode
 from lms.djangoapps.certificates.models import CertificateWhitelist, GeneratedCertificate, certificate_info_for_user
@@ -33,8 +36,17 @@ from lms.djangoapps.instructor_analytics.csvs import format_dictlist
 from lms.djangoapps.instructor_task.config.waffle import (
     course_grade_report_verified_only,
     optimize_get_learners_switch_enabled,
+    parallel_course_grade_report_enabled,
     problem_grade_report_verified_only,
 )
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportFile, ReportStore
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    complete_parent_task,
+    queue_subtasks_for_query,
+    update_subtask_status
+)
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.services import IDVerificationService
 from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
@@ -47,7 +59,7 @@ from xmodule.modulestore.django import modulestore
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import upload_csv_file_to_report_store, upload_csv_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -165,31 +177,30 @@ class GradeReportBase(object):
         course_id = context.course_id
         return get_enrolled_learners_for_course(course_id=course_id, verified_only=context.report_for_verified_only)
 
-    def _compile(self, context, batched_rows):
+    def _compile(self, context, batched_rows, success_file, error_file):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        Writes the (success_rows, error_rows) of the given batched_rows to
+        the given report files, batch by batch, so that the report is never
+        held in memory as a whole.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = zip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
+        for success_rows, error_rows in batched_rows:
+            success_file.writerows(success_rows)
+            error_file.writerows(error_rows)
 
         # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
-        context.task_progress.failed = len(error_rows)
+        context.task_progress.succeeded = success_file.num_rows
+        context.task_progress.failed = error_file.num_rows
         context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
         context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
 
-    def _upload(self, context, success_rows, error_rows):
+    def _upload(self, context, success_file, error_file):
         """
-        Creates and uploads a CSV for the given headers and rows.
+        Uploads the given report files as CSVs.
         """
         date = datetime.now(UTC)
-        upload_csv_to_report_store(success_rows, context.file_name, context.course_id, date)
-        if len(error_rows) > 1:
-            upload_csv_to_report_store(error_rows, context.file_name + '_err', context.course_id, date)
+        upload_csv_file_to_report_store(success_file.rewind(), context.file_name, context.course_id, date)
+        if error_file.num_rows > 0:
+            upload_csv_file_to_report_store(error_file.rewind(), context.file_name + '_err', context.course_id, date)
 
     def log_additional_info_for_testing(self, context, message):
         """
@@ -220,6 +231,7 @@ class _CourseGradeReportContext(object):
             course_id=course_id,
             task_input=_task_input,
         )
+        self.entry_id = _entry_id
         self.action_name = action_name
         self.course_id = course_id
         self.task_progress = TaskProgress(self.action_name, total=None, start_time=time())
@@ -415,8 +427,64 @@ class CourseGradeReport(object):
         """
         with modulestore().bulk_operations(course_id):
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+            if _entry_id is not None and parallel_course_grade_report_enabled(course_id):
+                return CourseGradeReport()._generate_with_subtasks(context, _xmodule_instance_args, _entry_id)
             return CourseGradeReport()._generate(context)
 
+    @classmethod
+    def generate_shard(cls, entry_id, xmodule_instance_args, shard_index, user_ids, subtask_status_dict):
+        """
+        Public method to generate the partial grade report of the given
+        users, as a subtask of a grade report generated with subtasks.
+        The last subtask to complete merges all partial reports into the
+        final report.
+        """
+        subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+        current_task_id = subtask_status.task_id
+
+        # Raises DuplicateTaskException if this subtask was already run or is
+        # being run, which fails this subtask without touching the report.
+        check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+        entry = InstructorTask.objects.get(pk=entry_id)
+        action_name = json.loads(entry.task_output)['action_name']
+        report = CourseGradeReport()
+        with modulestore().bulk_operations(entry.course_id):
+            context = _CourseGradeReportContext(
+                xmodule_instance_args, entry_id, entry.course_id, json.loads(entry.task_input), action_name,
+            )
+            try:
+                num_succeeded, num_failed = report._generate_shard(context, shard_index, user_ids)
+            except Exception as exc:  # pylint: disable=broad-except
+                # Report all of the shard's users as failed rather than
+                # leaving them out of the final report.
+                TASK_LOG.exception(u'%s, Task type: %s, Failed to grade shard %s', context.task_info_string,
+                                   action_name, shard_index)
+                usernames = dict(get_user_model().objects.filter(id__in=user_ids).values_list('id', 'username'))
+                report._store_shard_rows(
+                    context,
+                    shard_index,
+                    [],
+                    [[user_id, usernames.get(user_id, ''), text_type(exc)] for user_id in user_ids],
+                )
+                subtask_status.increment(failed=len(user_ids), state=FAILURE)
+            else:
+                subtask_status.increment(succeeded=num_succeeded, failed=num_failed, state=SUCCESS)
+
+            # The last subtask to complete marks the task as done only once the
+            # final report has been uploaded, or as failed if it can't be.
+            if update_subtask_status(entry_id, current_task_id, subtask_status, complete_parent=False):
+                num_shards = json.loads(InstructorTask.objects.get(pk=entry_id).subtasks)['total']
+                try:
+                    report._merge_shards(context, num_shards)
+                except Exception as exc:  # pylint: disable=broad-except
+                    TASK_LOG.exception(u'%s, Task type: %s, Failed to merge grade report shards',
+                                       context.task_info_string, action_name)
+                    complete_parent_task(entry_id, exc, traceback.format_exc())
+                else:
+                    complete_parent_task(entry_id)
+        return subtask_status.to_dict()
+
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
@@ -427,13 +495,147 @@ class CourseGradeReport(object):
         batched_rows = self._batched_rows(context)
 
         context.update_status(u'Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
+        with ReportFile(success_headers) as success_file, ReportFile(error_headers) as error_file:
+            self._compile(context, batched_rows, success_file, error_file)
 
-        context.update_status(u'Uploading grades')
-        self._upload(context, success_headers, success_rows, error_headers, error_rows)
+            context.update_status(u'Uploading grades')
+            self._upload(context, success_file, error_file)
 
         return context.update_status(u'Completed grades')
 
+    def _generate_with_subtasks(self, context, xmodule_instance_args, entry_id):
+        """
+        Internal method for generating a grade report for the given context
+        by queueing subtasks that each write the partial report of a range
+        of the enrolled users.  Progress is then reported by the subtasks.
+        """
+        # Imported here to avoid a circular import, since the tasks module
+        # imports this module.
+        from lms.djangoapps.instructor_task.tasks import calculate_grades_csv_shard
+
+        entry = InstructorTask.objects.get(pk=entry_id)
+
+        # Check to see if the subtasks have already been queued.  This can
+        # happen when the task is requeued after a loss of connection.
+        if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+            TASK_LOG.warning(u'%s, Task type: %s, Subtasks were already queued', context.task_info_string,
+                             context.action_name)
+            return json.loads(entry.task_output)
+
+        users = CourseEnrollment.objects.users_enrolled_in(
+            context.course_id,
+            include_inactive=True,
+            verified_only=context.report_for_verified_only,
+        ).order_by('id')
+        total_num_users = users.count()
+        if total_num_users == 0:
+            # There is nothing to parallelize; upload the empty report.
+            return self._generate(context)
+
+        shard_indices = count()
+
+        def _create_shard_subtask(user_items, initial_subtask_status):
+            """
+            Creates a subtask to write the partial report of the given users.
+            """
+            return calculate_grades_csv_shard.subtask(
+                (
+                    entry_id,
+                    xmodule_instance_args,
+                    next(shard_indices),
+                    [user_item['pk'] for user_item in user_items],
+                    initial_subtask_status.to_dict(),
+                ),
+                task_id=initial_subtask_status.task_id,
+                routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+            )
+
+        context.update_status(u'Queueing grade subtasks')
+        return queue_subtasks_for_query(
+            entry,
+            context.action_name,
+            _create_shard_subtask,
+            [users],
+            [],
+            settings.GRADE_REPORT_USERS_PER_SUBTASK,
+            total_num_users,
+        )
+
+    def _generate_shard(self, context, shard_index, user_ids):
+        """
+        Internal method for writing the partial report of the given users.
+        Returns the numbers of users that were graded successfully and that
+        failed to be graded.
+        """
+        with ReportFile() as success_file, ReportFile() as error_file:
+            for batch_start in range(0, len(user_ids), self.USER_BATCH_SIZE):
+                users = get_user_model().objects.filter(
+                    id__in=user_ids[batch_start:batch_start + self.USER_BATCH_SIZE],
+                ).select_related('profile').order_by('id')
+                success_rows, error_rows = self._rows_for_users(context, list(users))
+                success_file.writerows(success_rows)
+                error_file.writerows(error_rows)
+
+            report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+            report_store.store(context.course_id, self._shard_filename(context, shard_index), success_file.rewind())
+            if error_file.num_rows > 0:
+                report_store.store(
+                    context.course_id, self._shard_filename(context, shard_index, '_err'), error_file.rewind(),
+                )
+            return success_file.num_rows, error_file.num_rows
+
+    def _shard_filename(self, context, shard_index, suffix=''):
+        """
+        Returns the name of the file of the given partial report.  Partial
+        reports are stored in a subdirectory of the course's reports, so
+        they are not listed amongst the downloadable reports.
+        """
+        return u'grade_report_shards/{}/{:06d}{}.csv'.format(context.entry_id, shard_index, suffix)
+
+    def _store_shard_rows(self, context, shard_index, success_rows, error_rows):
+        """
+        Stores the given rows, without headers, as a partial report.
+        """
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        report_store.store_rows(context.course_id, self._shard_filename(context, shard_index), success_rows)
+        if error_rows:
+            report_store.store_rows(context.course_id, self._shard_filename(context, shard_index, '_err'), error_rows)
+
+    def _merge_shards(self, context, num_shards):
+        """
+        Merges the given number of partial reports, in order, into the
+        final report and error report, uploads them, and deletes the
+        partial reports.
+        """
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        date = datetime.now(UTC)
+        reports = [
+            (u'grade_report', '', self._success_headers(context), True),
+            (u'grade_report_err', '_err', self._error_headers(), False),
+        ]
+        for csv_name, suffix, headers, upload_if_empty in reports:
+            with ReportFile(headers) as merged_file:
+                has_rows = False
+                for shard_index in range(num_shards):
+                    shard_filename = self._shard_filename(context, shard_index, suffix)
+                    shard_file = report_store.open(context.course_id, shard_filename)
+                    if shard_file is None:
+                        if not suffix:
+                            TASK_LOG.warning(u'%s, Task type: %s, Missing grade report shard %s',
+                                             context.task_info_string, context.action_name, shard_index)
+                        continue
+                    with shard_file:
+                        for chunk in shard_file.chunks():
+                            merged_file.write(chunk)
+                            has_rows = True
+                    report_store.delete(context.course_id, shard_filename)
+
+                if has_rows or upload_if_empty:
+                    upload_csv_file_to_report_store(merged_file.rewind(), csv_name, context.course_id, date)
+
+        TASK_LOG.info(u'%s, Task type: %s, Merged %s grade report shards', context.task_info_string,
+                      context.action_name, num_shards)
+
     def _success_headers(self, context):
         """
         Returns a list of all applicable column headers for this grade report.
@@ -463,32 +665,29 @@ class CourseGradeReport(object):
             users = [u for u in users if u is not None]
             yield self._rows_for_users(context, users)
 
-    def _compile(self, context, batched_rows):
+    def _compile(self, context, batched_rows, success_file, error_file):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        Writes the (success_rows, error_rows) of the given batched_rows to
+        the given report files, batch by batch.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = zip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
+        for success_rows, error_rows in batched_rows:
+            success_file.writerows(success_rows)
+            error_file.writerows(error_rows)
 
         # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
-        context.task_progress.failed = len(error_rows)
+        context.task_progress.succeeded = success_file.num_rows
+        context.task_progress.failed = error_file.num_rows
         context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
         context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
 
-    def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
+    def _upload(self, context, success_file, error_file):
         """
-        Creates and uploads a CSV for the given headers and rows.
+        Uploads the given report files as CSVs.
         """
         date = datetime.now(UTC)
-        upload_csv_to_report_store([success_headers] + success_rows, 'grade_report', context.course_id, date)
-        if len(error_rows) > 0:
-            error_rows = [error_headers] + error_rows
-            upload_csv_to_report_store(error_rows, 'grade_report_err', context.course_id, date)
+        upload_csv_file_to_report_store(success_file.rewind(), 'grade_report', context.course_id, date)
+        if error_file.num_rows > 0:
+            upload_csv_file_to_report_store(error_file.rewind(), 'grade_report_err', context.course_id, date)
 
     def _grades_header(self, context):
         """
@@ -732,9 +931,10 @@ class ProblemGradeReport(GradeReportBase):
         batched_rows = self._batched_rows(context)
 
         context.update_status('ProblemGradeReport - 2: Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
-        context.update_status('ProblemGradeReport - 3: Uploading grades')
-        self._upload(context, [success_headers] + success_rows, [error_headers] + error_rows)
+        with ReportFile(success_headers) as success_file, ReportFile(error_headers) as error_file:
+            self._compile(context, batched_rows, success_file, error_file)
+            context.update_status('ProblemGradeReport - 3: Uploading grades')
+            self._upload(context, success_file, error_file)
 
         return context.update_status('ProblemGradeReport - 4: Completed problem grades')
 
@@ -5,9 +5,12 @@ Instructor Tasks related to module state.
 
 import json
 import logging
+from functools import partial
 from time import time
 
 import six
+from celery.states import FAILURE, SUCCESS
+from django.conf import settings
 from django.utils.translation import ugettext_noop
 from opaque_keys.edx.keys import UsageKey
 from xblock.runtime import KvsFieldData
@@ -25,12 +28,19 @@ from common.djangoapps.track.views import task_track
 from common.djangoapps.util.db import outer_atomic
 from xmodule.modulestore.django import modulestore
 
+from ..config.waffle import parallel_problem_rescore_enabled
 from ..exceptions import UpdateProblemModuleStateError
+from ..models import InstructorTask
+from ..subtasks import SubtaskStatus, check_subtask_is_valid, queue_subtasks_for_query, update_subtask_status
 from .runner import TaskProgress
 from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED, UPDATE_STATUS_SUCCEEDED
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+# The number of StudentModules that are fetched from the database at a time
+# while they are updated.
+STUDENT_MODULE_CHUNK_SIZE = 1000
+
 
 def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
     """
@@ -86,29 +96,160 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
         course_id, usage_keys, student_identifier, filter_fcn, override_score_task
     )
 
-    task_progress = TaskProgress(action_name, len(modules_to_update), start_time)
+    if isinstance(modules_to_update, list):
+        num_modules_to_update = len(modules_to_update)
+    else:
+        num_modules_to_update = modules_to_update.count()
+    task_progress = TaskProgress(action_name, num_modules_to_update, start_time)
     task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[six.text_type(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        update_status = update_fcn(module_descriptor, module_to_update, task_input)
-        if update_status == UPDATE_STATUS_SUCCEEDED:
-            # If the update_fcn returns true, then it performed some kind of work.
-            # Logging of failures is left to the update_fcn itself.
-            task_progress.succeeded += 1
-        elif update_status == UPDATE_STATUS_FAILED:
-            task_progress.failed += 1
-        elif update_status == UPDATE_STATUS_SKIPPED:
-            task_progress.skipped += 1
-        else:
-            raise UpdateProblemModuleStateError(u"Unexpected update_status returned: {}".format(update_status))
+    # The course is loaded by every update, so keep the bulk operation open
+    # across all of them to reuse the cached course structure.
+    with modulestore().bulk_operations(course_id):
+        for module_to_update in _iter_student_modules(modules_to_update):
+            task_progress.attempted += 1
+            module_descriptor = problems[six.text_type(module_to_update.module_state_key)]
+            # There is no try here:  if there's an error, we let it throw, and the task will
+            # be marked as FAILED, with a stack trace.
+            update_status = update_fcn(module_descriptor, module_to_update, task_input)
+            if update_status == UPDATE_STATUS_SUCCEEDED:
+                # If the update_fcn returns true, then it performed some kind of work.
+                # Logging of failures is left to the update_fcn itself.
+                task_progress.succeeded += 1
+            elif update_status == UPDATE_STATUS_FAILED:
+                task_progress.failed += 1
+            elif update_status == UPDATE_STATUS_SKIPPED:
+                task_progress.skipped += 1
+            else:
+                raise UpdateProblemModuleStateError(u"Unexpected update_status returned: {}".format(update_status))
 
     return task_progress.update_task_state()
 
 
+def perform_problem_rescore(xmodule_instance_args, entry_id, course_id, task_input, action_name):
+    """
+    Rescores a problem for all students or one specific student, or the problems of an entrance exam
+    for one specific student.
+
+    When the instructor_task.parallel_problem_rescore flag is enabled for the course, a problem is
+    rescored for all students by subtasks that each rescore a range of the StudentModules of the
+    problem, and progress is then reported by the subtasks.  Otherwise, the StudentModules are
+    rescored by this task, with `perform_module_state_update`.
+    """
+    if (entry_id is not None and task_input.get('problem_url') and not task_input.get('student') and
+            parallel_problem_rescore_enabled(course_id)):
+        return _perform_problem_rescore_with_subtasks(xmodule_instance_args, entry_id, course_id, task_input,
+                                                      action_name)
+
+    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    return perform_module_state_update(update_fcn, None, entry_id, course_id, task_input, action_name)
+
+
+def _perform_problem_rescore_with_subtasks(xmodule_instance_args, entry_id, course_id, task_input, action_name):
+    """
+    Queues the subtasks that rescore the StudentModules of a problem for all students.
+    """
+    # Imported here to avoid a circular import, since the tasks module
+    # imports this module.
+    from lms.djangoapps.instructor_task.tasks import rescore_problem_shard
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # Check to see if the subtasks have already been queued.  This can
+    # happen when the task is requeued after a loss of connection.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s: subtasks were already queued for %s", entry.task_id, action_name)
+        return json.loads(entry.task_output)
+
+    usage_key = UsageKey.from_string(task_input['problem_url']).map_into_course(course_id)
+    # Fail the task now, rather than in every subtask, if the problem doesn't exist.
+    modulestore().get_item(usage_key)
+
+    student_modules = StudentModule.get_state_by_params(course_id, [usage_key]).order_by('id')
+    total_num_student_modules = student_modules.count()
+    if total_num_student_modules == 0:
+        # There is nothing to parallelize.
+        return TaskProgress(action_name, 0, time()).update_task_state()
+
+    def _create_rescore_subtask(student_module_items, initial_subtask_status):
+        """
+        Creates a subtask to rescore the given StudentModules.
+        """
+        return rescore_problem_shard.subtask(
+            (
+                entry_id,
+                xmodule_instance_args,
+                [student_module_item['pk'] for student_module_item in student_module_items],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_rescore_subtask,
+        [student_modules],
+        [],
+        settings.PROBLEM_RESCORE_STUDENT_MODULES_PER_SUBTASK,
+        total_num_student_modules,
+    )
+
+
+def rescore_problem_module_states_shard(entry_id, xmodule_instance_args, student_module_ids, subtask_status_dict):
+    """
+    Rescores the given StudentModules of a problem, as a subtask of a problem rescored for all
+    students with subtasks, and records the results in the InstructorTask entry of the parent task.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+
+    # Raises DuplicateTaskException if this subtask was already run or is
+    # being run, which fails this subtask without rescoring anything.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    task_input = json.loads(entry.task_input)
+    usage_key = UsageKey.from_string(task_input['problem_url']).map_into_course(entry.course_id)
+    num_updated = {UPDATE_STATUS_SUCCEEDED: 0, UPDATE_STATUS_FAILED: 0, UPDATE_STATUS_SKIPPED: 0}
+
+    with modulestore().bulk_operations(entry.course_id):
+        try:
+            problem_descriptor = modulestore().get_item(usage_key)
+            student_modules = StudentModule.objects.filter(id__in=student_module_ids)
+            for student_module in _iter_student_modules(student_modules):
+                update_status = rescore_problem_module_state(
+                    xmodule_instance_args, problem_descriptor, student_module, task_input,
+                )
+                if update_status not in num_updated:
+                    raise UpdateProblemModuleStateError(
+                        u"Unexpected update_status returned: {}".format(update_status)
+                    )
+                num_updated[update_status] += 1
+        except Exception:  # pylint: disable=broad-except
+            # Report the StudentModules that weren't rescored as failed.
+            TASK_LOG.exception(u"Task %s: failed to rescore %s for a subtask", entry.task_id, usage_key)
+            subtask_status.increment(
+                succeeded=num_updated[UPDATE_STATUS_SUCCEEDED],
+                failed=(
+                    len(student_module_ids) - num_updated[UPDATE_STATUS_SUCCEEDED] -
+                    num_updated[UPDATE_STATUS_SKIPPED]
+                ),
+                skipped=num_updated[UPDATE_STATUS_SKIPPED],
+                state=FAILURE,
+            )
+        else:
+            subtask_status.increment(
+                succeeded=num_updated[UPDATE_STATUS_SUCCEEDED],
+                failed=num_updated[UPDATE_STATUS_FAILED],
+                skipped=num_updated[UPDATE_STATUS_SKIPPED],
+                state=SUCCESS,
+            )
+
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
 @outer_atomic
 def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input):
     '''
@@ -388,6 +529,34 @@ def _get_task_id_from_xmodule_args(xmodule_instance_args):
         return xmodule_instance_args.get('task_id', UNKNOWN_TASK_ID)
 
 
+def _iter_student_modules(student_modules, chunk_size=STUDENT_MODULE_CHUNK_SIZE):
+    """
+    Yields the StudentModules of a list or of a query, together with their students.
+
+    The StudentModules of a query are fetched `chunk_size` at a time, in order of id, each chunk
+    starting after the last id of the previous chunk, so that the StudentModules of a problem with
+    many submissions are neither all loaded at once nor skipped if earlier ones are deleted.
+    """
+    if isinstance(student_modules, list):
+        for student_module in student_modules:
+            yield student_module
+        return
+
+    student_modules = student_modules.select_related('student').order_by('id')
+    last_id = None
+    while True:
+        chunk = student_modules if last_id is None else student_modules.filter(id__gt=last_id)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        # Read before yielding, since deleting a StudentModule clears its id.
+        last_id = chunk[-1].id
+        for student_module in chunk:
+            yield student_module
+        if len(chunk) < chunk_size:
+            return
+
+
 def _get_modules_to_update(course_id, usage_keys, student_identifier, filter_fcn, override_score_task=False):
     """
     Fetches a StudentModule instances for a given `course_id`, `student` object, and `usage_keys`.
@@ -4,7 +4,10 @@ Tests for instructor_task/models.py.
 
 
 import copy
+import csv
 import time
+
+from mock import patch
 from six import StringIO
 
 from django.conf import settings
@@ -12,7 +15,7 @@ from django.test import SimpleTestCase, TestCase, override_settings
 from opaque_keys.edx.locator import CourseLocator
 
 from common.test.utils import MockS3BotoMixin
-from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore, TASK_INPUT_LENGTH
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportFile, ReportStore, TASK_INPUT_LENGTH
 from lms.djangoapps.instructor_task.tests.test_base import TestReportMixin
 
 
@@ -70,6 +73,36 @@ class ReportStoreTestMixin(object):
         )
 
 
+class ReportFileTestCase(SimpleTestCase):
+    """
+    Test the ReportFile used to write reports incrementally.
+    """
+    @patch.object(ReportFile, 'ROWS_PER_CHUNK', 2)
+    def test_writerows(self):
+        with ReportFile(['header']) as report_file:
+            report_file.writerow(['first'])
+            report_file.writerows(iter([['second'], ['third'], ['fourth']]))
+            report_file.writerows([])
+            self.assertEqual(report_file.num_rows, 4)
+            report_contents = report_file.rewind().read().decode('utf-8-sig')
+        self.assertEqual(
+            list(csv.reader(report_contents.splitlines())),
+            [['header'], ['first'], ['second'], ['third'], ['fourth']],
+        )
+
+    def test_write(self):
+        with ReportFile(['header']) as report_file:
+            report_file.writerow(['first'])
+            report_file.write(u'second,caf\xe9\r\nthird\r\n'.encode('utf-8'))
+            report_file.writerow(['fourth'])
+            self.assertEqual(report_file.num_rows, 2)
+            report_contents = report_file.rewind().read().decode('utf-8-sig')
+        self.assertEqual(
+            list(csv.reader(report_contents.splitlines())),
+            [['header'], ['first'], ['second', u'caf\xe9'], ['third'], ['fourth']],
+        )
+
+
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
     Test the old LocalFSReportStore configuration.
@@ -97,6 +130,23 @@ class DjangoStorageReportStoreLocalTestCase(ReportStoreTestMixin, TestReportMixi
         with override_settings(GRADES_DOWNLOAD=test_settings):
             return ReportStore.from_config(config_name='GRADES_DOWNLOAD')
 
+    @patch.object(ReportFile, 'ROWS_PER_CHUNK', 2)
+    def test_store_rows_from_generator(self):
+        """
+        Test that ReportStore.store_rows() writes rows from a generator, chunk
+        by chunk, to a single CSV file.
+        """
+        report_store = self.create_report_store()
+        rows = ([u'row{}'.format(index), u'caf\xe9'] for index in range(5))
+        report_store.store_rows(self.course_id, 'report.csv', rows)
+
+        with report_store.open(self.course_id, 'report.csv') as report_file:
+            report_contents = report_file.read().decode('utf-8-sig')
+        self.assertEqual(
+            list(csv.reader(report_contents.splitlines())),
+            [[u'row{}'.format(index), u'caf\xe9'] for index in range(5)],
+        )
+
 
 class DjangoStorageReportStoreS3TestCase(MockS3BotoMixin, ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
@@ -12,7 +12,9 @@ from uuid import uuid4
 
 import ddt
 from celery.states import FAILURE, SUCCESS
+from django.test.utils import override_settings
 from django.utils.translation import ugettext_noop
+from edx_toggles.toggles.testutils import override_waffle_flag
 from mock import MagicMock, Mock, patch
 from opaque_keys.edx.keys import i4xEncoder
 from six.moves import range
@@ -20,6 +22,7 @@ from six.moves import range
 from common.djangoapps.course_modes.models import CourseMode
 from lms.djangoapps.courseware.models import StudentModule
 from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
+from lms.djangoapps.instructor_task.config.waffle import PARALLEL_PROBLEM_RESCORE, waffle_flags
 from lms.djangoapps.instructor_task.exceptions import UpdateProblemModuleStateError
 from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.tasks import (
@@ -32,6 +35,7 @@ from lms.djangoapps.instructor_task.tasks import (
     reset_problem_attempts
 )
 from lms.djangoapps.instructor_task.tasks_helper.misc import upload_ora2_data
+from lms.djangoapps.instructor_task.tasks_helper.module_state import _iter_student_modules
 from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import InstructorTaskModuleTestCase
 from xmodule.modulestore.exceptions import ItemNotFoundError
@@ -492,6 +496,89 @@ class TestRescoreInstructorTask(TestInstructorTasks):
             action_name='rescored'
         )
 
+    @override_settings(PROBLEM_RESCORE_STUDENT_MODULES_PER_SUBTASK=3)
+    @override_waffle_flag(waffle_flags()[PARALLEL_PROBLEM_RESCORE], active=True)
+    def test_rescoring_success_with_subtasks(self):
+        """
+        Tests rescores a problem in a course, for all students succeeds with subtasks.
+        """
+        mock_instance = MagicMock()
+        mock_instance.has_submitted_answer.side_effect = [True] * 9 + [False]
+
+        num_students = 10
+        self._create_students_with_state(num_students)
+        task_entry = self._create_input_entry()
+        with patch(
+                'lms.djangoapps.instructor_task.tasks_helper.module_state.get_module_for_descriptor_internal'
+        ) as mock_get_module:
+            mock_get_module.return_value = mock_instance
+            self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['total'], 4)
+        self.assertEqual(mock_instance.rescore.call_count, 9)
+        self.assert_task_output(
+            output=self.get_task_output(task_entry.id),
+            total=num_students,
+            attempted=9,
+            succeeded=9,
+            skipped=1,
+            failed=0,
+            action_name='rescored'
+        )
+
+    @override_settings(PROBLEM_RESCORE_STUDENT_MODULES_PER_SUBTASK=4)
+    @override_waffle_flag(waffle_flags()[PARALLEL_PROBLEM_RESCORE], active=True)
+    def test_rescoring_failed_subtask(self):
+        """
+        Tests the submissions of a subtask which fails to rescore them are reported as failed.
+        """
+        mock_instance = MagicMock()
+        mock_instance.has_submitted_answer.return_value = True
+        mock_instance.rescore.side_effect = [None] * 5 + [TestTaskFailure('We expected this to fail')] + [None] * 2
+
+        num_students = 8
+        self._create_students_with_state(num_students)
+        task_entry = self._create_input_entry()
+        with patch(
+                'lms.djangoapps.instructor_task.tasks_helper.module_state.get_module_for_descriptor_internal'
+        ) as mock_get_module:
+            mock_get_module.return_value = mock_instance
+            self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+
+        self.assertEqual(json.loads(InstructorTask.objects.get(id=task_entry.id).subtasks)['failed'], 1)
+        self.assert_task_output(
+            output=self.get_task_output(task_entry.id),
+            total=num_students,
+            attempted=num_students,
+            succeeded=5,
+            skipped=0,
+            failed=3,
+            action_name='rescored'
+        )
+
+    def test_iter_student_modules(self):
+        students = self._create_students_with_state(7)
+        student_modules = StudentModule.objects.filter(course_id=self.course.id)
+        student_module_ids = sorted(student_modules.values_list('id', flat=True))
+
+        iterated_ids = []
+        for student_module in _iter_student_modules(student_modules, chunk_size=3):
+            # Deleting StudentModules that have been iterated doesn't skip any others.
+            iterated_ids.append(student_module.id)
+            student_module.delete()
+        self.assertEqual(iterated_ids, student_module_ids)
+
+        for student in students:
+            StudentModuleFactory.create(course_id=self.course.id, module_state_key=self.location, student=student)
+        with self.assertNumQueries(3):
+            usernames = [
+                student_module.student.username
+                for student_module in _iter_student_modules(student_modules, chunk_size=3)
+            ]
+        self.assertEqual(usernames, [student.username for student in students])
+
 
 class TestResetAttemptsInstructorTask(TestInstructorTasks):
     """Tests instructor task that resets problem attempts."""
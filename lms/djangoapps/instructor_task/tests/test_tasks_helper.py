@@ -9,20 +9,24 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 """
 
 
+import json
 import os
 import shutil
 import tempfile
 from contextlib import contextmanager, ExitStack
 from datetime import datetime, timedelta
 from io import BytesIO
+from uuid import uuid4
 from zipfile import ZipFile
 
 import ddt
 import unicodecsv
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.test.utils import override_settings
 from django.urls import reverse
 from edx_django_utils.cache import RequestCache
+from edx_toggles.toggles.testutils import override_waffle_flag
 from freezegun import freeze_time
 from mock import ANY, MagicMock, Mock, patch
 from pytz import UTC
@@ -44,6 +48,7 @@ from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsec
 from lms.djangoapps.grades.subsection_grade import CreateSubsectionGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
 from lms.djangoapps.instructor_analytics.basic import UNAVAILABLE, list_problem_responses
+from lms.djangoapps.instructor_task.config.waffle import PARALLEL_COURSE_GRADE_REPORT, waffle_flags
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
     upload_may_enroll_csv,
@@ -62,6 +67,7 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_ora2_data,
     upload_ora2_submission_files
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
@@ -83,7 +89,7 @@ from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, check_mongo_calls
 from xmodule.partitions.partitions import Group, UserPartition
 
-from ..models import ReportStore
+from ..models import PROGRESS, InstructorTask, ReportStore
 from ..tasks_helper.utils import UPDATE_STATUS_FAILED, UPDATE_STATUS_SUCCEEDED
 
 _TEAMS_CONFIG = TeamsConfig({
@@ -440,6 +446,94 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         )
 
 
+class TestParallelCourseGradeReport(InstructorGradeReportTestCase):
+    """
+    Tests that grade reports generated with subtasks are merged correctly.
+    """
+    def setUp(self):
+        super(TestParallelCourseGradeReport, self).setUp()
+        self.course = CourseFactory.create()
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_type='grade_course',
+            task_id=str(uuid4()),
+        )
+
+    @override_settings(GRADE_REPORT_USERS_PER_SUBTASK=2)
+    @override_waffle_flag(waffle_flags()[PARALLEL_COURSE_GRADE_REPORT], active=True)
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_grade_report_with_subtasks(self, _mock_current_task):
+        students = [self.create_student('student{}'.format(index)) for index in range(5)]
+
+        CourseGradeReport.generate({}, self.entry.id, self.course.id, {}, 'graded')
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['total'], 3)
+        self.assertDictContainsSubset(
+            {'attempted': len(students), 'succeeded': len(students), 'failed': 0}, json.loads(entry.task_output),
+        )
+
+        # The report contains the merged rows of all subtasks, in order, and
+        # the partial reports are not listed amongst the reports.
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(len(report_store.links_for(self.course.id)), 1)
+        self.verify_rows_in_csv(
+            [
+                {'Student ID': text_type(student.id), 'Username': student.username, 'Grade': '0.0'}
+                for student in sorted(students, key=lambda student: student.id)
+            ],
+            ignore_other_columns=True,
+        )
+
+    @override_waffle_flag(waffle_flags()[PARALLEL_COURSE_GRADE_REPORT], active=True)
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    @patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.iter')
+    def test_failed_subtask(self, mock_grades_iter, _mock_current_task):
+        student = self.create_student('student')
+        mock_grades_iter.side_effect = TypeError('Cannot grade students')
+
+        CourseGradeReport.generate({}, self.entry.id, self.course.id, {}, 'graded')
+
+        self.assertDictContainsSubset(
+            {'attempted': 1, 'succeeded': 0, 'failed': 1},
+            json.loads(InstructorTask.objects.get(pk=self.entry.id).task_output),
+        )
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
+        self.verify_rows_in_csv(
+            [{'Student ID': text_type(student.id), 'Username': student.username, 'Error': 'Cannot grade students'}],
+        )
+
+    @override_waffle_flag(waffle_flags()[PARALLEL_COURSE_GRADE_REPORT], active=True)
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_completed_after_merge(self, _mock_current_task):
+        self.create_student('student')
+        task_states = []
+
+        def _merge_shards(context, num_shards):  # pylint: disable=unused-argument
+            task_states.append(InstructorTask.objects.get(pk=self.entry.id).task_state)
+
+        with patch.object(CourseGradeReport, '_merge_shards', side_effect=_merge_shards):
+            CourseGradeReport.generate({}, self.entry.id, self.course.id, {}, 'graded')
+
+        # The task isn't reported as done while the report is being merged.
+        self.assertEqual(task_states, [PROGRESS])
+        self.assertEqual(InstructorTask.objects.get(pk=self.entry.id).task_state, SUCCESS)
+
+    @override_waffle_flag(waffle_flags()[PARALLEL_COURSE_GRADE_REPORT], active=True)
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_failed_merge(self, _mock_current_task):
+        self.create_student('student')
+
+        with patch.object(CourseGradeReport, '_merge_shards', side_effect=IOError('Cannot upload report')):
+            CourseGradeReport.generate({}, self.entry.id, self.course.id, {}, 'graded')
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['message'], 'Cannot upload report')
+
+
 class TestTeamGradeReport(InstructorGradeReportTestCase):
     """ Test that teams appear correctly in the grade report when it is enabled for the course. """
 
@@ -695,6 +695,19 @@ FEATURES = {
     # .. toggle_tickets: https://openedx.atlassian.net/browse/TNL-7273
     # .. toggle_warnings: This temporary feature toggle does not have a target removal date.
     'ENABLE_ORA_USERNAMES_ON_DATA_EXPORT': False,
+
+    # .. toggle_name: ENABLE_INCREMENTAL_COURSE_GRADE_UPDATES
+    # .. toggle_implementation: DjangoSetting
+    # .. toggle_default: False
+    # .. toggle_description: When True, a change to a single subsection grade updates the persisted course grade from
+    #   the graded totals of the user's subsections kept in the django cache, instead of reading all of the user's
+    #   subsection grades again. The cached totals are refreshed whenever the course grade is fully recomputed.
+    # .. toggle_use_cases: open_edx
+    # .. toggle_creation_date: 2026-10-18
+    # .. toggle_target_removal_date: None
+    # .. toggle_warnings: Course grades are only updated incrementally when persistent grades are enabled.
+    # .. toggle_tickets: None
+    'ENABLE_INCREMENTAL_COURSE_GRADE_UPDATES': False,
 }
 
 # Specifies extra XBlock fields that should available when requested via the Course Blocks API
@@ -1347,6 +1360,19 @@ CODE_JAIL = {
     "limit_overrides": {},
 }
 
+# A pool of warm sandboxed Python processes, which execute the code of problems without codejail
+# starting a new process, and importing numpy and the other modules problems use, every time.
+# 'size' is the number of sandboxed processes of each server process, 0 to disable the pool, and
+# 'max_executions' the number of executions after which a sandboxed process is replaced, and
+# 'acquire_timeout' the number of seconds an execution waits for a free sandboxed process before
+# codejail executes it instead. Each job and sandboxed process count against the sandbox user's
+# NPROC limit.
+CODE_JAIL_WORKER_POOL = {
+    'size': 0,
+    'max_executions': 100,
+    'acquire_timeout': 5,
+}
+
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
 # of them must match the course id for that course to run unsafe code.
 #
@@ -1357,6 +1383,11 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# When set, the seeds of randomized capa problems are mapped onto this many seeds, so that the results
+# of the problems' scripts are cached for every seed, and codejail rarely needs to run them. Run the
+# warm_capa_seed_pool management command to execute the scripts for every seed of the pool in advance.
+CAPA_SEED_POOL_SIZE = None
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG in your environment settings files, not here
 DEBUG = False
@@ -1435,6 +1466,17 @@ CAS_ATTRIBUTE_CALLBACK = ""
 MEDIA_ROOT = '/edx/var/edxapp/media/'
 MEDIA_URL = '/media/'
 
+# A local directory in which the data of course assets too large to be cached in the "course_assets"
+# cache is cached, to be served through memory maps. Disabled when not set.
+CONTENTSERVER_LOCAL_CACHE_DIR = None
+# The approximate maximum number of bytes kept in CONTENTSERVER_LOCAL_CACHE_DIR.
+CONTENTSERVER_LOCAL_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+# The URL prefix of an internal location of the web server which serves CONTENTSERVER_LOCAL_CACHE_DIR.
+# When set, the transfer of locally cached assets is handed off to the web server with X-Accel-Redirect,
+# which also serves ranges and conditional requests from the cached file. The location has to re-add
+# any response headers which the web server doesn't keep from the redirecting response.
+CONTENTSERVER_LOCAL_CACHE_ACCEL_REDIRECT = None
+
 # Locale/Internationalization
 CELERY_TIMEZONE = 'UTC'
 TIME_ZONE = 'UTC'
@@ -2291,6 +2333,11 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Backend storage options
     PRUNING_ACTIVE=False,
+
+    # Maximum total number of blocks of the deserialized block structures
+    # kept in each process's in-memory cache.  The cache is only used when
+    # storage backing is enabled.  Set to 0 to disable the cache.
+    PROCESS_CACHE_MAX_BLOCKS=0,
 )
 
 ################################ Bulk Email ###################################
@@ -2988,6 +3035,15 @@ BADGR_TIMEOUT = 10
 # the ones that contain information other than grades.
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# Number of users graded by each subtask of a course grade report when
+# the instructor_task.parallel_course_grade_report flag is enabled.
+GRADE_REPORT_USERS_PER_SUBTASK = 5000
+
+# Number of submissions rescored by each subtask when a problem is rescored
+# for all students and the instructor_task.parallel_problem_rescore flag is
+# enabled.
+PROBLEM_RESCORE_STUDENT_MODULES_PER_SUBTASK = 1000
+
 POLICY_CHANGE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
 
 RECALCULATE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
@@ -347,7 +347,10 @@ for name, value in ENV_TOKENS.get("CODE_JAIL", {}).items():
     else:
         CODE_JAIL[name] = value
 
+CODE_JAIL_WORKER_POOL.update(ENV_TOKENS.get('CODE_JAIL_WORKER_POOL', {}))
+
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
+CAPA_SEED_POOL_SIZE = ENV_TOKENS.get("CAPA_SEED_POOL_SIZE", CAPA_SEED_POOL_SIZE)
 
 # Event Tracking
 if "TRACKING_IGNORE_URL_PATTERNS" in ENV_TOKENS:
@@ -575,6 +578,10 @@ DISABLE_ACCOUNT_ACTIVATION_REQUIREMENT_SWITCH = ENV_TOKENS.get(
 
 # Grades download
 GRADES_DOWNLOAD_ROUTING_KEY = ENV_TOKENS.get('GRADES_DOWNLOAD_ROUTING_KEY', HIGH_MEM_QUEUE)
+GRADE_REPORT_USERS_PER_SUBTASK = ENV_TOKENS.get('GRADE_REPORT_USERS_PER_SUBTASK', GRADE_REPORT_USERS_PER_SUBTASK)
+PROBLEM_RESCORE_STUDENT_MODULES_PER_SUBTASK = ENV_TOKENS.get(
+    'PROBLEM_RESCORE_STUDENT_MODULES_PER_SUBTASK', PROBLEM_RESCORE_STUDENT_MODULES_PER_SUBTASK
+)
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
 
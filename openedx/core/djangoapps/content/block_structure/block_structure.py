@@ -10,7 +10,7 @@ The following internal data structures are implemented:
 """
 
 
-from copy import deepcopy
+from copy import copy, deepcopy
 from functools import partial
 from logging import getLogger
 
@@ -42,6 +42,16 @@ class _BlockRelations(object):
         # list [UsageKey]
         self.children = []
 
+    def copy(self):
+        """
+        Returns a copy of this instance with its own lists of
+        parents and children.
+        """
+        new_copy = _BlockRelations()
+        new_copy.parents = list(self.parents)
+        new_copy.children = list(self.children)
+        return new_copy
+
 
 class BlockStructure(object):
     """
@@ -53,6 +63,12 @@ class BlockStructure(object):
     the existence of the blocks, and their parents and children
     relationships (graph nodes and edges).
     """
+    # Set of usage keys whose block relations are owned by this block
+    # structure, for structures created with copy_on_write.  None if all
+    # block relations are owned.
+    # set {UsageKey} or None
+    _owned_relations = None
+
     def __init__(self, root_block_usage_key):
 
         # The usage key of the root block for this structure.
@@ -123,7 +139,7 @@ class BlockStructure(object):
                 new root of the block structure.
         """
         self.root_block_usage_key = usage_key
-        self._block_relations[usage_key].parents = []
+        self._get_relations_for_write(usage_key).parents = []
 
     def __contains__(self, usage_key):
         """
@@ -150,6 +166,23 @@ class BlockStructure(object):
         """
         return six.iterkeys(self._block_relations)
 
+    def sort_children(self, usage_key, key):
+        """
+        Sorts the children of the block identified by the given
+        usage_key, using the given key function.
+
+        Note: Use this method rather than sorting the list returned by
+        get_children, which may be shared with other block structures.
+
+        Arguments:
+            usage_key - The usage key of the block whose children
+                are to be sorted.
+
+            key ((UsageKey)->any) - Function returning the sort key of
+                a child's usage key.
+        """
+        self._get_relations_for_write(usage_key).children.sort(key=key)
+
     #--- Block structure traversal methods ---#
 
     def topological_traversal(
@@ -229,8 +262,10 @@ class BlockStructure(object):
                     if child in pruned_block_relations:
                         self._add_to_relations(pruned_block_relations, block_key, child)
 
-        # Replace this structure's relations with the newly pruned one.
+        # Replace this structure's relations with the newly pruned one,
+        # all of which are owned by this structure.
         self._block_relations = pruned_block_relations
+        self._owned_relations = None
 
     def _add_relation(self, parent_key, child_key):
         """
@@ -240,8 +275,26 @@ class BlockStructure(object):
             parent_key (UsageKey) - Usage key of the parent block.
             child_key (UsageKey) - Usage key of the child block.
         """
+        if self._owned_relations is not None:
+            for usage_key in (parent_key, child_key):
+                if usage_key in self._block_relations:
+                    self._get_relations_for_write(usage_key)
+                else:
+                    self._owned_relations.add(usage_key)
         self._add_to_relations(self._block_relations, parent_key, child_key)
 
+    def _get_relations_for_write(self, usage_key):
+        """
+        Returns the block relations of the given usage_key, first
+        replacing them with a private copy if they are shared with
+        another block structure.
+        """
+        block_relations = self._block_relations[usage_key]
+        if self._owned_relations is not None and usage_key not in self._owned_relations:
+            block_relations = self._block_relations[usage_key] = block_relations.copy()
+            self._owned_relations.add(usage_key)
+        return block_relations
+
     @staticmethod
     def _add_to_relations(block_relations, parent_key, child_key):
         """
@@ -406,6 +459,12 @@ class BlockStructureBlockData(BlockStructure):
     # structures, and invalidating any previously cached/stored data.
     VERSION = 2
 
+    # Set of usage keys whose block data is owned by this block structure,
+    # for structures created with copy_on_write.  None if all block data
+    # is owned.
+    # set {UsageKey} or None
+    _owned_block_data = None
+
     def __init__(self, root_block_usage_key):
         super(BlockStructureBlockData, self).__init__(root_block_usage_key)
 
@@ -430,6 +489,37 @@ class BlockStructureBlockData(BlockStructure):
             deepcopy(self._block_data_map),
         )
 
+    def copy_on_write(self):
+        """
+        Returns a new instance of BlockStructureBlockData that shares
+        this instance's block relations and block data until they are
+        modified through the new instance.
+
+        Only the maps of blocks are copied.  The block relations and
+        block data of a given block are copied the first time they are
+        modified through the new instance, so transforming the new
+        instance duplicates only the blocks that were touched, while
+        removing blocks and traversing do not duplicate any block.
+
+        Note: This instance must not be modified afterwards, since the
+        modifications would be visible in the new instance.  Likewise,
+        values returned by the new instance's getters are shared and
+        must be replaced, not modified in place.
+        """
+        from .factory import BlockStructureFactory
+        transformer_data = TransformerDataMap()
+        for transformer_name, data in six.iteritems(self.transformer_data):
+            dict.__setitem__(transformer_data, transformer_name, _copy_field_data(data))
+        block_structure = BlockStructureFactory.create_new(
+            self.root_block_usage_key,
+            dict(self._block_relations),
+            transformer_data,
+            dict(self._block_data_map),
+        )
+        block_structure._owned_relations = set()  # pylint: disable=protected-access
+        block_structure._owned_block_data = set()  # pylint: disable=protected-access
+        return block_structure
+
     def iteritems(self):
         """
         Returns iterator of (UsageKey, BlockData) pairs for all
@@ -596,7 +686,8 @@ class BlockStructureBlockData(BlockStructure):
                 whose data entry is to be deleted.
         """
         try:
-            transformer_block_data = self.get_transformer_block_data(usage_key, transformer)
+            self.get_transformer_block_data(usage_key, transformer)
+            transformer_block_data = self._get_or_create_block(usage_key).transformer_data[transformer]
             delattr(transformer_block_data, key)
         except (AttributeError, KeyError):
             pass
@@ -626,11 +717,11 @@ class BlockStructureBlockData(BlockStructure):
 
         # Remove block from its children.
         for child in children:
-            self._block_relations[child].parents.remove(usage_key)
+            self._get_relations_for_write(child).parents.remove(usage_key)
 
         # Remove block from its parents.
         for parent in parents:
-            self._block_relations[parent].children.remove(usage_key)
+            self._get_relations_for_write(parent).children.remove(usage_key)
 
         # Remove block.
         self._block_relations.pop(usage_key, None)
@@ -758,14 +849,47 @@ class BlockStructureBlockData(BlockStructure):
         Returns the BlockData associated with the given usage_key.
         If not found, creates and returns a new BlockData and
         maps it to the given key.
+
+        The returned BlockData is owned by this block structure and can
+        therefore be modified.
         """
         try:
-            return self._block_data_map[usage_key]
+            block_data = self._block_data_map[usage_key]
         except KeyError:
             block_data = BlockData(usage_key)
             self._block_data_map[usage_key] = block_data
+            if self._owned_block_data is not None:
+                self._owned_block_data.add(usage_key)
             return block_data
 
+        if self._owned_block_data is not None and usage_key not in self._owned_block_data:
+            block_data = self._block_data_map[usage_key] = _copy_block_data(block_data)
+            self._owned_block_data.add(usage_key)
+        return block_data
+
+
+def _copy_field_data(field_data):
+    """
+    Returns a copy of the given FieldData with its own fields dict.
+    The values of the fields are shared.
+    """
+    new_copy = field_data.__class__()
+    new_copy.fields = copy(field_data.fields)
+    return new_copy
+
+
+def _copy_block_data(block_data):
+    """
+    Returns a copy of the given BlockData with its own fields dict and
+    transformer data.  The values of the fields are shared.
+    """
+    new_copy = BlockData(block_data.location)
+    new_copy.fields = copy(block_data.fields)
+    new_copy.transformer_data = copy(block_data.transformer_data)
+    for transformer_name, transformer_data in list(dict.items(new_copy.transformer_data)):
+        dict.__setitem__(new_copy.transformer_data, transformer_name, _copy_field_data(transformer_data))
+    return new_copy
+
 
 class BlockStructureModulestoreData(BlockStructureBlockData):
     """
@@ -40,3 +40,11 @@ class BlockStructureNotFound(BlockStructureException):
         super(BlockStructureNotFound, self).__init__(
             u'Block structure not found; data_usage_key: {}'.format(root_block_usage_key)
         )
+
+
+class ColumnarFormatError(BlockStructureException):
+    """
+    Exception for when serialized data is not in a readable
+    columnar format.
+    """
+    pass
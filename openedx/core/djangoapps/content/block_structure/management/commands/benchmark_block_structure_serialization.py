@@ -0,0 +1,103 @@
+"""
+Command to compare the pickled and columnar serializations of course blocks.
+"""
+
+
+import timeit
+
+from django.core.management.base import BaseCommand
+
+import openedx.core.djangoapps.content.block_structure.api as api
+from openedx.core.djangoapps.content.block_structure import serialization
+from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+from openedx.core.lib.command_utils import parse_course_keys
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_block_structure_serialization 'course-v1:edX+DemoX+Demo_Course' --settings=devstack
+        $ ./manage.py lms benchmark_block_structure_serialization 'course-v1:edX+DemoX+Demo_Course' \
+            --fields display_name due --repeat 10 --settings=devstack
+
+    For each course, reports the serialized size and the time taken to
+    serialize, to deserialize, and to deserialize and then read the given
+    fields of every block, with both the pickled and columnar formats.
+    """
+    help = u'Benchmarks the pickled and columnar serializations of the collected course blocks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'courses',
+            nargs='+',
+            help=u'Course keys of the courses to benchmark.',
+        )
+        parser.add_argument(
+            '--fields',
+            nargs='+',
+            default=['display_name', 'due'],
+            help=u'Collected xBlock fields read from every block after deserialization.',
+        )
+        parser.add_argument(
+            '--repeat',
+            help=u'Number of times each measurement is repeated; the best time is reported.',
+            default=5,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        for course_key in parse_course_keys(options['courses']):
+            block_structure = api.get_course_in_cache(course_key)
+            root_key = block_structure.root_block_usage_key
+            self.stdout.write(u'{}: {} blocks'.format(course_key, len(block_structure)))
+
+            formats = [
+                (u'pickle', _legacy_serialize, lambda data: _legacy_deserialize(data, root_key)),
+                (u'columnar', serialization.serialize, lambda data: serialization.deserialize(data, root_key)),
+            ]
+            for name, serialize, deserialize in formats:
+                data = serialize(block_structure)
+
+                def read_fields(deserialize=deserialize, data=data):
+                    """
+                    Deserializes the data and reads the requested fields of all blocks.
+                    """
+                    deserialized = deserialize(data)
+                    for block_key in deserialized:
+                        for field_name in options['fields']:
+                            deserialized.get_xblock_field(block_key, field_name)
+
+                self.stdout.write(u'  {:<10} size: {:>10} bytes, serialize: {:>8.1f} ms, deserialize: {:>8.1f} ms, '
+                                  u'deserialize and read fields: {:>8.1f} ms'.format(
+                                      name,
+                                      len(data),
+                                      _best_time_ms(lambda: serialize(block_structure), options['repeat']),
+                                      _best_time_ms(lambda: deserialize(data), options['repeat']),
+                                      _best_time_ms(read_fields, options['repeat']),
+                                  ))
+
+
+def _legacy_serialize(block_structure):
+    """
+    Pickles the given block structure the way the BlockStructureStore
+    does when the columnar format is disabled.
+    """
+    # pylint: disable=protected-access
+    return zpickle((block_structure._block_relations, block_structure.transformer_data, block_structure._block_data_map))
+
+
+def _legacy_deserialize(data, root_block_usage_key):
+    """
+    Unpickles data that was pickled by _legacy_serialize.
+    """
+    block_relations, transformer_data, block_data_map = zunpickle(data)
+    return BlockStructureFactory.create_new(root_block_usage_key, block_relations, transformer_data, block_data_map)
+
+
+def _best_time_ms(func, repeat):
+    """
+    Returns the best wall time, in milliseconds, of the given number
+    of calls to the given function.
+    """
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
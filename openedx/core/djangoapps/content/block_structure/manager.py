@@ -64,7 +64,14 @@ class BlockStructureManager(object):
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
         """
-        block_structure = collected_block_structure.copy() if collected_block_structure else self.get_collected()
+        if collected_block_structure:
+            block_structure = collected_block_structure.copy_on_write()
+        else:
+            block_structure = self.get_collected()
+            if self.store.is_process_cache_enabled():
+                # The collected structure may be shared through the
+                # process cache, so transform a copy of it.
+                block_structure = block_structure.copy_on_write()
 
         if starting_block_usage_key:
             # Override the root_block_usage_key so traversals start at the
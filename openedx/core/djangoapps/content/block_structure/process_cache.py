@@ -0,0 +1,175 @@
+"""
+Module for the per-process cache of deserialized BlockStructure objects.
+
+The BlockStructureStore keeps serialized block structures in a shared
+django cache, which means every request that needs a collected block
+structure pays for a network round trip and a deserialization, even
+when the course has not changed in days.  This module provides an
+in-process, size-bounded LRU tier of already-deserialized collected
+structures that sits in front of that cache.
+
+Entries are stamped with the version data of the collected structure
+(see BlockStructureStore._version_data_of_block), and an entry is only
+returned when its stamp matches the version that the caller currently
+expects.  Entries are also invalidated when a course is published or
+deleted.
+
+Note: Cached block structures are shared by all callers in the process
+and must never be mutated.  Callers that need to transform a structure
+must transform a copy of it.
+"""
+
+
+from collections import OrderedDict
+from logging import getLogger
+from threading import Lock
+
+from django.conf import settings
+
+logger = getLogger(__name__)  # pylint: disable=C0103
+
+
+class BlockStructureProcessCache(object):
+    """
+    A thread-safe LRU cache of collected block structures, keyed by the
+    usage key of their root block and bounded by the total number of
+    blocks of the cached structures.
+    """
+    def __init__(self, max_blocks=None):
+        """
+        Arguments:
+            max_blocks (int) - The maximum total number of blocks across
+                all the cached structures.  If None, the value of the
+                PROCESS_CACHE_MAX_BLOCKS block structure setting is used.
+                The cache is disabled if the value is 0.
+        """
+        self._max_blocks = max_blocks
+        self._lock = Lock()
+
+        # Map of root usage key to (version stamp, block structure, size),
+        # ordered from least to most recently used.
+        # OrderedDict {UsageKey: (dict, BlockStructureBlockData, int)}
+        self._entries = OrderedDict()
+        self._num_blocks = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def max_blocks(self):
+        """
+        Returns the maximum total number of blocks that may be cached.
+        """
+        if self._max_blocks is not None:
+            return self._max_blocks
+        return settings.BLOCK_STRUCTURES_SETTINGS.get('PROCESS_CACHE_MAX_BLOCKS', 0)
+
+    def is_enabled(self):
+        """
+        Returns whether the cache is enabled.
+        """
+        return self.max_blocks > 0
+
+    def get(self, root_block_usage_key, version_stamp):
+        """
+        Returns the cached block structure for the given root key if its
+        version stamp matches the given version_stamp; returns None
+        otherwise.  Entries with a different stamp are outdated and are
+        dropped.
+        """
+        with self._lock:
+            entry = self._entries.get(root_block_usage_key)
+            if entry is not None and entry[0] == version_stamp:
+                self._entries.move_to_end(root_block_usage_key)
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            if entry is not None:
+                self._remove(root_block_usage_key)
+                self.invalidations += 1
+            return None
+
+    def set(self, root_block_usage_key, version_stamp, block_structure):
+        """
+        Caches the given block structure for the given root key and
+        version stamp, evicting the least recently used structures as
+        needed to respect the maximum number of blocks.  Structures that
+        are larger than the maximum on their own are not cached.
+        """
+        max_blocks = self.max_blocks
+        size = len(block_structure)
+        if size > max_blocks:
+            return
+
+        with self._lock:
+            self._remove(root_block_usage_key)
+            while self._entries and self._num_blocks + size > max_blocks:
+                evicted_key, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._num_blocks -= evicted_size
+                self.evictions += 1
+                logger.info(u'BlockStructure: Evicted from process cache; %s.', evicted_key)
+
+            self._entries[root_block_usage_key] = (version_stamp, block_structure, size)
+            self._num_blocks += size
+
+    def invalidate(self, root_block_usage_key):
+        """
+        Removes the cached block structure, if any, for the given root key.
+        """
+        with self._lock:
+            if self._remove(root_block_usage_key):
+                self.invalidations += 1
+
+    def invalidate_course(self, course_key):
+        """
+        Removes all cached block structures whose root block belongs
+        to the given course.
+        """
+        with self._lock:
+            for root_block_usage_key in list(self._entries):
+                if getattr(root_block_usage_key, 'course_key', None) == course_key:
+                    self._remove(root_block_usage_key)
+                    self.invalidations += 1
+
+    def clear(self):
+        """
+        Removes all cached block structures and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._num_blocks = 0
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self):
+        """
+        Returns a dict of the cache's counters and current size, for
+        sizing the cache per worker.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'blocks': self._num_blocks,
+                'max_blocks': self.max_blocks,
+            }
+
+    def _remove(self, root_block_usage_key):
+        """
+        Removes the entry for the given root key, returning whether an
+        entry was found.  Must be called with the lock held.
+        """
+        entry = self._entries.pop(root_block_usage_key, None)
+        if entry is None:
+            return False
+        self._num_blocks -= entry[2]
+        return True
+
+
+# The cache shared by all BlockStructureStores in this process.
+block_structure_process_cache = BlockStructureProcessCache()  # pylint: disable=invalid-name
@@ -0,0 +1,412 @@
+"""
+Module for the compact, columnar serialization of BlockStructure objects.
+
+The pickled serialization used historically by the BlockStructureStore
+stores the whole graph of BlockData objects in a single blob, which must
+be entirely unpickled on every cache miss.  The columnar format defined
+here instead stores:
+
+    * a single list of the structure's usage keys, so that blocks can be
+      referred to by their integer index,
+    * the parents and children relations as arrays of those indices,
+    * the structure-wide transformer data, and
+    * one separately compressed "column" per collected xBlock field and
+      per transformer's block-specific data.
+
+Columns are decoded lazily: a column is only decompressed and unpickled
+the first time any block's value in that column is accessed.  So a
+transformer that reads only two collected fields does not pay for the
+decoding of the rest.
+
+Layout of the serialized data:
+
+    MAGIC (4 bytes) | FORMAT_VERSION (1 byte) | header length (4 bytes) |
+    header (zlib-compressed pickle) | sections...
+
+The header contains the offsets and lengths of all other sections, each
+of which is a zlib-compressed pickle.
+"""
+
+
+import abc
+import struct
+import zlib
+from copy import deepcopy
+
+import six
+from six.moves import cPickle as pickle
+
+from .block_structure import BlockData, TransformerData, TransformerDataMap, _BlockRelations
+from .exceptions import ColumnarFormatError
+from .factory import BlockStructureFactory
+
+# Prefix identifying data serialized in the columnar format, as opposed
+# to the legacy zpickled format.
+MAGIC = b'BSC\x00'
+
+# The version of the columnar format.  Incrementally update this value
+# whenever the layout changes.  Data written with a different version is
+# treated as not found by the store and is recollected.
+FORMAT_VERSION = 1
+
+_PICKLE_PROTOCOL = 4
+_PREAMBLE = struct.Struct('>4sBI')
+
+# Section names.
+_KEYS_SECTION = 'keys'
+_RELATIONS_SECTION = 'relations'
+_TRANSFORMER_DATA_SECTION = 'transformer_data'
+_BLOCKS_SECTION = 'blocks'
+_FIELD_SECTION_PREFIX = 'field:'
+_TRANSFORMER_SECTION_PREFIX = 'transformer:'
+
+
+def is_columnar(serialized_data):
+    """
+    Returns whether the given serialized data was written in the
+    columnar format.
+    """
+    return bytes(serialized_data[:len(MAGIC)]) == MAGIC
+
+
+def serialize(block_structure):
+    """
+    Serializes the given block structure into the columnar format.
+
+    Arguments:
+        block_structure (BlockStructureBlockData) - The block structure
+            that is to be serialized.
+
+    Returns:
+        bytes - The serialized data.
+    """
+    # pylint: disable=protected-access
+    block_relations = block_structure._block_relations
+    block_data_map = block_structure._block_data_map
+
+    usage_keys = list(block_relations)
+    usage_keys.extend(key for key in block_data_map if key not in block_relations)
+    key_index = {usage_key: index for index, usage_key in enumerate(usage_keys)}
+
+    relations = [
+        (
+            [key_index[parent] for parent in block_relations[usage_key].parents],
+            [key_index[child] for child in block_relations[usage_key].children],
+        ) if usage_key in block_relations else None
+        for usage_key in usage_keys
+    ]
+
+    blocks = []
+    field_columns = {}
+    transformer_columns = {}
+    for usage_key, block_data in six.iteritems(block_data_map):
+        index = key_index[usage_key]
+        blocks.append(index)
+        for field_name, value in six.iteritems(block_data.fields):
+            field_columns.setdefault(field_name, {})[index] = value
+        for transformer_name, transformer_data in six.iteritems(block_data.transformer_data):
+            transformer_columns.setdefault(transformer_name, {})[index] = dict(transformer_data.fields)
+
+    sections = [
+        (_KEYS_SECTION, usage_keys),
+        (_RELATIONS_SECTION, relations),
+        (_TRANSFORMER_DATA_SECTION, block_structure.transformer_data),
+        (_BLOCKS_SECTION, blocks),
+    ]
+    sections.extend(
+        (_FIELD_SECTION_PREFIX + field_name, column)
+        for field_name, column in six.iteritems(field_columns)
+    )
+    sections.extend(
+        (_TRANSFORMER_SECTION_PREFIX + transformer_name, column)
+        for transformer_name, column in six.iteritems(transformer_columns)
+    )
+
+    header = {}
+    body = []
+    offset = 0
+    for name, value in sections:
+        encoded = _encode(value)
+        header[name] = (offset, len(encoded))
+        body.append(encoded)
+        offset += len(encoded)
+
+    encoded_header = _encode(header)
+    return b''.join(
+        [_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(encoded_header)), encoded_header] + body
+    )
+
+
+def deserialize(serialized_data, root_block_usage_key):
+    """
+    Deserializes the given columnar data and returns the parsed block
+    structure.  Only the usage keys, relations and structure-wide
+    transformer data are decoded eagerly; all field columns are decoded
+    on first access.
+
+    Raises:
+        ColumnarFormatError if the data is not readable.
+    """
+    reader = ColumnReader(serialized_data)
+    usage_keys = reader.section(_KEYS_SECTION)
+
+    block_relations = {}
+    for usage_key, relation in zip(usage_keys, reader.section(_RELATIONS_SECTION)):
+        if relation is not None:
+            parents, children = relation
+            relations = _BlockRelations()
+            relations.parents = [usage_keys[index] for index in parents]
+            relations.children = [usage_keys[index] for index in children]
+            block_relations[usage_key] = relations
+
+    block_data_map = {}
+    for index in reader.section(_BLOCKS_SECTION):
+        usage_key = usage_keys[index]
+        block_data = BlockData(usage_key)
+        block_data.fields = _LazyFieldDict(reader, _FIELD_SECTION_PREFIX, index)
+        block_data.transformer_data = _LazyTransformerDataMap(reader, _TRANSFORMER_SECTION_PREFIX, index)
+        block_data_map[usage_key] = block_data
+
+    return BlockStructureFactory.create_new(
+        root_block_usage_key,
+        block_relations,
+        reader.section(_TRANSFORMER_DATA_SECTION),
+        block_data_map,
+    )
+
+
+class ColumnReader(object):
+    """
+    Read-only accessor to the sections of columnar serialized data.
+    Each section is decoded at most once, upon first access.
+
+    Instances are shared by all blocks of a deserialized structure
+    (and its copies), and must therefore never be mutated other than
+    for caching decoded sections.
+    """
+    def __init__(self, serialized_data):
+        data = memoryview(serialized_data)
+        try:
+            magic, version, header_length = _PREAMBLE.unpack_from(data)
+        except struct.error:
+            raise ColumnarFormatError(u'Serialized data is truncated.')
+        if magic != MAGIC:
+            raise ColumnarFormatError(u'Serialized data is not in the columnar format.')
+        if version != FORMAT_VERSION:
+            raise ColumnarFormatError(
+                u'Unsupported columnar format version {}; expected {}.'.format(version, FORMAT_VERSION)
+            )
+
+        body_start = _PREAMBLE.size + header_length
+        self._data = data
+        self._header = _decode(data[_PREAMBLE.size:body_start])
+        self._body_start = body_start
+        self._decoded = {}
+
+        # Names of all sections, as a set for quick membership checks by
+        # the lazy containers.
+        self.section_names = frozenset(self._header)
+
+    def section(self, name):
+        """
+        Returns the decoded value of the requested section.
+
+        Raises:
+            KeyError if the section does not exist.
+        """
+        try:
+            return self._decoded[name]
+        except KeyError:
+            offset, length = self._header[name]
+            start = self._body_start + offset
+            value = self._decoded[name] = _decode(self._data[start:start + length])
+            return value
+
+    def decoded_section_names(self):
+        """
+        Returns the names of the sections that have been decoded so far.
+        """
+        return set(self._decoded)
+
+
+class _LazyColumnMixin(six.with_metaclass(abc.ABCMeta, object)):
+    """
+    Mixin for dict classes whose values are loaded upon first access
+    from columns of a ColumnReader.
+
+    Keys that were already resolved (loaded, set or deleted) are tracked
+    so that a deleted key is not resurrected from the column.
+    """
+    def __init__(self, reader, section_prefix, index):  # pylint: disable=super-init-not-called
+        self._reader = reader
+        self._section_prefix = section_prefix
+        self._index = index
+        self._resolved = set()
+
+    def __missing__(self, key):
+        section_name = self._section_prefix + key if isinstance(key, six.string_types) else None
+        if key in self._resolved or section_name not in self._reader.section_names:
+            raise KeyError(key)
+        self._resolved.add(key)
+        value = self._from_column(self._reader.section(section_name)[self._index])
+        dict.__setitem__(self, key, value)
+        return value
+
+    def __setitem__(self, key, value):
+        key = self._column_key(key)
+        self._resolved.add(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        key = self._column_key(key)
+        self[key]  # pylint: disable=pointless-statement
+        dict.__delitem__(self, key)
+
+    def __contains__(self, key):
+        try:
+            self[key]  # pylint: disable=pointless-statement
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        self._resolve_all()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._resolve_all()
+        return dict.__len__(self)
+
+    def __eq__(self, other):
+        self._resolve_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._resolve_all()
+        return dict.__repr__(self)
+
+    def keys(self):
+        self._resolve_all()
+        return dict.keys(self)
+
+    def values(self):
+        self._resolve_all()
+        return dict.values(self)
+
+    def items(self):
+        self._resolve_all()
+        return dict.items(self)
+
+    def copy(self):
+        self._resolve_all()
+        return dict(dict.items(self))
+
+    def __reduce__(self):
+        # Pickle as a fully loaded plain container, detached from the reader.
+        self._resolve_all()
+        return (self._plain_type(), (), None, None, iter(dict.items(self)))
+
+    def __copy__(self):
+        # The reader is immutable and shared; loaded values are shared too.
+        new_copy = type(self)(self._reader, self._section_prefix, self._index)
+        new_copy._resolved = set(self._resolved)  # pylint: disable=protected-access
+        dict.update(new_copy, dict.items(self))
+        return new_copy
+
+    def __deepcopy__(self, memo):
+        # The reader is immutable and shared; only loaded values are copied.
+        new_copy = type(self)(self._reader, self._section_prefix, self._index)
+        new_copy._resolved = set(self._resolved)  # pylint: disable=protected-access
+        for key, value in dict.items(self):
+            dict.__setitem__(new_copy, key, deepcopy(value, memo))
+        return new_copy
+
+    def _resolve_all(self):
+        """
+        Loads the values of all the columns that have an entry for
+        this container's index.
+        """
+        prefix_length = len(self._section_prefix)
+        for section_name in self._reader.section_names:
+            if section_name.startswith(self._section_prefix):
+                key = section_name[prefix_length:]
+                if key not in self._resolved:
+                    try:
+                        self[key]  # pylint: disable=pointless-statement
+                    except KeyError:
+                        pass
+
+    def _column_key(self, key):
+        """
+        Returns the key used to look up the given key's column.
+        """
+        return key
+
+    def _from_column(self, value):
+        """
+        Returns the container value for the given value stored in the
+        column.
+        """
+        return value
+
+    @abc.abstractmethod
+    def _plain_type(self):
+        """
+        Returns the non-lazy container type to use when pickling.
+        """
+        raise NotImplementedError
+
+
+class _LazyFieldDict(_LazyColumnMixin, dict):
+    """
+    Lazily loaded map of a block's collected xBlock field values.
+    """
+    def _plain_type(self):
+        return dict
+
+
+class _LazyTransformerDataMap(_LazyColumnMixin, TransformerDataMap):
+    """
+    Lazily loaded map of a transformer's name to its block-specific data.
+    """
+    def __getitem__(self, key):
+        return dict.__getitem__(self, self._translate_key(key))
+
+    def _column_key(self, key):
+        return self._translate_key(key)
+
+    def _from_column(self, value):
+        transformer_data = TransformerData()
+        transformer_data.fields = dict(value)
+        return transformer_data
+
+    def _plain_type(self):
+        return TransformerDataMap
+
+
+def _encode(value):
+    """
+    Returns the compressed pickle of the given value.
+    """
+    return zlib.compress(pickle.dumps(value, _PICKLE_PROTOCOL))
+
+
+def _decode(data):
+    """
+    Returns the value of the given compressed pickle.
+    """
+    try:
+        return pickle.loads(zlib.decompress(data))
+    except Exception as exc:  # pylint: disable=broad-except
+        raise ColumnarFormatError(u'Failed to decode section: {}'.format(exc))
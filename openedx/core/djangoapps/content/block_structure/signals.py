@@ -14,6 +14,7 @@ from xmodule.modulestore.django import SignalHandler
 from . import config
 from .api import clear_course_from_cache
 from .models import BlockStructureNotFound
+from .process_cache import block_structure_process_cache
 from .tasks import update_course_in_cache_v2
 
 log = logging.getLogger(__name__)
@@ -29,6 +30,8 @@ def update_block_structure_on_course_publish(sender, course_key, **kwargs):  # p
     if isinstance(course_key, LibraryLocator):
         return
 
+    block_structure_process_cache.invalidate_course(course_key)
+
     if config.waffle().is_enabled(config.INVALIDATE_CACHE_ON_PUBLISH):
         try:
             clear_course_from_cache(course_key)
@@ -51,4 +54,5 @@ def _delete_block_structure_on_course_delete(sender, course_key, **kwargs):  # p
     module store and invalidates the corresponding cache entry if one
     exists.
     """
+    block_structure_process_cache.invalidate_course(course_key)
     clear_course_from_cache(course_key)
@@ -9,13 +9,15 @@ from logging import getLogger
 import six
 
 from django.utils.encoding import python_2_unicode_compatible
+from edx_django_utils.monitoring import set_custom_attribute
 from openedx.core.lib.cache_utils import zpickle, zunpickle
 
-from . import config
+from . import config, serialization
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
 from .models import BlockStructureModel
+from .process_cache import block_structure_process_cache
 from .transformer_registry import TransformerRegistry
 
 logger = getLogger(__name__)  # pylint: disable=C0103
@@ -45,14 +47,20 @@ class BlockStructureStore(object):
     """
     Storage for BlockStructure objects.
     """
-    def __init__(self, cache):
+    def __init__(self, cache, process_cache=None):
         """
         Arguments:
             cache (django.core.cache.backends.base.BaseCache) - The
                 cache into which cacheable data of the block structure
                 is to be serialized.
+
+            process_cache (BlockStructureProcessCache) - The in-process
+                cache of deserialized block structures to check before
+                the given cache.  If None, the cache shared by the whole
+                process is used.
         """
         self._cache = cache
+        self._process_cache = process_cache or block_structure_process_cache
 
     def add(self, block_structure):
         """
@@ -84,6 +92,10 @@ class BlockStructureStore(object):
                 root of the block structure that is to be retrieved
                 from the store.
 
+        Note: When the process cache is enabled, the returned block
+        structure may be shared with other callers and must not be
+        mutated.  See is_process_cache_enabled.
+
         Returns:
             BlockStructure - The deserialized block structure starting
             at root_block_usage_key, if found.
@@ -93,6 +105,13 @@ class BlockStructureStore(object):
             found.
         """
         bs_model = self._get_model(root_block_usage_key)
+        version_stamp = self._process_cache_version_stamp(bs_model)
+
+        if version_stamp is not None:
+            block_structure = self._process_cache.get(root_block_usage_key, version_stamp)
+            set_custom_attribute('block_structure_process_cache', 'hit' if block_structure is not None else 'miss')
+            if block_structure is not None:
+                return block_structure
 
         try:
             serialized_data = self._get_from_cache(bs_model)
@@ -100,7 +119,10 @@ class BlockStructureStore(object):
             serialized_data = self._get_from_store(bs_model)
             self._add_to_cache(serialized_data, bs_model)
 
-        return self._deserialize(serialized_data, root_block_usage_key)
+        block_structure = self._deserialize(serialized_data, root_block_usage_key)
+        if version_stamp is not None:
+            self._process_cache.set(root_block_usage_key, version_stamp, block_structure)
+        return block_structure
 
     def delete(self, root_block_usage_key):
         """
@@ -111,6 +133,7 @@ class BlockStructureStore(object):
             root_block_usage_key (UsageKey) - The usage_key for the root
                 of the block structure that is to be removed.
         """
+        self._process_cache.invalidate(root_block_usage_key)
         bs_model = self._get_model(root_block_usage_key)
         self._cache.delete(self._encode_root_cache_key(bs_model))
         bs_model.delete()
@@ -131,6 +154,26 @@ class BlockStructureStore(object):
 
         return False
 
+    def is_process_cache_enabled(self):
+        """
+        Returns whether block structures returned by this store may be
+        shared through the process cache.
+
+        The process cache is only used with storage backing enabled,
+        since the version of the collected data is then known from the
+        stored model before fetching any serialized data.
+        """
+        return self._process_cache.is_enabled() and _is_storage_backing_enabled()
+
+    def _process_cache_version_stamp(self, bs_model):
+        """
+        Returns the version stamp to use for the given model in the
+        process cache, or None if the process cache is not to be used.
+        """
+        if self.is_process_cache_enabled():
+            return self._version_data_of_model(bs_model)
+        return None
+
     def _get_model(self, root_block_usage_key):
         """
         Returns the model associated with the given key.
@@ -195,7 +238,13 @@ class BlockStructureStore(object):
     def _serialize(self, block_structure):
         """
         Serializes the data for the given block_structure.
+
+        The columnar format is used when enabled; otherwise the
+        structure is compressed and pickled as a whole.
         """
+        if _is_columnar_serialization_enabled():
+            return serialization.serialize(block_structure)
+
         data_to_cache = (
             block_structure._block_relations,
             block_structure.transformer_data,
@@ -206,7 +255,17 @@ class BlockStructureStore(object):
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
+        The format of the data is detected, so that data written in either
+        format remains readable regardless of the current setting.
         """
+        if serialization.is_columnar(serialized_data):
+            try:
+                return serialization.deserialize(serialized_data, root_block_usage_key)
+            except Exception:
+                # Somehow failed to de-serialized the data, assume it's corrupt.
+                bs_model = self._get_model(root_block_usage_key)
+                logger.exception(u"BlockStructure: Failed to load columnar data from cache for %s", bs_model)
+                raise BlockStructureNotFound(bs_model.data_usage_key)
 
         try:
             block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
@@ -267,3 +326,11 @@ def _is_storage_backing_enabled():
     Returns whether storage backing for Block Structures is enabled.
     """
     return config.waffle().is_enabled(config.STORAGE_BACKING_FOR_CACHE)
+
+
+def _is_columnar_serialization_enabled():
+    """
+    Returns whether Block Structures are to be serialized in the
+    columnar format.
+    """
+    return config.waffle().is_enabled(config.COLUMNAR_SERIALIZATION)
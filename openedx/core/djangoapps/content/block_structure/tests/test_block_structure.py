@@ -312,3 +312,46 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         _set_value(new_copy, 'edit2')
         self.assertEqual(_get_value(block_structure), 'edit1')
         self.assertEqual(_get_value(new_copy), 'edit2')
+
+    def test_copy_on_write(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+        for block in block_structure:
+            block_structure.override_xblock_field(block, 'test_field', block)
+            block_structure.set_transformer_block_field(block, 'transformer', 'test_key', block)
+        block_structure.set_transformer_data('transformer', 'test_key', 'original_value')
+
+        view = block_structure.copy_on_write()
+        self.assert_block_structure(view, ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+
+        # unmodified blocks are shared, not copied
+        self.assertIs(view[4], block_structure[4])
+        self.assertIs(view.get_children(3), block_structure.get_children(3))
+
+        # edits to the view do not affect the original
+        view.remove_block(3, keep_descendants=True)
+        view.override_xblock_field(4, 'test_field', 'edit')
+        view.set_transformer_block_field(5, 'transformer', 'test_key', 'edit')
+        view.remove_transformer_block_field(6, 'transformer', 'test_key')
+        view.set_transformer_data('transformer', 'test_key', 'edit')
+        view.sort_children(0, key=lambda block: -block)
+
+        self.assert_block_structure(view, [[1, 2], [5, 6], [4, 5, 6], [], [], [], []], missing_blocks=[3])
+        self.assertEqual(view.get_children(0), [2, 1])
+        self.assertEqual(view.get_xblock_field(4, 'test_field'), 'edit')
+        self.assertEqual(view.get_transformer_block_field(5, 'transformer', 'test_key'), 'edit')
+        self.assertIsNone(view.get_transformer_block_field(6, 'transformer', 'test_key'))
+        self.assertEqual(view.get_transformer_data('transformer', 'test_key'), 'edit')
+
+        self.assert_block_structure(block_structure, ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+        self.assertEqual(block_structure.get_children(0), [1, 2])
+        self.assertEqual(block_structure.get_xblock_field(4, 'test_field'), 4)
+        self.assertEqual(block_structure.get_transformer_block_field(5, 'transformer', 'test_key'), 5)
+        self.assertEqual(block_structure.get_transformer_block_field(6, 'transformer', 'test_key'), 6)
+        self.assertEqual(block_structure.get_transformer_data('transformer', 'test_key'), 'original_value')
+
+        # a view of a view does not affect either
+        nested_view = view.copy_on_write()
+        nested_view.remove_block(2, keep_descendants=False)
+        nested_view._prune_unreachable()  # pylint: disable=protected-access
+        self.assert_block_structure(nested_view, [[1], [5, 6], [], [], [], [], []], missing_blocks=[2, 3, 4])
+        self.assert_block_structure(view, [[1, 2], [5, 6], [4, 5, 6], [], [], [], []], missing_blocks=[3])
@@ -0,0 +1,126 @@
+"""
+Tests for process_cache.py
+"""
+
+
+from django.test import TestCase
+from edx_toggles.toggles.testutils import override_waffle_switch
+from opaque_keys.edx.locator import CourseLocator
+
+from ..config import STORAGE_BACKING_FOR_CACHE, waffle_switch
+from ..process_cache import BlockStructureProcessCache
+from ..store import BlockStructureStore
+from .helpers import ChildrenMapTestMixin, MockCache, UsageKeyFactoryMixin
+
+
+class TestBlockStructureProcessCache(ChildrenMapTestMixin, TestCase):
+    """
+    Tests for BlockStructureProcessCache
+    """
+    def setUp(self):
+        super(TestBlockStructureProcessCache, self).setUp()
+        self.structures = {
+            root: self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+            for root in ('a', 'b', 'c')
+        }
+        self.process_cache = BlockStructureProcessCache(max_blocks=2 * len(self.SIMPLE_CHILDREN_MAP))
+
+    def test_disabled(self):
+        process_cache = BlockStructureProcessCache(max_blocks=0)
+        self.assertFalse(process_cache.is_enabled())
+        process_cache.set('a', 1, self.structures['a'])
+        self.assertIsNone(process_cache.get('a', 1))
+
+    def test_hit_and_miss(self):
+        self.assertIsNone(self.process_cache.get('a', 1))
+        self.process_cache.set('a', 1, self.structures['a'])
+        self.assertIs(self.process_cache.get('a', 1), self.structures['a'])
+        self.assertDictContainsSubset({'hits': 1, 'misses': 1, 'entries': 1}, self.process_cache.stats())
+
+    def test_version_stamp_mismatch(self):
+        self.process_cache.set('a', 1, self.structures['a'])
+        self.assertIsNone(self.process_cache.get('a', 2))
+        self.assertIsNone(self.process_cache.get('a', 1))
+        self.assertDictContainsSubset({'misses': 2, 'invalidations': 1, 'entries': 0}, self.process_cache.stats())
+
+    def test_lru_eviction(self):
+        self.process_cache.set('a', 1, self.structures['a'])
+        self.process_cache.set('b', 1, self.structures['b'])
+        self.process_cache.get('a', 1)
+        self.process_cache.set('c', 1, self.structures['c'])
+
+        self.assertIsNotNone(self.process_cache.get('a', 1))
+        self.assertIsNone(self.process_cache.get('b', 1))
+        self.assertIsNotNone(self.process_cache.get('c', 1))
+        self.assertDictContainsSubset(
+            {'evictions': 1, 'entries': 2, 'blocks': 2 * len(self.SIMPLE_CHILDREN_MAP)},
+            self.process_cache.stats(),
+        )
+
+    def test_too_large(self):
+        process_cache = BlockStructureProcessCache(max_blocks=len(self.SIMPLE_CHILDREN_MAP) - 1)
+        process_cache.set('a', 1, self.structures['a'])
+        self.assertIsNone(process_cache.get('a', 1))
+
+    def test_invalidate_course(self):
+        course_key = CourseLocator('org', 'course', 'run')
+        other_course_key = CourseLocator('org', 'course', 'other_run')
+        self.process_cache.set(course_key.make_usage_key('course', 'course'), 1, self.structures['a'])
+        self.process_cache.set(other_course_key.make_usage_key('course', 'course'), 1, self.structures['b'])
+
+        self.process_cache.invalidate_course(course_key)
+        self.assertIsNone(self.process_cache.get(course_key.make_usage_key('course', 'course'), 1))
+        self.assertIsNotNone(self.process_cache.get(other_course_key.make_usage_key('course', 'course'), 1))
+
+
+class TestBlockStructureStoreWithProcessCache(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the use of the process cache by BlockStructureStore.
+    """
+    def setUp(self):
+        super(TestBlockStructureStoreWithProcessCache, self).setUp()
+        self.block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        self.block_structure.override_xblock_field(
+            self.block_structure.root_block_usage_key, 'course_version', 'version',
+        )
+        self.mock_cache = MockCache()
+        self.process_cache = BlockStructureProcessCache(max_blocks=100)
+        self.store = BlockStructureStore(self.mock_cache, self.process_cache)
+
+    def test_requires_storage_backing(self):
+        self.store.add(self.block_structure)
+        self.assertFalse(self.store.is_process_cache_enabled())
+        self.assertIsNot(
+            self.store.get(self.block_structure.root_block_usage_key),
+            self.store.get(self.block_structure.root_block_usage_key),
+        )
+        self.assertEqual(self.process_cache.stats()['entries'], 0)
+
+    def test_get_from_process_cache(self):
+        with override_waffle_switch(waffle_switch(STORAGE_BACKING_FOR_CACHE), active=True):
+            self.store.add(self.block_structure)
+            self.assertTrue(self.store.is_process_cache_enabled())
+            first = self.store.get(self.block_structure.root_block_usage_key)
+
+            self.mock_cache.map.clear()
+            self.assertIs(self.store.get(self.block_structure.root_block_usage_key), first)
+            self.assert_block_structure(first, self.SIMPLE_CHILDREN_MAP)
+            self.assertDictContainsSubset({'hits': 1, 'misses': 1}, self.process_cache.stats())
+
+    def test_new_version_not_served_from_process_cache(self):
+        with override_waffle_switch(waffle_switch(STORAGE_BACKING_FOR_CACHE), active=True):
+            self.store.add(self.block_structure)
+            first = self.store.get(self.block_structure.root_block_usage_key)
+
+            self.block_structure.override_xblock_field(
+                self.block_structure.root_block_usage_key, 'course_version', 'new_version',
+            )
+            self.store.add(self.block_structure)
+            self.assertIsNot(self.store.get(self.block_structure.root_block_usage_key), first)
+
+    def test_delete_invalidates(self):
+        with override_waffle_switch(waffle_switch(STORAGE_BACKING_FOR_CACHE), active=True):
+            self.store.add(self.block_structure)
+            self.store.get(self.block_structure.root_block_usage_key)
+            self.store.delete(self.block_structure.root_block_usage_key)
+            self.assertEqual(self.process_cache.stats()['entries'], 0)
@@ -0,0 +1,120 @@
+"""
+Tests for serialization.py
+"""
+
+
+import pickle
+from copy import deepcopy
+
+import ddt
+from django.test import TestCase
+
+from ..exceptions import ColumnarFormatError
+from ..serialization import deserialize, is_columnar, serialize
+from .helpers import ChildrenMapTestMixin, MockTransformer, UsageKeyFactoryMixin
+
+
+@ddt.ddt
+class TestColumnarSerialization(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the columnar serialization of block structures.
+    """
+    def setUp(self):
+        super(TestColumnarSerialization, self).setUp()
+        self.children_map = self.DAG_CHILDREN_MAP
+        self.block_structure = self.create_block_structure(self.children_map)
+        self.block_structure._add_transformer(MockTransformer)  # pylint: disable=protected-access
+        for block_id in range(len(self.children_map)):
+            block_key = self.block_key_factory(block_id)
+            self.block_structure.override_xblock_field(block_key, 'display_name', u'Block {}'.format(block_id))
+            self.block_structure.set_transformer_block_field(block_key, MockTransformer, 'test', block_id)
+        self.block_structure.override_xblock_field(self.block_key_factory(3), 'due', 'tomorrow')
+
+    def _round_trip(self):
+        """
+        Returns the deserialization of the serialized block structure.
+        """
+        serialized_data = serialize(self.block_structure)
+        self.assertTrue(is_columnar(serialized_data))
+        return deserialize(serialized_data, self.block_structure.root_block_usage_key)
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_relations(self, children_map):
+        self.children_map = children_map
+        self.block_structure = self.create_block_structure(children_map)
+        deserialized = self._round_trip()
+        self.assert_block_structure(deserialized, children_map)
+        for block_key in self.block_structure:
+            self.assertEqual(deserialized.get_parents(block_key), self.block_structure.get_parents(block_key))
+            self.assertEqual(deserialized.get_children(block_key), self.block_structure.get_children(block_key))
+
+    def test_block_data(self):
+        deserialized = self._round_trip()
+        self.assertEqual(deserialized._get_transformer_data_version(MockTransformer), 1)  # pylint: disable=protected-access
+        for block_id in range(len(self.children_map)):
+            block_key = self.block_key_factory(block_id)
+            self.assertEqual(deserialized.get_xblock_field(block_key, 'display_name'), u'Block {}'.format(block_id))
+            self.assertEqual(deserialized.get_transformer_block_field(block_key, MockTransformer, 'test'), block_id)
+        self.assertEqual(deserialized.get_xblock_field(self.block_key_factory(3), 'due'), 'tomorrow')
+        self.assertIsNone(deserialized.get_xblock_field(self.block_key_factory(4), 'due'))
+
+    def test_lazy_decoding(self):
+        deserialized = self._round_trip()
+        reader = deserialized[self.block_key_factory(0)].fields._reader  # pylint: disable=protected-access
+        self.assertFalse(any(name.startswith('field:') for name in reader.decoded_section_names()))
+
+        deserialized.get_xblock_field(self.block_key_factory(0), 'display_name')
+        decoded = reader.decoded_section_names()
+        self.assertIn('field:display_name', decoded)
+        self.assertNotIn('field:due', decoded)
+        self.assertNotIn('transformer:MockTransformer', decoded)
+
+    def test_mutations(self):
+        deserialized = self._round_trip()
+        block_key = self.block_key_factory(3)
+        deserialized.override_xblock_field(block_key, 'due', 'today')
+        self.assertEqual(deserialized.get_xblock_field(block_key, 'due'), 'today')
+
+        delattr(deserialized[block_key], 'display_name')
+        self.assertIsNone(deserialized.get_xblock_field(block_key, 'display_name'))
+
+        deserialized.remove_transformer_block_field(block_key, MockTransformer, 'test')
+        self.assertIsNone(deserialized.get_transformer_block_field(block_key, MockTransformer, 'test'))
+
+    def test_copy_is_independent(self):
+        deserialized = self._round_trip()
+        block_key = self.block_key_factory(3)
+        copied = deserialized.copy()
+        copied.override_xblock_field(block_key, 'due', 'today')
+        copied.remove_block(self.block_key_factory(4), keep_descendants=False)
+
+        self.assertEqual(deserialized.get_xblock_field(block_key, 'due'), 'tomorrow')
+        self.assertIn(self.block_key_factory(4), deserialized)
+        self.assertEqual(copied.get_xblock_field(self.block_key_factory(5), 'display_name'), u'Block 5')
+
+    def test_pickle_detaches_from_reader(self):
+        block_data = self._round_trip()[self.block_key_factory(3)]
+        unpickled = pickle.loads(pickle.dumps(block_data))
+        self.assertEqual(unpickled.fields, {'display_name': u'Block 3', 'due': 'tomorrow'})
+        self.assertEqual(unpickled.transformer_data[MockTransformer].test, 3)
+        self.assertEqual(deepcopy(block_data).fields, unpickled.fields)
+
+    def test_reserialize(self):
+        deserialized = deserialize(serialize(self._round_trip()), self.block_structure.root_block_usage_key)
+        self.assert_block_structure(deserialized, self.children_map)
+        self.assertEqual(deserialized.get_xblock_field(self.block_key_factory(3), 'due'), 'tomorrow')
+
+    def test_unsupported_version(self):
+        serialized_data = bytearray(serialize(self.block_structure))
+        serialized_data[4] += 1
+        with self.assertRaises(ColumnarFormatError):
+            deserialize(bytes(serialized_data), self.block_structure.root_block_usage_key)
+
+    def test_not_columnar(self):
+        self.assertFalse(is_columnar(b'x\x9c'))
+        with self.assertRaises(ColumnarFormatError):
+            deserialize(b'x\x9c', self.block_structure.root_block_usage_key)
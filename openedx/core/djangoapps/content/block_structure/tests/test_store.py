@@ -8,9 +8,10 @@ from edx_toggles.toggles.testutils import override_waffle_switch
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE, waffle_switch
+from ..config import COLUMNAR_SERIALIZATION, STORAGE_BACKING_FOR_CACHE, waffle_switch
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
+from ..serialization import is_columnar
 from ..store import BlockStructureStore
 from .helpers import ChildrenMapTestMixin, MockCache, MockTransformer, UsageKeyFactoryMixin
 
@@ -68,6 +69,35 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
             with self.assertRaises(BlockStructureNotFound):
                 self.store.get(self.block_structure.root_block_usage_key)
 
+    @ddt.data(True, False)
+    def test_add_and_get_columnar(self, with_storage_backing):
+        with override_waffle_switch(waffle_switch(STORAGE_BACKING_FOR_CACHE), active=with_storage_backing):
+            with override_waffle_switch(waffle_switch(COLUMNAR_SERIALIZATION), active=True):
+                self.store.add(self.block_structure)
+                self.assertTrue(all(is_columnar(value) for value in self.mock_cache.map.values()))
+                stored_value = self.store.get(self.block_structure.root_block_usage_key)
+            self.assert_block_structure(stored_value, self.children_map)
+            self.assertEqual(
+                stored_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+                u'{} val'.format(MockTransformer.name()),
+            )
+
+    @ddt.data(True, False)
+    def test_format_change(self, columnar_on_write):
+        with override_waffle_switch(waffle_switch(COLUMNAR_SERIALIZATION), active=columnar_on_write):
+            self.store.add(self.block_structure)
+        with override_waffle_switch(waffle_switch(COLUMNAR_SERIALIZATION), active=not columnar_on_write):
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.children_map)
+
+    def test_corrupt_columnar_data(self):
+        with override_waffle_switch(waffle_switch(COLUMNAR_SERIALIZATION), active=True):
+            self.store.add(self.block_structure)
+        for cache_key, value in self.mock_cache.map.items():
+            self.mock_cache.map[cache_key] = value[:20]
+        with self.assertRaises(BlockStructureNotFound):
+            self.store.get(self.block_structure.root_block_usage_key)
+
     def test_uncached_without_storage(self):
         self.store.add(self.block_structure)
         self.mock_cache.map.clear()
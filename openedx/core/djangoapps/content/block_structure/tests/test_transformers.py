@@ -82,3 +82,14 @@ class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
                 self.transformers.verify_versions(block_structure)
             self.transformers.collect(block_structure)
             self.assertTrue(self.transformers.verify_versions(block_structure))
+
+    def test_access_signature(self):
+        self.add_mock_transformer()
+        self.assertIsNone(self.transformers.access_signature(block_structure=MagicMock()))
+
+        with patch.object(MockTransformer, 'access_signature', return_value=('a',)):
+            with patch.object(MockFilteringTransformer, 'access_signature', return_value=('b',)):
+                self.assertEqual(
+                    self.transformers.access_signature(block_structure=MagicMock()),
+                    (('MockFilteringTransformer', ('b',)), ('MockTransformer', ('a',))),
+                )
@@ -158,6 +158,32 @@ class BlockStructureTransformer(object):
         """
         raise NotImplementedError
 
+    def access_signature(self, usage_info, block_structure):  # pylint: disable=unused-argument
+        """
+        Returns a hashable value that captures everything about the
+        given usage_info on which the result of this transformer's
+        transform depends, so that usage_infos with equal signatures
+        can share a single transformation of the block structure.
+        For example, a transformer that only hides blocks from
+        non-staff users may return whether the user has staff access.
+
+        Returns None, the default, if the transform cannot be shared,
+        for example when it depends on data that is not captured by
+        the signature or when it has side effects for the given
+        usage_info.
+
+        The signature is computed against the collected block_structure,
+        before any transformer is applied, and must not modify it.
+
+        Arguments:
+            usage_info (any negotiated type) - The usage-specific object
+                that would be passed to the transform method.
+
+            block_structure (BlockStructureBlockData) - The collected
+                block structure that would be transformed.
+        """
+        return None
+
 
 class FilteringTransformerMixin(BlockStructureTransformer):
     """
@@ -106,6 +106,30 @@ class BlockStructureTransformers(object):
             )
         return True
 
+    def access_signature(self, block_structure):
+        """
+        Returns a hashable value combining the access signatures of all
+        the transformers in the collection for this collection's
+        usage_info.  Collections with equal signatures transform the
+        given block structure identically, so the transformed result of
+        one may be shared with the others.
+
+        Returns None if any of the transformers does not support
+        sharing its transform.
+        """
+        signature = []
+        for transformer in self._transformers['supports_filter'] + self._transformers['no_filter']:
+            # Transformers that are not BlockStructureTransformer
+            # subclasses may not define an access signature.
+            get_access_signature = getattr(transformer, 'access_signature', None)
+            if get_access_signature is None:
+                return None
+            transformer_signature = get_access_signature(self.usage_info, block_structure)
+            if transformer_signature is None:
+                return None
+            signature.append((transformer.name(), transformer_signature))
+        return tuple(signature)
+
     def transform(self, block_structure):
         """
         The given block structure is transformed by each transformer in the
@@ -0,0 +1,260 @@
+"""
+A size-bounded cache of course asset data in local files, which are served through memory maps.
+
+The cache is configured with the CONTENTSERVER_LOCAL_CACHE_DIR and CONTENTSERVER_LOCAL_CACHE_MAX_SIZE
+settings, and is disabled when CONTENTSERVER_LOCAL_CACHE_DIR isn't set.
+"""
+
+
+import calendar
+import hashlib
+import io
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+
+import six
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+# Once the cache has grown past its maximum size, the least recently used files are
+# removed until the cache is down to this fraction of its maximum size.
+EVICTION_TARGET = 0.9
+
+_local_asset_cache = None  # pylint: disable=invalid-name
+_local_asset_cache_lock = threading.Lock()  # pylint: disable=invalid-name
+
+
+def get_local_asset_cache():
+    """
+    Returns the configured LocalAssetCache, or None if the local asset cache is disabled.
+    """
+    global _local_asset_cache  # pylint: disable=global-statement,invalid-name
+    directory = getattr(settings, 'CONTENTSERVER_LOCAL_CACHE_DIR', None)
+    if not directory:
+        return None
+
+    with _local_asset_cache_lock:
+        if _local_asset_cache is None or _local_asset_cache.directory != directory:
+            _local_asset_cache = LocalAssetCache(directory, settings.CONTENTSERVER_LOCAL_CACHE_MAX_SIZE)
+    return _local_asset_cache
+
+
+def _hash(value):
+    """
+    Returns a hash of the given value which is safe to use as a file name.
+    """
+    return hashlib.sha1(six.text_type(value).encode('utf-8')).hexdigest()
+
+
+class LocalAssetCache(object):
+    """
+    Caches the data of assets in files under ``directory``, one per asset location and content digest.
+
+    Files are never modified once they are in the cache: a new version of an asset has a new digest,
+    and so is written to a new file, which replaces the files of its older versions. Readers can keep
+    using a file which has been removed from the cache until they close it. The modification time of
+    a file is the time its asset was last modified, and its access time is the time it was last used.
+
+    The least recently used files are removed once the cache grows past ``max_size`` bytes. Several
+    processes can share a directory. Each one counts the bytes it has added since it last scanned the
+    directory, and scans it again before evicting files, so ``max_size`` is only approximately kept to.
+    """
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # The paths of the files which are being added in the background by this process.
+        self._adding = set()
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._size = self._evict()
+
+    @staticmethod
+    def relative_path(location, content_digest):
+        """
+        Returns the path, relative to the cache's directory, of the cached data of the asset
+        at ``location`` with ``content_digest``.
+        """
+        return u'{}/{}'.format(_hash(location), _hash(content_digest))
+
+    def _path(self, location, content_digest):
+        """
+        Returns the path of the cached data of the asset at ``location`` with ``content_digest``.
+        """
+        return os.path.join(self.directory, _hash(location), _hash(content_digest))
+
+    def touch(self, location, content_digest):
+        """
+        Marks the cached data of the asset at ``location`` with ``content_digest`` as the most
+        recently used, and returns whether it is cached.
+        """
+        path = self._path(location, content_digest)
+        try:
+            os.utime(path, ns=(int(time.time() * 1e9), os.stat(path).st_mtime_ns))
+        except OSError:
+            return False
+        return True
+
+    def open(self, location, content_digest, first=0, last=None):
+        """
+        Returns a MappedAssetFile of the bytes ``first`` to ``last`` (included) of the cached data of the
+        asset at ``location`` with ``content_digest``, or None if it isn't cached.
+        """
+        path = self._path(location, content_digest)
+        try:
+            asset_file = io.open(path, 'rb', buffering=0)
+        except (IOError, OSError):
+            return None
+
+        try:
+            asset_map = mmap.mmap(asset_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            asset_file.close()
+            return None
+
+        self.touch(location, content_digest)
+        return MappedAssetFile(asset_file, asset_map, first, last)
+
+    def add(self, location, content_digest, chunks, last_modified=None):
+        """
+        Caches the data of the asset at ``location`` with ``content_digest``, which is given by
+        the iterable ``chunks``, and removes the data of the other versions of the asset.
+        The modification time of the cached file is set to the datetime ``last_modified``.
+        """
+        path = self._path(location, content_digest)
+        location_dir = os.path.dirname(path)
+        os.makedirs(location_dir, exist_ok=True)
+
+        # Write the data to a temporary file first, so that the cached file is complete as soon as it exists.
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with io.open(file_descriptor, 'wb') as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+                size = temp_file.tell()
+            if last_modified is not None:
+                os.utime(temp_path, (time.time(), calendar.timegm(last_modified.utctimetuple())))
+            os.rename(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+        for name in os.listdir(location_dir):
+            stale_path = os.path.join(location_dir, name)
+            if stale_path != path:
+                try:
+                    size -= os.path.getsize(stale_path)
+                    os.remove(stale_path)
+                except OSError:
+                    pass
+
+        with self._lock:
+            self._size += size
+            if self._size > self.max_size:
+                self._size = self._evict()
+
+    def add_in_background(self, location, content_digest, add):
+        """
+        Calls ``add`` in a background thread to cache the data of the asset at ``location`` with
+        ``content_digest``, unless this process is already caching it. Returns the thread, or None
+        if none was started.
+        """
+        path = self._path(location, content_digest)
+        with self._lock:
+            if path in self._adding:
+                return None
+            self._adding.add(path)
+
+        def add_and_release():
+            try:
+                add()
+            finally:
+                with self._lock:
+                    self._adding.discard(path)
+
+        thread = threading.Thread(target=add_and_release, name=u'local-asset-cache-add')
+        thread.daemon = True
+        try:
+            thread.start()
+        except RuntimeError:
+            with self._lock:
+                self._adding.discard(path)
+            raise
+        return thread
+
+    def _evict(self):
+        """
+        Removes the least recently used files until the cache is within its maximum size, and
+        returns the size of the files left in the cache. The caller must hold the cache's lock.
+        """
+        cached_files = []
+        for location_entry in os.scandir(self.directory):
+            if not location_entry.is_dir():
+                continue
+            for entry in os.scandir(location_entry.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                cached_files.append((stat.st_atime, stat.st_size, entry.path))
+
+        size = sum(file_size for __, file_size, __ in cached_files)
+        if size > self.max_size:
+            cached_files.sort()
+            for __, file_size, path in cached_files:
+                if size <= self.max_size * EVICTION_TARGET:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                size -= file_size
+            log.info(u"Evicted assets from the local asset cache down to %d bytes", size)
+
+        return size
+
+
+class MappedAssetFile(io.RawIOBase):
+    """
+    A read-only file of the bytes ``first`` to ``last`` (included) of a cached asset, which are
+    read through the memory map ``asset_map`` of ``asset_file``.
+
+    The file descriptor of ``asset_file`` is positioned at ``first``, so that WSGI servers which send
+    file responses with sendfile, up to their Content-Length, send the range without copying it.
+    """
+    def __init__(self, asset_file, asset_map, first=0, last=None):
+        super(MappedAssetFile, self).__init__()
+        self._file = asset_file
+        self._map = asset_map
+        self.length = len(asset_map)
+        self._position = first
+        self._end = self.length if last is None else last + 1
+        self._file.seek(first)
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        end = self._end if size is None or size < 0 else min(self._end, self._position + size)
+        data = self._map[self._position:end]
+        self._position += len(data)
+        return data
+
+    def readinto(self, buffer):  # pylint: disable=arguments-differ
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._map.close()
+            self._file.close()
+        super(MappedAssetFile, self).close()
@@ -7,7 +7,9 @@ import datetime
 import logging
 
 import six
+from django.conf import settings
 from django.http import (
+    FileResponse,
     HttpResponse,
     HttpResponseBadRequest,
     HttpResponseForbidden,
@@ -23,12 +25,13 @@ from six import text_type
 from openedx.core.djangoapps.header_control import force_header_for_response
 from common.djangoapps.student.models import CourseEnrollment
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import XASSET_LOCATION_TAG, StaticContent
+from xmodule.contentstore.content import XASSET_LOCATION_TAG, StaticContent, StaticContentStream
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore import InvalidLocationError
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
 from .caching import get_cached_content, set_cached_content
+from .local_cache import get_local_asset_cache
 from .models import CdnUserAgentsConfig, CourseAssetCacheTtlConfig
 
 log = logging.getLogger(__name__)
@@ -126,18 +129,17 @@ class StaticContentServer(MiddlewareMixin):
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
 
+            # Large assets in the local asset cache can be handed off to the web server, which then
+            # streams them, and any range of them, without holding up a worker for the transfer.
+            response = self.get_accel_redirect_response(content, loc)
+
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
             # Request -> Range attribute structure: "Range: bytes=first-[last]"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
-            response = None
-            if request.META.get('HTTP_RANGE'):
-                # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
-                    content = AssetManager.find(loc, as_stream=True)
-
+            if response is None and request.META.get('HTTP_RANGE'):
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -163,7 +165,15 @@ class StaticContentServer(MiddlewareMixin):
 
                         if 0 <= first <= last < content.length:
                             # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                            asset_file = self.open_local_cached_asset(content, loc, first, last)
+                            if asset_file is not None:
+                                response = FileResponse(asset_file)
+                            else:
+                                # If we have a StaticContent, get a StaticContentStream.
+                                # Can't manipulate the bytes otherwise.
+                                if isinstance(content, StaticContent):
+                                    content = AssetManager.find(loc, as_stream=True)
+                                response = HttpResponse(content.stream_data_in_range(first, last))
                             response['Content-Range'] = u'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
@@ -181,7 +191,11 @@ class StaticContentServer(MiddlewareMixin):
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                asset_file = self.open_local_cached_asset(content, loc)
+                if asset_file is not None:
+                    response = FileResponse(asset_file)
+                else:
+                    response = HttpResponse(content.stream_data())
                 response['Content-Length'] = content.length
 
             if newrelic:
@@ -304,6 +318,93 @@ class StaticContentServer(MiddlewareMixin):
 
         return content
 
+    def get_local_asset_cache_for_content(self, content):
+        """
+        Returns the local asset cache if it should be used for the given content, or None if the
+        local asset cache is disabled, or if the content is already held in memory.
+        """
+        local_cache = get_local_asset_cache()
+        if (
+            local_cache is None or
+            not isinstance(content, StaticContentStream) or
+            not content.content_digest or
+            not content.length or
+            content.length > local_cache.max_size
+        ):
+            return None
+        return local_cache
+
+    def add_to_local_asset_cache(self, local_cache, content, location):
+        """
+        Adds the given content to the local asset cache, and returns whether it was added.
+        """
+        # Cache the asset from a stream of its own, so that the content can still be served
+        # from the contentstore if caching it fails.
+        try:
+            cache_content = AssetManager.find(location, as_stream=True)
+            try:
+                if cache_content.content_digest != content.content_digest:
+                    # The asset has changed since the content was loaded.
+                    return False
+                local_cache.add(
+                    location, content.content_digest, cache_content.stream_data(),
+                    last_modified=content.last_modified_at
+                )
+            finally:
+                cache_content.close()
+        except (ItemNotFoundError, NotFoundError, IOError, OSError):
+            log.exception(u"Could not add the asset %s to the local asset cache", text_type(location))
+            return False
+        return True
+
+    def fill_local_asset_cache(self, local_cache, content, location):
+        """
+        Adds the given content to the local asset cache in the background, unless this process
+        is already adding it. Returns the thread adding it, or None if none was started.
+        """
+        return local_cache.add_in_background(
+            location, content.content_digest, lambda: self.add_to_local_asset_cache(local_cache, content, location)
+        )
+
+    def open_local_cached_asset(self, content, location, first=0, last=None):
+        """
+        Returns a file of the bytes first to last (included) of the given content from the local
+        asset cache. Returns None if the content isn't served from the local asset cache, or if it
+        isn't cached yet, in which case it is cached in the background for later requests.
+        """
+        local_cache = self.get_local_asset_cache_for_content(content)
+        if local_cache is None:
+            return None
+
+        asset_file = local_cache.open(location, content.content_digest, first, last)
+        if asset_file is None:
+            self.fill_local_asset_cache(local_cache, content, location)
+        return asset_file
+
+    def get_accel_redirect_response(self, content, location):
+        """
+        Returns a response which has the web server send the given content from the local asset
+        cache. Returns None if CONTENTSERVER_LOCAL_CACHE_ACCEL_REDIRECT isn't set, if the content
+        isn't served from the local asset cache, or if it isn't cached yet, in which case it is
+        cached in the background for later requests.
+        """
+        accel_redirect = getattr(settings, 'CONTENTSERVER_LOCAL_CACHE_ACCEL_REDIRECT', None)
+        local_cache = self.get_local_asset_cache_for_content(content) if accel_redirect else None
+        if local_cache is None:
+            return None
+
+        if not local_cache.touch(location, content.content_digest):
+            self.fill_local_asset_cache(local_cache, content, location)
+            return None
+
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = accel_redirect.rstrip('/') + '/' + local_cache.relative_path(
+            location, content.content_digest
+        )
+        if newrelic:
+            newrelic.agent.add_custom_parameter('contentserver.accel_redirect', True)
+        return response
+
 
 def parse_range_header(header_value, content_length):
     """
@@ -8,8 +8,12 @@ import copy
 import datetime
 import ddt
 import logging
+import os
+import shutil
 import six
+import tempfile
 import unittest
+from contextlib import contextmanager
 from uuid import uuid4
 
 from django.conf import settings
@@ -401,6 +405,88 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
         is_from_cdn = StaticContentServer.is_cdn_request(browser_request)
         self.assertEqual(is_from_cdn, True)
 
+    @contextmanager
+    def wait_for_local_cache_fills(self):
+        """
+        Defers adding assets to the local asset cache until the end of the block, then adds them
+        and waits for them to be added.
+        """
+        fills = []
+        fill_local_asset_cache = StaticContentServer.fill_local_asset_cache
+        with patch.object(StaticContentServer, 'fill_local_asset_cache', autospec=True) as mock_fill:
+            mock_fill.side_effect = lambda *args: fills.append(args)
+            yield
+        self.assertTrue(fills)
+        for args in fills:
+            thread = fill_local_asset_cache(*args)
+            if thread is not None:
+                thread.join()
+
+    def test_local_cache(self):
+        """
+        Test that assets too large for the content cache are served from the local asset cache,
+        both in full and in ranges.
+        """
+        data = bytes(bytearray(range(256))) * 8192
+        asset_key = self.course_key.make_asset_key('asset', 'large_asset.bin')
+        self.contentstore.save(StaticContent(asset_key, 'large_asset.bin', 'application/octet-stream', data))
+        self.addCleanup(self.contentstore.delete, asset_key)
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+
+        with override_settings(CONTENTSERVER_LOCAL_CACHE_DIR=cache_dir):
+            # The first request is served from the contentstore, while the asset is cached in the background.
+            with self.wait_for_local_cache_fills():
+                resp = self.client.get(six.text_type(asset_key), HTTP_RANGE='bytes=0-99')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, data[:100])
+
+            resp = self.client.get(six.text_type(asset_key))
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp['Content-Type'], 'application/octet-stream')
+            self.assertEqual(resp['Content-Length'], str(len(data)))
+            self.assertEqual(b''.join(resp.streaming_content), data)
+
+            with patch('openedx.core.djangoapps.contentserver.local_cache.LocalAssetCache.add') as mock_add:
+                resp = self.client.get(six.text_type(asset_key), HTTP_RANGE='bytes=1000-1999')
+                self.assertEqual(resp.status_code, 206)
+                self.assertEqual(resp['Content-Range'], u'bytes 1000-1999/{}'.format(len(data)))
+                self.assertEqual(resp['Content-Length'], '1000')
+                self.assertEqual(b''.join(resp.streaming_content), data[1000:2000])
+                self.assertFalse(mock_add.called)
+
+    def test_local_cache_accel_redirect(self):
+        """
+        Test that locally cached assets are handed off to the web server when
+        CONTENTSERVER_LOCAL_CACHE_ACCEL_REDIRECT is set, whether or not a range is requested.
+        """
+        data = b'x' * (2 * 1024 * 1024)
+        asset_key = self.course_key.make_asset_key('asset', 'large_video.mp4')
+        self.contentstore.save(StaticContent(asset_key, 'large_video.mp4', 'video/mp4', data))
+        self.addCleanup(self.contentstore.delete, asset_key)
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+
+        with override_settings(
+            CONTENTSERVER_LOCAL_CACHE_DIR=cache_dir,
+            CONTENTSERVER_LOCAL_CACHE_ACCEL_REDIRECT='/cached-assets/',
+        ):
+            with self.wait_for_local_cache_fills():
+                resp = self.client.get(six.text_type(asset_key))
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn('X-Accel-Redirect', resp)
+            self.assertEqual(resp.content, data)
+
+            for headers in ({}, {'HTTP_RANGE': 'bytes=0-99'}):
+                resp = self.client.get(six.text_type(asset_key), **headers)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(resp['Content-Type'], 'video/mp4')
+                self.assertNotIn('Content-Range', resp)
+                self.assertTrue(resp['X-Accel-Redirect'].startswith('/cached-assets/'))
+                cached_path = os.path.join(cache_dir, resp['X-Accel-Redirect'][len('/cached-assets/'):])
+                with open(cached_path, 'rb') as cached_file:
+                    self.assertEqual(cached_file.read(), data)
+
 
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
@@ -0,0 +1,123 @@
+"""
+Tests for the local asset cache.
+"""
+
+
+import datetime
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from ..local_cache import LocalAssetCache
+
+
+class LocalAssetCacheTestCase(unittest.TestCase):
+    """
+    Tests for LocalAssetCache.
+    """
+    def setUp(self):
+        super(LocalAssetCacheTestCase, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = LocalAssetCache(self.directory, 100)
+
+    def read(self, location, content_digest, first=0, last=None):
+        """
+        Returns the cached data of the given asset, or None if it isn't cached.
+        """
+        asset_file = self.cache.open(location, content_digest, first, last)
+        if asset_file is None:
+            return None
+        with asset_file:
+            return asset_file.read()
+
+    def set_last_used(self, location, content_digest, last_used):
+        """
+        Sets the time at which the given cached asset was last used.
+        """
+        path = os.path.join(self.directory, self.cache.relative_path(location, content_digest))
+        os.utime(path, (last_used, os.stat(path).st_mtime))
+
+    def test_add_and_open(self):
+        self.assertIsNone(self.read('asset-a', 'digest-1'))
+        self.cache.add('asset-a', 'digest-1', [b'0123', b'456789'])
+
+        self.assertEqual(self.read('asset-a', 'digest-1'), b'0123456789')
+        self.assertEqual(self.read('asset-a', 'digest-1', 2, 4), b'234')
+        self.assertEqual(self.read('asset-a', 'digest-1', 9, 9), b'9')
+        self.assertIsNone(self.read('asset-a', 'digest-2'))
+        self.assertIsNone(self.read('asset-b', 'digest-1'))
+
+    def test_touch(self):
+        last_modified = datetime.datetime(2020, 1, 2, 3, 4, 5)
+        self.assertFalse(self.cache.touch('asset-a', 'digest'))
+        self.cache.add('asset-a', 'digest', [b'data'], last_modified=last_modified)
+        self.set_last_used('asset-a', 'digest', 1000)
+        self.assertTrue(self.cache.touch('asset-a', 'digest'))
+
+        # The file keeps the asset's modification time, so that it can be served by a web server.
+        stat = os.stat(os.path.join(self.directory, self.cache.relative_path('asset-a', 'digest')))
+        self.assertGreater(stat.st_atime, 1000)
+        self.assertEqual(datetime.datetime.utcfromtimestamp(stat.st_mtime), last_modified)
+
+    def test_ranged_file(self):
+        self.cache.add('asset-a', 'digest-1', [b'0123456789'])
+        with self.cache.open('asset-a', 'digest-1', 3, 7) as asset_file:
+            # The file descriptor is positioned at the start of the range for sendfile.
+            self.assertEqual(os.lseek(asset_file.fileno(), 0, os.SEEK_CUR), 3)
+            self.assertEqual(asset_file.read(2), b'34')
+            self.assertEqual(asset_file.read(10), b'567')
+            self.assertEqual(asset_file.read(10), b'')
+
+    def test_digest_change(self):
+        self.cache.add('asset-a', 'digest-1', [b'old'])
+        with self.cache.open('asset-a', 'digest-1') as old_file:
+            self.cache.add('asset-a', 'digest-2', [b'new'])
+
+            self.assertIsNone(self.read('asset-a', 'digest-1'))
+            self.assertEqual(self.read('asset-a', 'digest-2'), b'new')
+            # Files which are still open can still be read.
+            self.assertEqual(old_file.read(), b'old')
+
+    def test_lru_eviction(self):
+        for index, location in enumerate(['asset-a', 'asset-b', 'asset-c']):
+            self.cache.add(location, 'digest', [b'x' * 30])
+            self.set_last_used(location, 'digest', 1000 + index)
+        self.assertIsNotNone(self.read('asset-a', 'digest'))
+        self.cache.add('asset-d', 'digest', [b'x' * 20])
+
+        # asset-b is the least recently used asset once asset-a has been read again.
+        self.assertIsNone(self.read('asset-b', 'digest'))
+        self.assertIsNotNone(self.read('asset-a', 'digest'))
+        self.assertIsNotNone(self.read('asset-c', 'digest'))
+        self.assertIsNotNone(self.read('asset-d', 'digest'))
+
+    def test_existing_directory(self):
+        self.cache.add('asset-a', 'digest', [b'x' * 60])
+        self.set_last_used('asset-a', 'digest', 1000)
+        self.cache.add('asset-b', 'digest', [b'x' * 30])
+        self.set_last_used('asset-b', 'digest', 1001)
+
+        # A new cache takes the files already in the directory into account.
+        cache = LocalAssetCache(self.directory, 100)
+        cache.add('asset-c', 'digest', [b'x' * 30])
+        self.assertIsNone(self.read('asset-a', 'digest'))
+        self.assertIsNotNone(self.read('asset-b', 'digest'))
+
+    def test_add_in_background(self):
+        release = threading.Event()
+
+        def add():
+            release.wait()
+            self.cache.add('asset-a', 'digest', [b'data'])
+
+        thread = self.cache.add_in_background('asset-a', 'digest', add)
+        # The asset is only added once while it is being added.
+        self.assertIsNone(self.cache.add_in_background('asset-a', 'digest', add))
+        self.assertIsNone(self.read('asset-a', 'digest'))
+        release.set()
+        thread.join()
+        self.assertEqual(self.read('asset-a', 'digest'), b'data')
+        self.assertIsNotNone(self.cache.add_in_background('asset-a', 'digest', lambda: None))
@@ -69,6 +69,14 @@ class ContentTypeGateTransformer(BlockStructureTransformer):
             current_access = block_structure.get_xblock_field(block_key, 'group_access')
         return current_access or {}
 
+    def access_signature(self, usage_info, block_structure):
+        return (
+            ContentTypeGatingConfig.enabled_for_enrollment(
+                user=usage_info.user,
+                course_key=usage_info.course_key,
+            ),
+        )
+
     def transform(self, usage_info, block_structure):
         if not ContentTypeGatingConfig.enabled_for_enrollment(
             user=usage_info.user,
@@ -82,7 +90,9 @@ class ContentTypeGateTransformer(BlockStructureTransformer):
             weight_not_zero = block_structure.get_xblock_field(block_key, 'weight') != 0
             problem_eligible_for_content_gating = graded and has_score and weight_not_zero
             if problem_eligible_for_content_gating:
-                current_access = self._get_block_group_access(block_structure, block_key)
+                # Copy the collected group access, since it may be shared
+                # with other block structures.
+                current_access = dict(self._get_block_group_access(block_structure, block_key))
                 current_access.setdefault(
                     CONTENT_GATING_PARTITION_ID,
                     [settings.CONTENT_TYPE_GATE_GROUP_IDS['full_access']]